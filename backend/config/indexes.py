@@ -0,0 +1,147 @@
+"""
+MongoDB indexes - Declared once, created at startup
+Every index the hot queries rely on is listed in INDEX_SPECS and created by
+ensure_indexes() (called from startup_event in main.py). create_index is a
+no-op when the same index already exists, so this runs on every start. An
+index whose name exists with different keys or options is reported, not
+dropped: changing an index is a deliberate migration.
+
+HOT_QUERIES lists the queries the API runs on every turn or page load;
+`python manage.py check-indexes` explains each of them and reports any that
+still scans a whole collection.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+from config.database import get_database
+
+INDEX_SPECS: Dict[str, List[Dict[str, Any]]] = {
+    "answers": [
+        # Conversation history and results of a session, in answer order
+        {"keys": [("session_id", ASCENDING), ("created_at", ASCENDING)], "name": "session_created"},
+        # Covers the per-pillar $group of a session (scoring_service.aggregate_pillar_totals)
+        {
+            "keys": [("session_id", ASCENDING), ("dimension_code", ASCENDING), ("pillar_code", ASCENDING),
+                     ("score", ASCENDING)],
+            "name": "session_pillar_score",
+        },
+        # Local scorer training and rescore jobs walk answers criterion by criterion
+        {"keys": [("criterion_id", ASCENDING), ("_id", ASCENDING)], "name": "criterion_id"},
+    ],
+    "questions": [
+        # Latest question of a criterion in a session; the prefix serves counts per session
+        {
+            "keys": [("session_id", ASCENDING), ("criterion_id", ASCENDING), ("created_at", DESCENDING)],
+            "name": "session_criterion_created",
+        },
+    ],
+    "criteria": [
+        {"keys": [("criterion_id", ASCENDING)], "name": "criterion_id_unique", "unique": True},
+    ],
+    "companies": [
+        {"keys": [("created_at", DESCENDING)], "name": "created_at"},
+    ],
+    "sessions": [
+        # Bulk PDF export: filter on status and creation date, ordered by creation date
+        {"keys": [("status", ASCENDING), ("created_at", ASCENDING)], "name": "status_created"},
+        {"keys": [("created_at", ASCENDING)], "name": "created_at"},
+    ],
+    "llm_cache": [
+        # MongoDB removes cached LLM output once expires_at is reached
+        # (default name: the index was created lazily under it before)
+        {"keys": [("expires_at", ASCENDING)], "name": "expires_at_1", "expireAfterSeconds": 0},
+    ],
+    "jobs": [
+        # Workers claim the due job with the highest priority (services/job_queue.claim_job)
+        {"keys": [("status", ASCENDING), ("priority", DESCENDING), ("run_after", ASCENDING)], "name": "status_priority_due"},
+        # Running jobs whose lease expired
+        {"keys": [("status", ASCENDING), ("lease_until", ASCENDING)], "name": "status_lease"},
+        # Finished jobs expire (queued and running ones have no expires_at)
+        {"keys": [("expires_at", ASCENDING)], "name": "expires_at", "expireAfterSeconds": 0},
+    ],
+    "idempotency_keys": [
+        # Stored responses of Idempotency-Key requests expire (the _id is unique per session, endpoint and key)
+        {"keys": [("expires_at", ASCENDING)], "name": "expires_at", "expireAfterSeconds": 0},
+    ],
+}
+
+# (description, collection, filter, sort) - ids are placeholders, explain() only needs the shape
+HOT_QUERIES: List[Tuple[str, str, Dict[str, Any], Optional[List[Tuple[str, int]]]]] = [
+    ("conversation history", "answers", {"session_id": "0"}, [("created_at", ASCENDING)]),
+    ("answers of a session", "answers", {"session_id": "0"}, None),
+    ("last question of a criterion", "questions", {"session_id": "0", "criterion_id": "STRAT-P1-C1"},
+     [("created_at", DESCENDING)]),
+    ("questions of a session", "questions", {"session_id": "0"}, None),
+    ("criterion by id", "criteria", {"criterion_id": "STRAT-P1-C1"}, None),
+    ("latest company", "companies", {}, [("created_at", DESCENDING)]),
+    ("sessions to export", "sessions", {"status": "completed"}, [("created_at", ASCENDING)]),
+    ("next job to run", "jobs", {"status": "queued", "type": {"$in": ["submit_answer"]}, "run_after": {"$lte": datetime(2000, 1, 1)}},
+     [("priority", DESCENDING), ("run_after", ASCENDING)]),
+]
+
+
+async def ensure_indexes() -> Dict[str, List[str]]:
+    """
+    Create every index in INDEX_SPECS that does not exist yet
+
+    Returns:
+        {collection: [index names]} of the indexes now in place
+    """
+    db = get_database()
+    ensured: Dict[str, List[str]] = {}
+    for collection, specs in INDEX_SPECS.items():
+        for spec in specs:
+            options = {key: value for key, value in spec.items() if key != "keys"}
+            try:
+                await db[collection].create_index(spec["keys"], **options)
+                ensured.setdefault(collection, []).append(spec["name"])
+            except OperationFailure as e:
+                # Same name with other keys/options, or duplicates preventing a unique index
+                print(f"⚠️ Could not create index {collection}.{spec['name']}: {e}")
+    print(f"✅ Indexes ensured: {sum(len(names) for names in ensured.values())} "
+          f"on {len(ensured)} collections")
+    return ensured
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Every stage of an explain() plan tree, depth first"""
+    stages = [plan]
+    for child_key in ("inputStage", "queryPlan"):
+        if child_key in plan:
+            stages += _plan_stages(plan[child_key])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return stages
+
+
+async def explain_hot_queries() -> List[Dict[str, Any]]:
+    """
+    Winning plan of each query in HOT_QUERIES
+
+    Returns:
+        [{"query", "collection", "stages", "index", "uses_index"}] in HOT_QUERIES order
+    """
+    db = get_database()
+    report = []
+    for description, collection, query_filter, sort in HOT_QUERIES:
+        cursor = db[collection].find(query_filter)
+        if sort:
+            cursor = cursor.sort(sort)
+        explanation = await cursor.limit(1).explain()
+        plan = explanation.get("queryPlanner", {}).get("winningPlan", {})
+        stages = _plan_stages(plan)
+        index_names = [stage["indexName"] for stage in stages if stage.get("stage") == "IXSCAN" and stage.get("indexName")]
+        stage_names = [stage["stage"] for stage in stages if stage.get("stage")]
+        report.append({
+            "query": description,
+            "collection": collection,
+            "stages": stage_names,
+            "index": ", ".join(index_names) or None,
+            "uses_index": "COLLSCAN" not in stage_names and bool(index_names),
+        })
+    return report
+
@@ -44,6 +44,74 @@ class Settings(BaseSettings):
     # AI Provider Selection
     AI_PROVIDER: str = "gemini"  # Options: "openai", "gemini", "fallback"
     
+    # Results cache (shared by /results, /download-pdf and /export-json)
+    RESULTS_CACHE_MAX_ENTRIES: int = 512
+    RESULTS_CACHE_TTL_SECONDS: int = 600
+    
+    # PDF rendering (ReportLab runs in a separate process pool)
+    PDF_RENDER_WORKERS: int = 2
+    PDF_RENDER_MAX_QUEUE: int = 8  # Reports allowed to wait for a worker before rejecting
+    PDF_RENDER_TIMEOUT_SECONDS: int = 30
+    
+    # LLM response cache (first questions are shared by sessions with the same sector/size)
+    FIRST_QUESTION_CACHE_MAX_ENTRIES: int = 1024
+    FIRST_QUESTION_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    LLM_CACHE_PERSIST: bool = False  # Also keep entries in the llm_cache collection across restarts
+    
+    # Hedged AI requests: fire the secondary provider when the primary is slower
+    # than its own LLM_HEDGE_PERCENTILE latency (clamped to the min/max delay)
+    LLM_HEDGING_ENABLED: bool = False
+    LLM_HEDGE_PERCENTILE: float = 0.9
+    LLM_HEDGE_INITIAL_DELAY_SECONDS: float = 3.0  # Used until enough latency samples exist
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 0.5
+    LLM_HEDGE_MAX_DELAY_SECONDS: float = 8.0
+    
+    # Per-provider circuit breaker: skip a provider for CIRCUIT_OPEN_SECONDS once its
+    # error rate or slow-call rate over the last CIRCUIT_WINDOW_SIZE calls is too high
+    CIRCUIT_BREAKER_ENABLED: bool = True
+    CIRCUIT_WINDOW_SIZE: int = 20
+    CIRCUIT_MIN_CALLS: int = 5  # Calls needed in the window before the rates are trusted
+    CIRCUIT_ERROR_RATE: float = 0.5
+    CIRCUIT_SLOW_CALL_SECONDS: float = 10.0
+    CIRCUIT_SLOW_CALL_RATE: float = 0.5
+    CIRCUIT_OPEN_SECONDS: int = 30
+    CIRCUIT_HALF_OPEN_PROBES: int = 1
+    
+    # Diagnostic turn SLA (the frontend gives up after 30 s)
+    TURN_SLA_SECONDS: float = 25.0
+    TURN_SLA_RESERVE_SECONDS: float = 2.0  # Kept back from AI calls for the fallback and saving the turn
+    
+    # Gemini SDK calls are synchronous and run on a dedicated thread pool
+    GEMINI_MAX_CONCURRENCY: int = 8
+    GEMINI_MAX_QUEUE: int = 16  # Calls allowed to wait for a thread before falling back
+    
+    # Evaluation prompt: answers quoted verbatim, older ones are summarized per dimension (-1 = quote all)
+    PROMPT_HISTORY_VERBATIM_TURNS: int = 6
+    
+    # Storage layout of new sessions: "collections" (questions/answers collections) or "embedded" (one document)
+    SESSION_STORAGE_LAYOUT: str = "collections"
+    
+    # Local scoring tier (python manage.py train-local-scorer); disabled = shadow mode, agreement stats only
+    LOCAL_SCORER_ENABLED: bool = False
+    LOCAL_SCORER_CONFIDENCE: float = 0.9  # Probability above which the local score is used
+    LOCAL_SCORER_MIN_PRECISION: float = 0.9  # Held-out precision a model needs to be trusted
+    LOCAL_SCORER_MIN_SAMPLES: int = 200  # LLM-scored answers needed to train a (per-criterion) model
+    LOCAL_SCORER_AUDIT_RATE: float = 0.05  # Confident answers still sent to the LLM to measure agreement
+    
+    # Idempotency-Key header on answer submission and /next (frontend retries after its timeout)
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24  # Stored responses are replayed for this long
+    IDEMPOTENCY_LOCK_SECONDS: int = 60  # A claim older than this is considered abandoned (crashed request)
+    IDEMPOTENCY_WAIT_SECONDS: float = 25.0  # How long a repeat waits for the original request to finish
+    
+    # Job queue (jobs collection, run by python worker.py)
+    JOB_WORKER_IN_PROCESS: bool = False  # Also run a worker inside the API process (single-process deployments)
+    JOB_WORKER_CONCURRENCY: int = 4  # Jobs a worker runs at the same time
+    JOB_LEASE_SECONDS: int = 60  # A job whose worker stops renewing its lease is queued again after this
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF_SECONDS: float = 5.0  # Doubled after each failed attempt
+    JOB_POLL_SECONDS: float = 0.5  # Worker polling for new jobs, and job event streams polling their job
+    JOB_RETENTION_HOURS: int = 24  # Finished jobs (and their results) are kept for this long
+    
     # CORS
     # Allow both local development and production frontend
     # Can be overridden via CORS_ORIGINS environment variable
@@ -1,9 +1,28 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from bson import ObjectId
+from bson.errors import InvalidId
+from datetime import datetime
 from config.settings import settings
 from config.database import connect_to_mongo, close_mongo_connection, get_database
-from routes import company, sessions
+from config.indexes import ensure_indexes
+from routes import company, sessions, jobs
+from models.schemas import ReportExportRequest
 from seed_database import DIMENSIONS, PILLARS, CRITERIA
+from services.catalog_service import build_catalog, load_catalog
+from services.scoring_service import results_cache
+from services.pdf_executor import pdf_executor_stats, shutdown_pdf_executor
+from services.report_service import stream_reports_zip
+from services.ai_service import first_question_cache_stats, ai_provider_health
+from services.hedging import provider_latency_stats
+from services.circuit_breaker import circuit_breaker_status
+from services.provider_executor import provider_executor_stats, shutdown_provider_executor
+from services.local_scorer import load_local_scorer, local_scorer_stats
+from services.session_locks import session_lock_stats
+from services.job_queue import job_queue_stats, run_worker
+from services.job_handlers import JOB_HANDLERS
+import asyncio
 
 app = FastAPI(
     title="DigiAssistant API",
@@ -24,12 +43,25 @@ app.add_middleware(
     max_age=3600,
 )
 
+class _InProcessWorker:
+    """Job worker run by the API itself when JOB_WORKER_IN_PROCESS is set"""
+    task = None
+    stop = None
+
+_in_process_worker = _InProcessWorker()
+
 # Database Events
 @app.on_event("startup")
 async def startup_event():
     try:
         await connect_to_mongo()
         
+        try:
+            await ensure_indexes()
+        except Exception as index_error:
+            # Queries still work without indexes, only slower
+            print(f"⚠️ Could not ensure indexes: {index_error}")
+        
         # Auto-seed database if criteria are missing
         try:
             db = get_database()
@@ -39,10 +71,21 @@ async def startup_event():
                 await auto_seed_database()
             else:
                 print(f"✅ Database already seeded with {criteria_count} criteria")
+                # Load the static criteria catalog once; hot paths read it from memory
+                await load_catalog()
+                await load_local_scorer()
         except Exception as seed_error:
             print(f"⚠️ Could not check/seed database: {seed_error}")
             # Don't fail startup if seeding fails, but log it
         
+        if settings.JOB_WORKER_IN_PROCESS:
+            _in_process_worker.stop = asyncio.Event()
+            _in_process_worker.task = asyncio.create_task(run_worker(
+                JOB_HANDLERS,
+                concurrency=settings.JOB_WORKER_CONCURRENCY,
+                stop=_in_process_worker.stop
+            ))
+        
         print("DigiAssistant API is running!")
     except Exception as e:
         error_msg = str(e)
@@ -78,6 +121,12 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    if _in_process_worker.task is not None:
+        # Running jobs are finished first
+        _in_process_worker.stop.set()
+        await _in_process_worker.task
+    shutdown_pdf_executor()
+    shutdown_provider_executor()
     await close_mongo_connection()
 
 # Health Check
@@ -93,8 +142,18 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/ai")
+async def ai_health_check():
+    """AI provider circuit breaker states ("fallback" when no provider can be used)"""
+    return ai_provider_health()
+
 async def auto_seed_database():
-    """Auto-seed database with diagnostic criteria"""
+    """
+    Auto-seed database with diagnostic criteria
+    
+    The new catalog (and local scorer) is only loaded by the process that ran
+    the seed: with several API workers, restart them after POST /admin/seed.
+    """
     db = get_database()
     
     print(" Auto-seeding database...")
@@ -116,11 +175,17 @@ async def auto_seed_database():
     await db.criteria.insert_many(CRITERIA)
     print(f"   ✓ Inserted {len(CRITERIA)} criteria")
     
+    # Swap in a fresh in-memory catalog matching what was just inserted
+    catalog = build_catalog(DIMENSIONS, PILLARS, CRITERIA)
+    print(f"   ✓ Criteria catalog v{catalog.version} built")
+    # Same as a normal startup: the local scoring tier needs its models too
+    await load_local_scorer()
+    
     print("✅ Auto-seeding completed!")
 
 @app.post("/admin/seed")
 async def manual_seed_database():
-    """Manually seed the database (admin endpoint)"""
+    """Manually seed the database (admin endpoint; other API worker processes must be restarted)"""
     try:
         db = get_database()
         await auto_seed_database()
@@ -137,9 +202,52 @@ async def manual_seed_database():
             detail=f"Failed to seed database: {str(e)}"
         )
 
+@app.get("/admin/stats")
+async def admin_stats():
+    """Runtime statistics for in-process caches and worker pools (admin endpoint)"""
+    return {
+        "results_cache": results_cache.stats(),
+        "pdf_executor": pdf_executor_stats(),
+        "first_question_cache": first_question_cache_stats(),
+        "llm_providers": provider_latency_stats(),
+        "circuit_breakers": circuit_breaker_status(),
+        "gemini_executor": provider_executor_stats(),
+        "local_scorer": local_scorer_stats(),
+        "session_locks": session_lock_stats(),
+        "job_queue": await job_queue_stats()
+    }
+
+@app.post("/admin/reports/export")
+async def export_reports_zip(request: ReportExportRequest):
+    """Stream a ZIP archive with the PDF reports of many sessions (admin endpoint)"""
+    if request.session_ids:
+        try:
+            session_filter = {"_id": {"$in": [ObjectId(sid) for sid in request.session_ids]}}
+        except InvalidId:
+            raise HTTPException(status_code=400, detail="Invalid session id in session_ids")
+    else:
+        session_filter = {}
+        if request.status:
+            session_filter["status"] = request.status
+        created_range = {}
+        if request.created_from:
+            created_range["$gte"] = request.created_from
+        if request.created_to:
+            created_range["$lte"] = request.created_to
+        if created_range:
+            session_filter["created_at"] = created_range
+    
+    filename = f"diagnostic_reports_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.zip"
+    return StreamingResponse(
+        stream_reports_zip(session_filter, concurrency=max(1, settings.PDF_RENDER_WORKERS)),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
 # Include Routers
 app.include_router(company.router)
 app.include_router(sessions.router)
+app.include_router(jobs.router)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,473 @@
+"""
+Maintenance commands for the DigiAssistant backend
+
+Usage:
+    python manage.py rebuild-accumulators [--session SESSION_ID]
+    python manage.py backfill-answer-placement
+    python manage.py bench-pdf [--reports N]
+    python manage.py bench-prompt [--verbatim N]
+    python manage.py bench-fallback [--answers N]
+    python manage.py train-local-scorer [--epochs N] [--include-legacy]
+    python manage.py rescore --scorer {keyword,local,llm} [--job NAME] [--apply] [--reset] [--enqueue]
+    python manage.py check-indexes [--create]
+    python manage.py migrate-sessions --to {collections,embedded} [--session SESSION_ID] [--keep]
+    python manage.py bench-session-storage [--sessions N]
+
+Uses the same MONGODB_URL / DB_NAME configuration as the API (.env file or
+environment variables).
+"""
+import argparse
+import asyncio
+from datetime import datetime
+
+from bson import ObjectId
+
+from config.database import connect_to_mongo, close_mongo_connection, get_database
+from services.catalog_service import load_catalog
+from services.scoring_service import backfill_answer_placement, rebuild_score_accumulators
+from services.session_store import StaleSession
+
+
+async def rebuild_accumulators(args):
+    """Recompute score accumulators from the answers collection"""
+    db = get_database()
+
+    if args.session:
+        session_ids = [args.session]
+    else:
+        sessions = await db.sessions.find({}, {"_id": 1}).to_list(length=None)
+        session_ids = [str(s["_id"]) for s in sessions]
+
+    print(f"🔁 Rebuilding score accumulators for {len(session_ids)} session(s)...")
+    for i, session_id in enumerate(session_ids, 1):
+        try:
+            accumulators = await rebuild_score_accumulators(session_id)
+        except StaleSession:
+            print(f"   ⚠️ [{i}/{len(session_ids)}] {session_id}: kept changing, accumulators removed (scored from its answers)")
+            continue
+        answered = sum(d["answered"] for d in accumulators["dimensions"].values())
+        print(f"   ✓ [{i}/{len(session_ids)}] {session_id}: {answered} answers")
+
+    print("✅ Accumulators rebuilt!")
+
+
+async def backfill_placement(args):
+    """Write dimension_code / pillar_code / criterion_ordinal on answers that lack them"""
+    print("🧩 Backfilling answer placement fields...")
+    updated = await backfill_answer_placement()
+    print(f"✅ {updated} answer(s) updated")
+
+
+async def bench_pdf(args):
+    """Measure per-report render time of generate_diagnostic_pdf on sample data"""
+    import time
+    from services.pdf_service import generate_diagnostic_pdf, generate_advantages_disadvantages
+    from seed_database import DIMENSIONS, PILLARS
+
+    dimension_scores = []
+    for i, dim in enumerate(DIMENSIONS):
+        pillars = [p for p in PILLARS if p["dimension_code"] == dim["code"]]
+        pillar_scores = [
+            {
+                "pillar_code": p["code"],
+                "pillar_name": p["name"],
+                "score": (i + j) % 10,
+                "max_score": 9,
+                "percentage": round((i + j) % 10 / 9 * 100, 2)
+            }
+            for j, p in enumerate(pillars)
+        ]
+        total = sum(p["score"] for p in pillar_scores)
+        dimension_scores.append({
+            "dimension_code": dim["code"],
+            "dimension_name": dim["name"],
+            "score": round(total / 36 * 3, 2),
+            "percentage": round(total / 36 * 100, 2),
+            "pillar_scores": pillar_scores
+        })
+    advantages, disadvantages = generate_advantages_disadvantages(dimension_scores)
+    render_inputs = {
+        "company_name": "Benchmark SARL",
+        "global_score": 1.5,
+        "maturity_level": "Émergent - Digitalisation en cours",
+        "dimension_scores": dimension_scores,
+        "advantages": advantages,
+        "disadvantages": disadvantages,
+        "recommendations": ["Structurer les initiatives digitales existantes"] * 6,
+        "session_id": "benchmark"
+    }
+
+    generate_diagnostic_pdf(**render_inputs)  # warm-up (imports, fonts)
+    timings = []
+    for _ in range(args.reports):
+        start = time.perf_counter()
+        generate_diagnostic_pdf(**render_inputs)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    print(f"📄 Rendered {args.reports} reports")
+    print(f"   avg {sum(timings) / len(timings):.2f} ms | "
+          f"p50 {timings[len(timings) // 2]:.2f} ms | "
+          f"p95 {timings[int(len(timings) * 0.95) - 1]:.2f} ms")
+
+
+async def bench_prompt(args):
+    """Compare evaluation prompt sizes with and without history compaction over a full session"""
+    from services.ai_service import build_evaluation_prompt, estimate_tokens
+    from services.catalog_service import build_catalog
+    from seed_database import DIMENSIONS, PILLARS, CRITERIA
+
+    catalog = build_catalog(DIMENSIONS, PILLARS, CRITERIA)
+    answers = [
+        "Non, nous n'avons rien mis en place pour l'instant.",
+        "Nous avons commencé quelques initiatives, encore partielles, dans certains services.",
+        "Oui, c'est structuré, automatisé et suivi régulièrement par la direction depuis deux ans.",
+    ]
+
+    history = []
+    totals = {"full": 0, "compact": 0}
+    criterion = catalog.first_criterion
+    print(f"📏 Evaluation prompt size over a {len(catalog)}-turn session (~tokens)")
+    print(f"   {'turn':>4} {'full':>7} {'compact':>8}")
+    turn = 0
+    while criterion:
+        turn += 1
+        next_criterion = catalog.next_criterion(criterion["criterion_id"]) or criterion
+        answer = answers[turn % len(answers)]
+        sizes = {}
+        for mode, verbatim in (("full", -1), ("compact", args.verbatim)):
+            prompt = build_evaluation_prompt(
+                history, answer, criterion, next_criterion,
+                company_name="Benchmark SARL", sector="Retail", size="11-50", verbatim_turns=verbatim
+            )
+            sizes[mode] = estimate_tokens(prompt)
+            totals[mode] += sizes[mode]
+        if turn == 1 or turn % 12 == 0:
+            print(f"   {turn:>4} {sizes['full']:>7} {sizes['compact']:>8}")
+        history.append({"criterion_id": criterion["criterion_id"], "user_answer": answer, "score": turn % 4})
+        criterion = catalog.next_criterion(criterion["criterion_id"])
+
+    print(f"   session total: full {totals['full']} | compact {totals['compact']} "
+          f"({100 - totals['compact'] * 100 // max(1, totals['full'])}% fewer prompt tokens)")
+
+
+async def bench_fallback(args):
+    """Measure keyword fallback scoring throughput (the path every turn takes when all providers are down)"""
+    import random
+    import time
+    from services.ai_service import (
+        SCORE_KEYWORDS, estimate_score_from_answer, estimate_scores_from_answers, fallback_evaluation
+    )
+    from seed_database import CRITERIA
+
+    rng = random.Random(42)
+    vocabulary = [word for keywords in SCORE_KEYWORDS.values() for kw in keywords for word in kw.split()]
+    # Mostly ordinary words, about one keyword in ten, plus the short answers that repeat a lot
+    vocabulary += "nous avons une équipe qui gère les outils de la direction pour nos clients".split() * 60
+    short_answers = ["oui", "non", "pas encore", "oui, tous les mois", "non, jamais", "en cours"]
+    answers = [
+        rng.choice(short_answers) if rng.random() < 0.2
+        else " ".join(rng.choice(vocabulary) for _ in range(rng.randint(3, 60)))
+        for _ in range(args.answers)
+    ]
+
+    def substring_scan(answer):
+        # Previous implementation: one substring scan per keyword
+        answer_lower = answer.lower()
+        return [sum(1 for kw in SCORE_KEYWORDS[score] if kw in answer_lower) for score in range(4)]
+
+    def timed(label, fn):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        print(f"   {label:<28} {elapsed * 1e6 / len(answers):8.1f} µs/answer | {len(answers) / elapsed:10.0f} answers/s")
+
+    print(f"🔤 Keyword fallback scoring over {len(answers)} answers")
+    timed("substring scan (previous)", lambda: [substring_scan(a) for a in answers])
+    timed("word index", lambda: [estimate_score_from_answer(a) for a in answers])
+    timed("word index, batch", lambda: estimate_scores_from_answers(answers))
+    # Full outage: every turn gets a keyword score, a canned reaction and a template question
+    timed("full fallback turn", lambda: [
+        fallback_evaluation(answer, CRITERIA[i % len(CRITERIA)]) for i, answer in enumerate(answers)
+    ])
+
+
+async def train_local_scorer(args):
+    """Train the local scoring models from LLM-scored answers and store them in MongoDB"""
+    import time
+    from services.local_scorer import GLOBAL_MODEL, train_local_scorer as train
+
+    if args.include_legacy:
+        print("🧠 Training local scorer from LLM-scored answers and answers without a score source "
+              "(saved before it was recorded; some hold keyword fallback scores)...")
+    else:
+        print("🧠 Training local scorer from LLM-scored answers "
+              "(answers without a score source skipped, see --include-legacy)...")
+    start = time.perf_counter()
+    metrics = await train(epochs=args.epochs, include_legacy=args.include_legacy)
+    if not metrics:
+        print("⚠️ Not enough LLM-scored answers yet, nothing trained")
+        return
+
+    print(f"   {'model':<14} {'holdout':>7} {'accuracy':>8} {'coverage':>8} {'precision':>9}")
+    for name in sorted(metrics, key=lambda n: (n != GLOBAL_MODEL, n)):
+        m = metrics[name]
+        print(f"   {name:<14} {m['samples']:>7} {m['accuracy']:>8.2%} "
+              f"{m['coverage_at_threshold']:>8.2%} {m['precision_at_threshold']:>9.2%}")
+    print(f"✅ {len(metrics)} model(s) trained in {time.perf_counter() - start:.1f}s "
+          f"(coverage/precision at the LOCAL_SCORER_CONFIDENCE threshold; restart the API to load them)")
+
+
+async def rescore(args):
+    """Re-score stored answers with one of the scorers (resumable, see services/rescore_service.py)"""
+    import os
+    import time
+    from services.rescore_service import RescoreJob
+
+    name = args.job or f"{args.scorer}-{'apply' if args.apply else 'compare'}"
+    options = {
+        "name": name,
+        "scorer": args.scorer,
+        "batch_size": args.batch_size,
+        "workers": args.workers or os.cpu_count() or 1,
+        "llm_concurrency": args.concurrency,
+        "apply": args.apply,
+        "criterion_id": args.criterion,
+    }
+    if args.enqueue:
+        from services.job_queue import enqueue
+
+        # Checked now rather than by the worker
+        RescoreJob(**options)
+        # Retries resume from the checkpoint, except after a reset (they would reset again)
+        job_id = await enqueue("rescore", {**options, "reset": args.reset}, max_attempts=1 if args.reset else None)
+        print(f"📥 Rescore job {name} queued (job {job_id}); run python worker.py to process it")
+        return
+
+    job = RescoreJob(**options)
+    print(f"🔁 Rescoring answers with the {args.scorer} scorer (job {name})...")
+    start = time.perf_counter()
+    checkpoint = await job.run(reset=args.reset)
+    elapsed = time.perf_counter() - start
+    print(f"✅ {checkpoint['processed']} answers processed, {checkpoint['changed']} scores changed, "
+          f"{checkpoint['skipped']} skipped ({elapsed:.1f}s this run)")
+    if not args.apply:
+        print(f"   New scores are in answers.rescores.{name}; run again with --apply to replace the scores")
+
+
+async def check_indexes(args):
+    """Explain the hot queries and report those that do not use an index"""
+    from config.indexes import ensure_indexes, explain_hot_queries
+
+    if args.create:
+        await ensure_indexes()
+
+    report = await explain_hot_queries()
+    print("🔎 Query plans of the hot queries")
+    for entry in report:
+        status = "✓" if entry["uses_index"] else "✗"
+        plan = " <- ".join(entry["stages"])
+        print(f"   {status} {entry['collection']:<10} {entry['query']:<30} {entry['index'] or '-':<26} {plan}")
+
+    missing = [entry["query"] for entry in report if not entry["uses_index"]]
+    if missing:
+        print(f"❌ {len(missing)} hot query(ies) scan a whole collection (run with --create, or restart the API)")
+        raise SystemExit(1)
+    print("✅ Every hot query uses an index")
+
+
+async def migrate_sessions(args):
+    """Move sessions' questions and answers between the storage layouts (see services/session_store.py)"""
+    from services.session_store import migrate_session
+
+    db = get_database()
+    if args.session:
+        session_ids = [args.session]
+    else:
+        sessions = await db.sessions.find({}, {"_id": 1}).to_list(length=None)
+        session_ids = [str(s["_id"]) for s in sessions]
+
+    print(f"📦 Migrating {len(session_ids)} session(s) to the {args.to} layout...")
+    migrated = 0
+    failed = 0
+    for i, session_id in enumerate(session_ids, 1):
+        try:
+            switched = await migrate_session(session_id, args.to, keep_source=args.keep)
+        except StaleSession:
+            failed += 1
+            print(f"   ⚠️ [{i}/{len(session_ids)}] {session_id}: kept changing, not migrated (run it again later)")
+            continue
+        if switched:
+            migrated += 1
+            print(f"   ✓ [{i}/{len(session_ids)}] {session_id}")
+    print(f"✅ {migrated} session(s) migrated, {len(session_ids) - migrated - failed} already in the {args.to} layout"
+          + (f", {failed} not migrated" if failed else ""))
+
+
+async def bench_session_storage(args):
+    """Compare database round trips and latency of a diagnostic turn in both storage layouts"""
+    import time
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from pymongo import monitoring
+    from config import database
+    from config.indexes import ensure_indexes
+    from config.settings import settings
+    from routes.sessions import create_temp_session, _load_turn, _save_turn
+    from services.catalog_service import get_catalog
+    from services.session_store import LAYOUTS, add_question
+
+    class CommandCounter(monitoring.CommandListener):
+        count = 0
+
+        def started(self, event):
+            if event.command_name not in ("hello", "isMaster", "ismaster", "ping", "endSessions"):
+                self.count += 1
+
+        def succeeded(self, event):
+            pass
+
+        def failed(self, event):
+            pass
+
+    # A scratch database on a client that counts commands; dropped at the end
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(settings.MONGODB_URL, event_listeners=[counter])
+    bench_db_name = f"{settings.DB_NAME}_bench_storage"
+    main_db, configured_layout = database.mongodb.db, settings.SESSION_STORAGE_LAYOUT
+    database.mongodb.db = client[bench_db_name]
+    await ensure_indexes()
+    catalog = await get_catalog()
+    evaluation = {
+        "score": 2,
+        "explanation": "Benchmark",
+        "ai_reaction": "Benchmark",
+        "next_question_text": "Question de benchmark ?",
+        "score_source": "default"
+    }
+
+    print(f"🗄️ Diagnostic turns over {args.sessions} session(s) of {len(catalog)} turns per layout")
+    print(f"   {'layout':<12} {'round trips/turn':>16} {'p50 ms':>8} {'p99 ms':>8}")
+    try:
+        for layout in LAYOUTS:
+            settings.SESSION_STORAGE_LAYOUT = layout
+            timings = []
+            commands = 0
+            for _ in range(args.sessions):
+                session_id = (await create_temp_session({"name": "Benchmark SARL"}))["session_id"]
+                session = await database.mongodb.db.sessions.find_one({"_id": ObjectId(session_id)})
+                await add_question(session, {
+                    "session_id": session_id,
+                    "criterion_id": catalog.first_criterion["criterion_id"],
+                    "generated_text": "Première question ?",
+                    "order": 1,
+                    "created_at": datetime.utcnow()
+                })
+                for _ in range(len(catalog)):
+                    before = counter.count
+                    start = time.perf_counter()
+                    turn = await _load_turn(session_id)
+                    await _save_turn(turn, "Nous avons commencé, c'est en cours.", evaluation)
+                    timings.append((time.perf_counter() - start) * 1000)
+                    commands += counter.count - before
+            timings.sort()
+            print(f"   {layout:<12} {commands / len(timings):>16.1f} "
+                  f"{timings[len(timings) // 2]:>8.2f} {timings[min(len(timings) - 1, int(len(timings) * 0.99))]:>8.2f}")
+    finally:
+        settings.SESSION_STORAGE_LAYOUT = configured_layout
+        database.mongodb.db = main_db
+        await client.drop_database(bench_db_name)
+        client.close()
+
+
+# Command name -> (handler, needs database)
+COMMANDS = {
+    "rebuild-accumulators": (rebuild_accumulators, True),
+    "backfill-answer-placement": (backfill_placement, True),
+    "bench-pdf": (bench_pdf, False),
+    "bench-prompt": (bench_prompt, False),
+    "bench-fallback": (bench_fallback, False),
+    "train-local-scorer": (train_local_scorer, True),
+    "rescore": (rescore, True),
+    "check-indexes": (check_indexes, True),
+    "migrate-sessions": (migrate_sessions, True),
+    "bench-session-storage": (bench_session_storage, True),
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="DigiAssistant maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = subparsers.add_parser(
+        "rebuild-accumulators",
+        help="Recompute per-session score accumulators from stored answers"
+    )
+    rebuild.add_argument("--session", help="Only rebuild this session (default: all sessions)")
+
+    subparsers.add_parser(
+        "backfill-answer-placement",
+        help="Store dimension/pillar codes and criterion ordinal on existing answers"
+    )
+
+    bench = subparsers.add_parser("bench-pdf", help="Benchmark PDF report rendering")
+    bench.add_argument("--reports", type=int, default=50, help="Number of reports to render")
+
+    bench_prompts = subparsers.add_parser("bench-prompt", help="Benchmark evaluation prompt size over a full session")
+    bench_prompts.add_argument("--verbatim", type=int, default=6, help="Recent turns quoted verbatim when compacting")
+
+    bench_fallbacks = subparsers.add_parser("bench-fallback", help="Benchmark keyword fallback scoring throughput")
+    bench_fallbacks.add_argument("--answers", type=int, default=20000, help="Number of synthetic answers to score")
+
+    train_scorer = subparsers.add_parser("train-local-scorer", help="Train the local scoring tier from answers")
+    train_scorer.add_argument("--epochs", type=int, default=15, help="Passes over the training answers")
+    train_scorer.add_argument(
+        "--include-legacy",
+        action="store_true",
+        help="Also learn from answers saved before score_source existed (may include keyword fallback scores)"
+    )
+
+    rescores = subparsers.add_parser("rescore", help="Re-score stored answers (resumable)")
+    rescores.add_argument("--scorer", choices=["keyword", "local", "llm"], required=True)
+    rescores.add_argument("--job", help="Job name, used to resume (default: <scorer>-compare / <scorer>-apply)")
+    rescores.add_argument("--apply", action="store_true", help="Replace answer scores and rebuild accumulators")
+    rescores.add_argument("--reset", action="store_true", help="Discard the job's checkpoint and start over")
+    rescores.add_argument("--criterion", help="Only rescore answers to this criterion")
+    rescores.add_argument("--batch-size", type=int, default=500, help="Answers per read / bulk write")
+    rescores.add_argument("--workers", type=int, help="Processes for the keyword / local scorers (default: CPU count)")
+    rescores.add_argument("--concurrency", type=int, default=4, help="Concurrent provider calls for the llm scorer")
+    rescores.add_argument("--enqueue", action="store_true", help="Queue the job for a worker (python worker.py)")
+
+    check = subparsers.add_parser("check-indexes", help="Check that the hot queries use indexes (explain)")
+    check.add_argument("--create", action="store_true", help="Create missing indexes first")
+
+    migrate = subparsers.add_parser("migrate-sessions", help="Move sessions between storage layouts")
+    migrate.add_argument("--to", choices=["collections", "embedded"], required=True)
+    migrate.add_argument("--session", help="Only migrate this session (default: all sessions)")
+    migrate.add_argument("--keep", action="store_true", help="Keep the old copies of questions and answers")
+
+    bench_storage = subparsers.add_parser(
+        "bench-session-storage",
+        help="Benchmark round trips and latency per turn in both storage layouts"
+    )
+    bench_storage.add_argument("--sessions", type=int, default=5, help="Sessions to run per layout")
+
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    handler, needs_database = COMMANDS[args.command]
+    if not needs_database:
+        await handler(args)
+        return
+
+    await connect_to_mongo()
+    try:
+        await load_catalog()
+        await handler(args)
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -160,3 +160,11 @@ class SessionResults(BaseModel):
     dimension_scores: List[DimensionScore]
     gaps: List[str]
     recommendations: List[str]
+
+# ==================== REPORTS ====================
+class ReportExportRequest(BaseModel):
+    """Selects the sessions for a bulk PDF export: explicit ids, or a filter"""
+    session_ids: Optional[List[str]] = None
+    status: Optional[str] = "completed"
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
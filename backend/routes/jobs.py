@@ -0,0 +1,69 @@
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
+from services.job_queue import FINISHED, SUCCEEDED, get_job, job_status
+from config.settings import settings
+import asyncio
+import json
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+# Comment line sent when nothing changed for a while, so proxies keep the stream open
+_KEEPALIVE_SECONDS = 15
+
+async def _find_job(job_id: str):
+    job = await get_job(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
+@router.get("/{job_id}", response_model=dict)
+async def get_job_status(job_id: str):
+    """Status of a queued job, with its result once it has succeeded"""
+    return job_status(await _find_job(job_id))
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Follow a job (Server-Sent Events)
+
+    Emits a "status" event each time the job's status changes, then a "result"
+    event with the job's result (or an "error" event) once it is finished.
+    The job is polled every JOB_POLL_SECONDS.
+    """
+    job = await _find_job(job_id)
+
+    async def event_stream():
+        current = job
+        last_status = None
+        idle = 0.0
+        while True:
+            if current["status"] != last_status:
+                last_status = current["status"]
+                idle = 0.0
+                yield f"event: status\ndata: {json.dumps(current['status'])}\n\n"
+            if current["status"] in FINISHED:
+                view = job_status(current)
+                if current["status"] == SUCCEEDED:
+                    yield f"event: result\ndata: {json.dumps(view['result'], ensure_ascii=False)}\n\n"
+                else:
+                    yield f"event: error\ndata: {json.dumps(view['error'], ensure_ascii=False)}\n\n"
+                return
+            if idle >= _KEEPALIVE_SECONDS:
+                idle = 0.0
+                yield ": keepalive\n\n"
+            await asyncio.sleep(settings.JOB_POLL_SECONDS)
+            idle += settings.JOB_POLL_SECONDS
+            current = await get_job(job_id) or current
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Disable proxy buffering (nginx) so events reach the client immediately
+            "X-Accel-Buffering": "no"
+        }
+    )
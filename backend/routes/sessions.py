@@ -1,19 +1,59 @@
-from fastapi import APIRouter, HTTPException, status
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, HTTPException, Header, status
+from fastapi.responses import Response, StreamingResponse
 from models.schemas import AnswerCreate, SessionResults, MaturityProfile, DimensionScore
 from config.database import get_database
 from services.ai_service import (
     formulate_first_question, 
     evaluate_and_generate_next,
+    stream_evaluate_and_generate_next,
     generate_smart_fallback_question,
-    estimate_score_from_answer
+    estimate_score_from_answer,
+    local_evaluation
 )
-from services.pdf_service import generate_diagnostic_pdf, generate_advantages_disadvantages
-from services.scoring_service import calculate_complete_results
+from services.local_scorer import LocalPrediction, predict_local_score, serve_locally, record_agreement
+from services.pdf_executor import PdfRenderQueueFull, PdfRenderTimeout
+from services.report_service import build_session_report_inputs, report_fingerprint, get_or_render_report
+from services.scoring_service import (
+    get_session_results,
+    invalidate_session_results,
+    empty_score_accumulators,
+    accumulator_increments,
+    answer_placement,
+    build_score_grid,
+    score_grid_to_accumulators,
+    ACCUMULATORS_FIELD
+)
+from services.catalog_service import get_catalog
+from services.session_store import (
+    new_session_fields,
+    count_questions,
+    add_question,
+    last_question as last_session_question,
+    session_answers,
+    session_version,
+    record_turn,
+    StaleSession
+)
+from services.session_locks import session_lock, join_inflight, finish_inflight, run_serialized
+from services.job_queue import JobFailed, PRIORITY_INTERACTIVE, enqueue
+from services.deadline import Deadline
+from services.idempotency import (
+    InvalidIdempotencyKey,
+    IdempotencyKeyReused,
+    IdempotencyKeyInProgress,
+    request_fingerprint,
+    claim_key,
+    complete_key,
+    release_key,
+    run_once
+)
+from config.settings import settings
 from bson import ObjectId
 from datetime import datetime
+from typing import Any, Dict, Optional
+import asyncio
+import json
 import traceback
-import io
 
 router = APIRouter(prefix="/sessions", tags=["Diagnostic Sessions"])
 
@@ -23,7 +63,8 @@ async def create_temp_session(company_data: dict):
     db = get_database()
     
     # Get first criterion
-    first_criterion = await db.criteria.find_one({"criterion_id": "STRAT-P1-C1"})
+    catalog = await get_catalog()
+    first_criterion = catalog.first_criterion
     if not first_criterion:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -39,10 +80,12 @@ async def create_temp_session(company_data: dict):
         },
         "status": "in_progress",
         "progress": 0,
-        "total_questions": 72,
+        "total_questions": len(catalog),
         "current_criterion_id": first_criterion["criterion_id"],
         "created_at": datetime.utcnow(),
-        "completed_at": None
+        "completed_at": None,
+        "score_accumulators": empty_score_accumulators(),
+        **new_session_fields()
     }
     
     result = await db.sessions.insert_one(session_doc)
@@ -77,7 +120,8 @@ async def create_session(request: dict):
         )
     
     # Get first criterion
-    first_criterion = await db.criteria.find_one({"criterion_id": "STRAT-P1-C1"})
+    catalog = await get_catalog()
+    first_criterion = catalog.first_criterion
     if not first_criterion:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -89,10 +133,12 @@ async def create_session(request: dict):
         "company_id": company_id,
         "status": "in_progress",
         "progress": 0,
-        "total_questions": 72,
+        "total_questions": len(catalog),
         "current_criterion_id": first_criterion["criterion_id"],
         "created_at": datetime.utcnow(),
-        "completed_at": None
+        "completed_at": None,
+        "score_accumulators": empty_score_accumulators(),
+        **new_session_fields()
     }
     
     result = await db.sessions.insert_one(session_doc)
@@ -103,9 +149,43 @@ async def create_session(request: dict):
         "message": "Session created successfully"
     }
 
+def _idempotency_error(error: Exception) -> HTTPException:
+    if isinstance(error, IdempotencyKeyInProgress):
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(error),
+            headers={"Retry-After": "5"}
+        )
+    # Invalid key, or a key reused with a different body
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+
+def _stale_session_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Session was updated by another request; reload it and retry"
+    )
+
+async def _run_idempotent(session_id: str, scope: str, key: Optional[str], fingerprint: str, handler) -> Dict[str, Any]:
+    """Run handler once per Idempotency-Key (see services/idempotency.py)"""
+    try:
+        return await run_once(session_id, scope, key, fingerprint, handler)
+    except (InvalidIdempotencyKey, IdempotencyKeyReused, IdempotencyKeyInProgress) as e:
+        raise _idempotency_error(e)
+
 @router.post("/{session_id}/next", response_model=dict)
-async def get_next_question(session_id: str):
-    """Generate and return the next question"""
+async def get_next_question(session_id: str, idempotency_key: Optional[str] = Header(default=None)):
+    """
+    Generate and return the next question
+    
+    Requests repeated with the same Idempotency-Key header get the first response back.
+    """
+    return await _run_idempotent(
+        session_id, "next", idempotency_key, request_fingerprint(),
+        lambda: run_serialized(session_id, "next", "", lambda: _next_question(session_id))
+    )
+
+async def _next_question(session_id: str) -> Dict[str, Any]:
+    deadline = Deadline(settings.TURN_SLA_SECONDS)
     db = get_database()
     
     # Get session
@@ -121,7 +201,8 @@ async def get_next_question(session_id: str):
         return {"completed": True, "message": "Diagnostic completed"}
     
     # Get current criterion
-    criterion = await db.criteria.find_one({"criterion_id": session["current_criterion_id"]})
+    catalog = await get_catalog()
+    criterion = catalog.get(session["current_criterion_id"])
     if not criterion:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -129,7 +210,7 @@ async def get_next_question(session_id: str):
         )
     
     # Check if this is the first question
-    question_count = await db.questions.count_documents({"session_id": session_id})
+    question_count = await count_questions(session)
     
     # Get company information for first question
     company_name = None
@@ -152,11 +233,14 @@ async def get_next_question(session_id: str):
     try:
         if question_count == 0:
             # Generate first question using AI with company information
-            question_text = await formulate_first_question(
-                criterion["criterion_text"],
-                company_name=company_name,
-                sector=sector,
-                size=size
+            question_text = await _ai_deadline(deadline).run(
+                formulate_first_question(
+                    criterion["criterion_text"],
+                    company_name=company_name,
+                    sector=sector,
+                    size=size
+                ),
+                "first question"
             )
         else:
             # This shouldn't happen - questions are generated when submitting answers
@@ -189,10 +273,13 @@ async def get_next_question(session_id: str):
         "created_at": datetime.utcnow()
     }
     
-    result = await db.questions.insert_one(question_doc)
+    try:
+        question_id = await add_question(session, question_doc)
+    except StaleSession:
+        raise _stale_session_error()
     
     return {
-        "question_id": str(result.inserted_id),
+        "question_id": question_id,
         "question_text": question_text,
         "criterion_id": criterion["criterion_id"],
         "dimension": criterion["dimension_code"],
@@ -201,9 +288,8 @@ async def get_next_question(session_id: str):
         "total": session["total_questions"]
     }
 
-@router.post("/{session_id}/answers", response_model=dict)
-async def submit_answer(session_id: str, answer_data: AnswerCreate):
-    """Submit answer, get AI evaluation, and generate next question"""
+async def _load_turn(session_id: str) -> Dict[str, Any]:
+    """Load everything needed to evaluate the answer to the session's current question"""
     db = get_database()
     
     # Get session
@@ -216,13 +302,16 @@ async def submit_answer(session_id: str, answer_data: AnswerCreate):
         )
     
     # Get current criterion
-    current_criterion = await db.criteria.find_one({"criterion_id": session["current_criterion_id"]})
+    catalog = await get_catalog()
+    current_criterion = catalog.get(session["current_criterion_id"])
+    if not current_criterion:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Criterion not found"
+        )
     
     # Get last question for this criterion
-    last_question = await db.questions.find_one(
-        {"session_id": session_id, "criterion_id": session["current_criterion_id"]},
-        sort=[("created_at", -1)]
-    )
+    last_question = await last_session_question(session, session["current_criterion_id"])
     
     if not last_question:
         raise HTTPException(
@@ -231,7 +320,7 @@ async def submit_answer(session_id: str, answer_data: AnswerCreate):
         )
     
     # Get conversation history
-    previous_answers = await db.answers.find({"session_id": session_id}).to_list(length=100)
+    previous_answers = await session_answers(session, ["criterion_id", "user_text", "score"])
     history = [
         {
             "criterion_id": ans["criterion_id"],
@@ -256,69 +345,115 @@ async def submit_answer(session_id: str, answer_data: AnswerCreate):
             sector = company.get("sector")
             size = company.get("size")
     
-    # Determine next criterion
-    next_criterion_id = current_criterion.get("next_linear")
-    if not next_criterion_id:
-        # Diagnostic complete
-        next_criterion = None
-    else:
-        next_criterion = await db.criteria.find_one({"criterion_id": next_criterion_id})
-    
-    # Get AI evaluation and next question
-    if next_criterion:
-        try:
-            ai_response = await evaluate_and_generate_next(
-                conversation_history=history,
-                current_answer=answer_data.user_text,
-                current_criterion=current_criterion,
-                next_criterion=next_criterion,
-                company_name=company_name,
-                sector=sector,
-                size=size
-            )
-            
-            score = ai_response["evaluation"]["score"]
-            explanation = ai_response["evaluation"].get("justification", "")
-            ai_reaction = ai_response.get("ai_reaction", "")
-            next_question_text = ai_response.get("next_question", "")
-        except Exception as e:
-            # Log error and provide fallback
-            import traceback
-            print("[sessions.submit_answer] AI service error:")
-            traceback.print_exc()
-            # Intelligent fallback values if AI fails
-            # Estimate score based on answer length and keywords
-            score = estimate_score_from_answer(answer_data.user_text)
-            explanation = "Merci pour cette réponse détaillée."
-            ai_reaction = "Très bien, j'ai bien noté. Continuons!"
-            # Use smart question generator
-            next_question_text = generate_smart_fallback_question(next_criterion)
-    else:
-        # Last question - just evaluate
-        score = 2  # Default score
-        explanation = "Merci pour votre participation!"
-        ai_reaction = "Excellent! Nous avons terminé le diagnostic."
-        next_question_text = ""
+    return {
+        "session_id": session_id,
+        "session": session,
+        "current_criterion": current_criterion,
+        # None when the diagnostic is complete
+        "next_criterion": catalog.next_criterion(current_criterion["criterion_id"]),
+        "last_question": last_question,
+        "history": history,
+        "company_name": company_name,
+        "sector": sector,
+        "size": size
+    }
+
+def _ai_deadline(deadline: Deadline) -> Deadline:
+    """Part of the turn's time budget available to AI calls"""
+    return deadline.shrink(settings.TURN_SLA_RESERVE_SECONDS)
+
+def _evaluation_arguments(turn: Dict[str, Any], user_text: str) -> Dict[str, Any]:
+    """Keyword arguments for evaluate_and_generate_next / stream_evaluate_and_generate_next"""
+    return {
+        "conversation_history": turn["history"],
+        "current_answer": user_text,
+        "current_criterion": turn["current_criterion"],
+        "next_criterion": turn["next_criterion"],
+        "company_name": turn["company_name"],
+        "sector": turn["sector"],
+        "size": turn["size"]
+    }
+
+def _evaluation_from_ai_response(ai_response: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "score": ai_response["evaluation"]["score"],
+        "explanation": ai_response["evaluation"].get("justification", ""),
+        "ai_reaction": ai_response.get("ai_reaction", ""),
+        "next_question_text": ai_response.get("next_question", ""),
+        "score_source": ai_response.get("score_source", "llm")
+    }
+
+def _local_prediction(turn: Dict[str, Any], user_text: str) -> Optional[LocalPrediction]:
+    """Local scorer prediction for this answer (None when no model is loaded)"""
+    return predict_local_score(turn["current_criterion"]["criterion_id"], user_text)
+
+def _record_agreement(prediction: Optional[LocalPrediction], evaluation: Dict[str, Any]) -> None:
+    """Compare the local prediction with the LLM's score (keyword fallback scores are not compared)"""
+    if evaluation["score_source"] == "llm":
+        record_agreement(prediction, evaluation["score"])
+
+def _fallback_evaluation(user_text: str, next_criterion: Dict[str, Any]) -> Dict[str, Any]:
+    """Intelligent fallback values if the AI service fails"""
+    print("[sessions.submit_answer] AI service error:")
+    traceback.print_exc()
+    return {
+        # Estimate score based on answer length and keywords
+        "score": estimate_score_from_answer(user_text),
+        "explanation": "Merci pour cette réponse détaillée.",
+        "ai_reaction": "Très bien, j'ai bien noté. Continuons!",
+        # Use smart question generator
+        "next_question_text": generate_smart_fallback_question(next_criterion),
+        "score_source": "keyword"
+    }
+
+def _final_evaluation() -> Dict[str, Any]:
+    """Last question - just evaluate"""
+    return {
+        "score": 2,  # Default score
+        "explanation": "Merci pour votre participation!",
+        "ai_reaction": "Excellent! Nous avons terminé le diagnostic.",
+        "next_question_text": "",
+        "score_source": "default"
+    }
+
+async def _save_turn(turn: Dict[str, Any], user_text: str, evaluation: Dict[str, Any]) -> Dict[str, Any]:
+    """Persist the answer and the next question, advance the session and build the API response"""
+    session_id = turn["session_id"]
+    session = turn["session"]
+    next_criterion = turn["next_criterion"]
+    score = evaluation["score"]
+    explanation = evaluation["explanation"]
+    ai_reaction = evaluation["ai_reaction"]
+    next_question_text = evaluation["next_question_text"]
     
     # Save answer
     answer_doc = {
         "session_id": session_id,
-        "question_id": str(last_question["_id"]),
+        "question_id": str(turn["last_question"]["_id"]),
         "criterion_id": session["current_criterion_id"],
-        "user_text": answer_data.user_text,
+        **answer_placement(turn["current_criterion"], await get_catalog()),
+        "user_text": user_text,
         "score": score,
         "explanation": explanation,
         "ai_reaction": ai_reaction,
+        # llm / local / keyword / default - only LLM scores are used to train the local scorer
+        "score_source": evaluation["score_source"],
         "created_at": datetime.utcnow()
     }
     
-    await db.answers.insert_one(answer_doc)
-    
-    # Update session progress
+    # Update session progress and score accumulators
     new_progress = session["progress"] + 1
     update_data = {
         "progress": new_progress
     }
+    if ACCUMULATORS_FIELD in session:
+        score_increments = accumulator_increments(turn["current_criterion"], score)
+    else:
+        # Session started before accumulators existed: store them whole, with its earlier answers
+        catalog = await get_catalog()
+        answers = turn["history"] + [{"criterion_id": answer_doc["criterion_id"], "score": score}]
+        update_data[ACCUMULATORS_FIELD] = score_grid_to_accumulators(*build_score_grid(answers, catalog), catalog)
+        score_increments = {}
     
     if next_criterion:
         # Save next question
@@ -329,21 +464,20 @@ async def submit_answer(session_id: str, answer_data: AnswerCreate):
             "order": new_progress + 1,
             "created_at": datetime.utcnow()
         }
-        next_q_result = await db.questions.insert_one(next_question_doc)
-        
         update_data["current_criterion_id"] = next_criterion["criterion_id"]
         
-        await db.sessions.update_one(
-            {"_id": ObjectId(session_id)},
-            {"$set": update_data}
-        )
+        try:
+            next_question_id = await record_turn(session, answer_doc, next_question_doc, update_data, score_increments)
+        except StaleSession:
+            raise _stale_session_error()
+        invalidate_session_results(session_id)
         
         return {
             "ai_reaction": ai_reaction,
             "score": score,
             "explanation": explanation,
             "next_question": {
-                "question_id": str(next_q_result.inserted_id),
+                "question_id": next_question_id,
                 "question_text": next_question_text,
                 "criterion_id": next_criterion["criterion_id"],
                 "dimension": next_criterion["dimension_code"],
@@ -357,10 +491,11 @@ async def submit_answer(session_id: str, answer_data: AnswerCreate):
         update_data["status"] = "completed"
         update_data["completed_at"] = datetime.utcnow()
         
-        await db.sessions.update_one(
-            {"_id": ObjectId(session_id)},
-            {"$set": update_data}
-        )
+        try:
+            await record_turn(session, answer_doc, None, update_data, score_increments)
+        except StaleSession:
+            raise _stale_session_error()
+        invalidate_session_results(session_id)
         
         return {
             "ai_reaction": ai_reaction,
@@ -369,6 +504,243 @@ async def submit_answer(session_id: str, answer_data: AnswerCreate):
             "message": "Diagnostic terminé! Consultez vos résultats."
         }
 
+@router.post("/{session_id}/answers", response_model=dict)
+async def submit_answer(
+    session_id: str,
+    answer_data: AnswerCreate,
+    idempotency_key: Optional[str] = Header(default=None)
+):
+    """
+    Submit answer, get AI evaluation, and generate next question
+    
+    A retry sent with the same Idempotency-Key header (and the same answer) gets
+    the first response back: the answer is neither evaluated nor saved again.
+    Without a key, a retry arriving while the first request is still running
+    shares its response.
+    """
+    fingerprint = request_fingerprint(answer_data.user_text)
+    return await _run_idempotent(
+        session_id, "answers", idempotency_key, fingerprint,
+        lambda: _serialized_submit_answer(session_id, answer_data.user_text, fingerprint)
+    )
+
+async def _serialized_submit_answer(session_id: str, user_text: str, fingerprint: str) -> Dict[str, Any]:
+    # The answer is for the question current when it arrived: if another request
+    # moves the session on while this one waits for the lock, it gets a 409
+    expected_version = await session_version(session_id)
+    return await run_serialized(
+        session_id, "answers", fingerprint,
+        lambda: _submit_answer(session_id, user_text, expected_version=expected_version)
+    )
+
+async def _submit_answer(session_id: str, user_text: str, expected_version: Optional[int] = None) -> Dict[str, Any]:
+    deadline = Deadline(settings.TURN_SLA_SECONDS)
+    turn = await _load_turn(session_id)
+    if expected_version is not None and turn["session"].get("version", 0) != expected_version:
+        # The question it answers is no longer the current one
+        raise _stale_session_error()
+    
+    # Get AI evaluation and next question
+    if turn["next_criterion"]:
+        prediction = _local_prediction(turn, user_text)
+        if serve_locally(prediction):
+            evaluation = _evaluation_from_ai_response(local_evaluation(prediction.score, turn["next_criterion"]))
+        else:
+            try:
+                ai_response = await evaluate_and_generate_next(
+                    **_evaluation_arguments(turn, user_text),
+                    deadline=_ai_deadline(deadline)
+                )
+                evaluation = _evaluation_from_ai_response(ai_response)
+            except Exception:
+                evaluation = _fallback_evaluation(user_text, turn["next_criterion"])
+            _record_agreement(prediction, evaluation)
+    else:
+        evaluation = _final_evaluation()
+    
+    return await _save_turn(turn, user_text, evaluation)
+
+@router.post("/{session_id}/answers/jobs", response_model=dict, status_code=status.HTTP_202_ACCEPTED)
+async def queue_answer(
+    session_id: str,
+    answer_data: AnswerCreate,
+    idempotency_key: Optional[str] = Header(default=None)
+):
+    """
+    Queue an answer for evaluation by a worker (python worker.py) and return a job handle
+    
+    Poll GET /jobs/{job_id} or stream GET /jobs/{job_id}/events; the job's result
+    is the response body of POST /answers. Retries should reuse the
+    Idempotency-Key so they get the same job back.
+    """
+    return await _run_idempotent(
+        session_id, "answer_jobs", idempotency_key, request_fingerprint(answer_data.user_text),
+        lambda: _queue_answer(session_id, answer_data.user_text)
+    )
+
+async def _queue_answer(session_id: str, user_text: str) -> Dict[str, Any]:
+    # Validate now so errors keep their HTTP status
+    turn = await _load_turn(session_id)
+    job_id = await enqueue(
+        "submit_answer",
+        {
+            "session_id": session_id,
+            "user_text": user_text,
+            # The answer is for the current question: the job fails if the session moved on meanwhile
+            "session_version": turn["session"].get("version", 0)
+        },
+        priority=PRIORITY_INTERACTIVE
+    )
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/jobs/{job_id}",
+        "events_url": f"/jobs/{job_id}/events"
+    }
+
+async def run_answer_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """submit_answer job handler (services/job_handlers.py)"""
+    session_id, user_text = payload["session_id"], payload["user_text"]
+    try:
+        return await run_serialized(
+            session_id, "answers", request_fingerprint(user_text),
+            lambda: _submit_answer(session_id, user_text, expected_version=payload["session_version"])
+        )
+    except HTTPException as e:
+        # Session not found or moved on: retrying cannot help
+        raise JobFailed(e.detail)
+
+def _sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def _event_stream_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Disable proxy buffering (nginx) so events reach the client immediately
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+@router.post("/{session_id}/answers/stream")
+async def submit_answer_stream(
+    session_id: str,
+    answer_data: AnswerCreate,
+    idempotency_key: Optional[str] = Header(default=None)
+):
+    """
+    Streaming version of submit_answer (Server-Sent Events)
+    
+    Emits "score", "justification", "ai_reaction" and "next_question" events as
+    soon as each field can be parsed from the AI provider's output, then a
+    "result" event carrying exactly the response body of POST /answers once
+    the answer and next question have been saved. Clients should use the
+    "result" event as the source of truth (it has the question_id and progress).
+    If the answer cannot be saved once the stream has started (another request
+    moved the session on: status 409), an "error" event with the status and
+    detail ends the stream instead of the "result" event.
+    
+    Idempotency-Key keys are shared with POST /answers: a repeat only gets the
+    "result" event of the first request.
+    """
+    deadline = Deadline(settings.TURN_SLA_SECONDS)
+    fingerprint = request_fingerprint(answer_data.user_text)
+    # Claim the key and validate before the response starts so errors keep their HTTP status
+    if idempotency_key is not None:
+        try:
+            stored = await claim_key(session_id, "answers", idempotency_key, fingerprint)
+        except (InvalidIdempotencyKey, IdempotencyKeyReused, IdempotencyKeyInProgress) as e:
+            raise _idempotency_error(e)
+        if stored is not None:
+            async def replay():
+                yield _sse_event("result", stored)
+            return _event_stream_response(replay())
+    
+    try:
+        turn = await _load_turn(session_id)
+    except BaseException:
+        if idempotency_key is not None:
+            await release_key(session_id, "answers", idempotency_key)
+        raise
+    
+    async def event_stream():
+        completed = False
+        try:
+            async for event, data in _serialized_stream_turn(turn, answer_data.user_text, fingerprint, deadline):
+                if event == "result" and idempotency_key is not None:
+                    await complete_key(session_id, "answers", idempotency_key, data)
+                    completed = True
+                yield _sse_event(event, data)
+        except HTTPException as e:
+            # The response status is already sent
+            yield _sse_event("error", {"status": e.status_code, "detail": e.detail})
+        finally:
+            # Nothing saved (AI error, client gone mid-stream): let a retry run again
+            if idempotency_key is not None and not completed:
+                await release_key(session_id, "answers", idempotency_key)
+    
+    return _event_stream_response(event_stream())
+
+async def _check_turn_current(turn: Dict[str, Any]) -> None:
+    """The turn was loaded before taking the session lock: 409 if another request moved the session on since"""
+    if await session_version(turn["session_id"]) != turn["session"].get("version", 0):
+        raise _stale_session_error()
+
+async def _serialized_stream_turn(turn: Dict[str, Any], user_text: str, fingerprint: str, deadline: Deadline):
+    """_stream_turn under the session lock; an identical request in flight only yields its "result" """
+    session_id = turn["session_id"]
+    leader, shared = join_inflight(session_id, "answers", fingerprint)
+    if not leader:
+        yield "result", await asyncio.shield(shared)
+        return
+    finished = False
+    try:
+        async with session_lock(session_id):
+            await _check_turn_current(turn)
+            async for event, data in _stream_turn(turn, user_text, deadline):
+                if event == "result":
+                    finish_inflight(session_id, "answers", fingerprint, data)
+                    finished = True
+                yield event, data
+    except BaseException as e:
+        if not finished:
+            finish_inflight(session_id, "answers", fingerprint, error=e)
+        raise
+
+async def _stream_turn(turn: Dict[str, Any], user_text: str, deadline: Deadline):
+    """(event, data) pairs of submit_answer_stream, ending with ("result", response)"""
+    if turn["next_criterion"]:
+        prediction = _local_prediction(turn, user_text)
+        if serve_locally(prediction):
+            ai_response = local_evaluation(prediction.score, turn["next_criterion"])
+            yield "score", ai_response["evaluation"]["score"]
+            yield "justification", ai_response["evaluation"]["justification"]
+            yield "ai_reaction", ai_response["ai_reaction"]
+            yield "next_question", ai_response["next_question"]
+            evaluation = _evaluation_from_ai_response(ai_response)
+        else:
+            try:
+                ai_response = None
+                async for event, value in stream_evaluate_and_generate_next(
+                    **_evaluation_arguments(turn, user_text),
+                    deadline=_ai_deadline(deadline)
+                ):
+                    if event == "result":
+                        ai_response = value
+                    else:
+                        yield event, value
+                evaluation = _evaluation_from_ai_response(ai_response)
+            except Exception:
+                evaluation = _fallback_evaluation(user_text, turn["next_criterion"])
+            _record_agreement(prediction, evaluation)
+    else:
+        evaluation = _final_evaluation()
+    
+    response = await _save_turn(turn, user_text, evaluation)
+    yield "result", response
+
 @router.get("/{session_id}/results", response_model=SessionResults)
 async def get_results(session_id: str):
     """Get session results with scores and recommendations using the official scoring methodology"""
@@ -395,7 +767,7 @@ async def get_results(session_id: str):
             company_name = company["name"]
     
     # Calculate complete results using the official scoring methodology
-    results = await calculate_complete_results(session_id)
+    results = await get_session_results(session_id, session)
     
     # Convert dimension scores to DimensionScore schema
     dimension_scores = [
@@ -430,8 +802,8 @@ async def get_results(session_id: str):
     )
 
 @router.get("/{session_id}/download-pdf")
-async def download_pdf_report(session_id: str):
-    """Generate and download PDF report using the official scoring methodology"""
+async def download_pdf_report(session_id: str, if_none_match: Optional[str] = Header(default=None)):
+    """Download the PDF report, rendering it only when its inputs or template changed"""
     db = get_database()
     
     # Get session
@@ -443,54 +815,39 @@ async def download_pdf_report(session_id: str):
             detail="Session not found"
         )
     
-    # Get company name
-    company_name = "Unknown Company"
-    if "company_info" in session:
-        company_name = session["company_info"].get("name", "Unknown Company")
-    elif "company_id" in session:
-        company = await db.companies.find_one({"_id": ObjectId(session["company_id"])})
-        if company:
-            company_name = company["name"]
-    
     # Calculate complete results using the official scoring methodology
-    results = await calculate_complete_results(session_id)
+    render_inputs = await build_session_report_inputs(session)
     
-    # Format dimension scores for PDF generation
-    dimension_scores = [
-        {
-            "dimension_code": dim["dimension_code"],
-            "dimension_name": dim["dimension_name"],
-            "score": dim["score"],
-            "avg_score": dim["score"],
-            "percentage": dim["percentage"],
-            "answered_count": dim["answered_count"],
-            "pillar_scores": dim["pillar_scores"]
-        }
-        for dim in results["dimension_scores"]
-    ]
-    
-    # Generate advantages and disadvantages
-    advantages, disadvantages = generate_advantages_disadvantages(dimension_scores)
-    
-    # Generate PDF
-    pdf_bytes = generate_diagnostic_pdf(
-        company_name=company_name,
-        global_score=results["global_score"],
-        maturity_level=results["maturity_profile"]["description"],
-        dimension_scores=dimension_scores,
-        advantages=advantages,
-        disadvantages=disadvantages,
-        recommendations=results["recommendations"],
-        session_id=session_id
-    )
+    # The ETag is the report's content address: unchanged inputs mean an unchanged file
+    etag = f'"{report_fingerprint(render_inputs)}"'
+    cache_headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache"
+    }
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
     
-    # Create streaming response
-    pdf_stream = io.BytesIO(pdf_bytes)
+    # Load the stored report or generate it in the render process pool
+    try:
+        _, pdf_bytes = await get_or_render_report(render_inputs)
+    except PdfRenderQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many reports are being generated. Please retry in a moment.",
+            headers={"Retry-After": "5"}
+        )
+    except PdfRenderTimeout:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="PDF report generation timed out"
+        )
     
-    return StreamingResponse(
-        pdf_stream,
+    # Response sets Content-Length from the body
+    return Response(
+        content=pdf_bytes,
         media_type="application/pdf",
         headers={
+            **cache_headers,
             "Content-Disposition": f"attachment; filename=diagnostic_report_{session_id}.pdf"
         }
     )
@@ -523,10 +880,10 @@ async def export_json_results(session_id: str):
             }
     
     # Calculate complete results
-    results = await calculate_complete_results(session_id)
+    results = await get_session_results(session_id, session)
     
     # Get all answers for detailed export
-    answers = await db.answers.find({"session_id": session_id}).to_list(length=100)
+    answers = await session_answers(session)
     answers_export = [
         {
             "criterion_id": ans["criterion_id"],
@@ -1,9 +1,18 @@
 from openai import AsyncOpenAI
 from config.settings import settings
-import json
-from typing import List, Dict, Any
+from config.database import get_database
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, AsyncIterator, Awaitable, Optional, Tuple
+import hashlib
 import random
+import re
 import asyncio
+from services.cache_service import TTLCache
+from services.deadline import Deadline, remaining_or_none
+from services.circuit_breaker import circuit_breaker_status, get_breaker
+from services.hedging import hedged_call, timed_call
+from services.provider_executor import run_in_gemini_pool
+from services.llm_json import EvaluationStreamParser, parse_evaluation_response
 
 # Try to import Google Gemini
 try:
@@ -79,28 +88,87 @@ elif openai_client:
 else:
     print("[AI] No AI provider available - using intelligent fallback system")
 
-def estimate_score_from_answer(answer: str) -> int:
-    """Estimate a score based on answer characteristics (fallback when AI unavailable)"""
-    answer_lower = answer.lower()
-    answer_length = len(answer.split())
-    
+# ==================== KEYWORD SCORER ====================
+# Keyword indicators per score, used when no AI provider can evaluate an answer
+SCORE_KEYWORDS = {
     # Score 0 indicators - Absence/Non-existence
-    score_0_keywords = ["aucun", "non", "pas du tout", "jamais", "rien", "absent", "inexistant", "n'existe pas", "pas encore", "inconnu", "nul", "zéro", "sans", "manque", "faible", "insuffisant", "limité", "peu développé"]
+    0: ["aucun", "non", "pas du tout", "jamais", "rien", "absent", "inexistant", "n'existe pas", "pas encore", "inconnu", "nul", "zéro", "sans", "manque", "faible", "insuffisant", "limité", "peu développé"],
     
     # Score 1 indicators - Basic/Initial
-    score_1_keywords = ["début", "basique", "simple", "manuel", "occasionnel", "parfois", "peu", "limité", "minimal", "élémentaire","rudimentaire","léger","restreint","sporadique","rare","sommaire","superficiel","trivial","bas de gamme","ordinaire","peu fréquent","primaire","modeste","simplet","frugal","succinct","minimaliste"]
+    1: ["début", "basique", "simple", "manuel", "occasionnel", "parfois", "peu", "limité", "minimal", "élémentaire","rudimentaire","léger","restreint","sporadique","rare","sommaire","superficiel","trivial","bas de gamme","ordinaire","peu fréquent","primaire","modeste","simplet","frugal","succinct","minimaliste"],
     
     # Score 2 indicators - Intermediate/Developing
-    score_2_keywords = ["en cours","développement","partiellement","quelques","certains","moyennement","progressivement","intermédiaire","modérément","évolutif","provisoire","temporaire","relatif","semi","graduel","périphérique","fragmentaire","occasionnel"]
+    2: ["en cours","développement","partiellement","quelques","certains","moyennement","progressivement","intermédiaire","modérément","évolutif","provisoire","temporaire","relatif","semi","graduel","périphérique","fragmentaire","occasionnel"],
     
     # Score 3 indicators - Advanced/Mature
-    score_3_keywords = ["oui","régulièrement","systématique","mature","avancé","structuré","optimisé","automatisé","complet","intégré","toujours","tous","parfait","constamment","total","efficace","professionnel","maîtrisé","permanent","continu","exhaustif","solide","fiable","développé","abouti","standardisé","éprouvé"]
+    3: ["oui","régulièrement","systématique","mature","avancé","structuré","optimisé","automatisé","complet","intégré","toujours","tous","parfait","constamment","total","efficace","professionnel","maîtrisé","permanent","continu","exhaustif","solide","fiable","développé","abouti","standardisé","éprouvé"],
+}
+
+_WORD_PATTERN = re.compile(r"\w+")
+_KEYWORD_SUFFIXES = ("", "e", "s", "es")  # "structurées" counts as "structuré"
+
+def _compile_keyword_matcher():
+    """
+    Index every keyword by its first word, so an answer is matched with set lookups on its words
+    
+    Keywords match whole words, and their last word may carry a plural or
+    feminine ending. A multi-word keyword is only searched for (with its own
+    regex) when its first word is in the answer. Every keyword is checked, so
+    overlapping keywords all count ("peu développé" also contains "peu" and
+    "développé").
     
-    # Count keyword matches
-    score_0_count = sum(1 for kw in score_0_keywords if kw in answer_lower)
-    score_1_count = sum(1 for kw in score_1_keywords if kw in answer_lower)
-    score_2_count = sum(1 for kw in score_2_keywords if kw in answer_lower)
-    score_3_count = sum(1 for kw in score_3_keywords if kw in answer_lower)
+    Returns:
+        ({word form: keyword}, {first word: [(last word, pattern, keyword)]})
+    """
+    single_words = {}
+    phrases = {}
+    endings = "|".join(suffix for suffix in _KEYWORD_SUFFIXES if suffix)
+    for keywords in SCORE_KEYWORDS.values():
+        for keyword in keywords:
+            words = _WORD_PATTERN.findall(keyword)
+            if len(words) == 1:
+                for suffix in _KEYWORD_SUFFIXES:
+                    single_words.setdefault(words[0] + suffix, keyword)
+            else:
+                pattern = re.compile(r"\b" + r"\W+".join(map(re.escape, words)) + rf"(?:{endings})?\b")
+                entry = (words[-1], pattern, keyword)
+                if entry not in phrases.setdefault(words[0], []):
+                    phrases[words[0]].append(entry)
+    return single_words, phrases
+
+_KEYWORD_WORDS, _KEYWORD_PHRASES = _compile_keyword_matcher()
+# set.intersection only iterates the smaller side when both are sets (a dict would be walked key by key)
+_KEYWORD_WORD_SET = frozenset(_KEYWORD_WORDS)
+_KEYWORD_PHRASE_STARTS = frozenset(_KEYWORD_PHRASES)
+_KEYWORD_SCORES = {
+    keyword: frozenset(score for score, kws in SCORE_KEYWORDS.items() if keyword in kws)
+    for keywords in SCORE_KEYWORDS.values() for keyword in keywords
+}
+
+def _find_keywords(text: str, tokens: List[str]) -> set:
+    """Keywords present in `text` (lowercase, split on whitespace into `tokens`) as whole words"""
+    token_set = set(tokens)
+    # Most tokens are plain words; only those carrying punctuation need the word regex
+    words = {token for token in token_set if token.isalnum()}
+    if len(words) != len(token_set):
+        for token in token_set - words:
+            words.update(_WORD_PATTERN.findall(token))
+    found = {_KEYWORD_WORDS[word] for word in words.intersection(_KEYWORD_WORD_SET)}
+    for first_word in words.intersection(_KEYWORD_PHRASE_STARTS):
+        for last_word, pattern, phrase in _KEYWORD_PHRASES[first_word]:
+            if last_word in text and pattern.search(text):
+                found.add(phrase)
+    return found
+
+def _keyword_counts(found: set) -> List[int]:
+    counts = [0, 0, 0, 0]
+    for keyword in found:
+        for score in _KEYWORD_SCORES[keyword]:
+            counts[score] += 1
+    return counts
+
+def _score_from_counts(counts: List[int], answer_length: int) -> int:
+    score_0_count, score_1_count, score_2_count, score_3_count = counts
     
     # Determine score based on keywords and length
     if score_0_count > 0 or answer_length < 5:
@@ -115,6 +183,24 @@ def estimate_score_from_answer(answer: str) -> int:
         # Default: medium score for unclear answers
         return 1 if answer_length < 15 else 2
 
+def estimate_score_from_answer(answer: str) -> int:
+    """Estimate a score based on answer characteristics (fallback when AI unavailable)"""
+    text = answer.lower()
+    tokens = text.split()
+    return _score_from_counts(_keyword_counts(_find_keywords(text, tokens)), len(tokens))
+
+def estimate_scores_from_answers(answers: List[str]) -> List[int]:
+    """
+    Batch version of estimate_score_from_answer
+    
+    Identical answers (common during an outage: "oui", "non", ...) are scored once.
+    """
+    scores = {}
+    for answer in answers:
+        if answer not in scores:
+            scores[answer] = estimate_score_from_answer(answer)
+    return [scores[answer] for answer in answers]
+
 def generate_smart_fallback_reaction(score: int) -> str:
     """Generate contextual AI reaction based on score"""
     reactions = {
@@ -234,13 +320,158 @@ Return JSON (all text in French): {
   "next_question": "question conversationnelle en français pour le prochain critère"
 }"""
 
+def fallback_first_question(criterion_text: str, company_name: str = None) -> str:
+    """Greeting used when no AI provider is available or all of them failed"""
+    greeting = "Bonjour! Je suis votre conseiller digital."
+    if company_name:
+        greeting = f"Bonjour {company_name}! Je suis votre conseiller digital."
+    return (
+        f"{greeting} "
+        f"Commençons par comprendre votre situation actuelle. "
+        f"Concernant {criterion_text.lower()}, "
+        f"où en êtes-vous aujourd'hui?"
+    )
+
+# ==================== FIRST QUESTION CACHE ====================
+# The first-question prompt only depends on the criterion, the company name,
+# sector and size. Generated questions are cached per (criterion, sector, size,
+# provider) with the company name replaced by a placeholder, so sessions that
+# share a sector and size reuse one generation. Entries live in memory and,
+# with LLM_CACHE_PERSIST, in the llm_cache collection so restarts keep them.
+
+FIRST_QUESTION_PROMPT_VERSION = "1"  # Bump when the first-question prompts change
+COMPANY_PLACEHOLDER = "[[COMPANY]]"
+LLM_CACHE_COLLECTION = "llm_cache"
+
+first_question_cache = TTLCache(
+    "first_question",
+    max_entries=settings.FIRST_QUESTION_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.FIRST_QUESTION_CACHE_TTL_SECONDS
+)
+_persistent_cache_stats = {"hits": 0, "misses": 0, "writes": 0, "errors": 0}
+
+def _normalize_prompt_value(value: Any) -> str:
+    return " ".join(str(value or "").split()).casefold()
+
+def _first_question_provider() -> str:
+    """Provider (and model) formulate_first_question tries first"""
+    if gemini_client and (settings.AI_PROVIDER == "gemini" or not openai_client):
+        return f"gemini:{gemini_model_name}"
+    return "openai:gpt-4o-mini"
+
+def first_question_cache_key(criterion_text: str, company_name: str = None, sector: str = None, size: str = None) -> str:
+    """Fingerprint of the normalized first-question prompt (the company name itself is not part of it)"""
+    payload = "\x1f".join([
+        FIRST_QUESTION_PROMPT_VERSION,
+        _first_question_provider(),
+        _normalize_prompt_value(criterion_text),
+        _normalize_prompt_value(sector),
+        _normalize_prompt_value(size),
+        # Prompts with and without a company name differ in wording
+        "named" if company_name else "anonymous",
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _question_to_template(question: str, company_name: str = None) -> Optional[str]:
+    """Replace the company name with the placeholder; None if the name can't be removed cleanly"""
+    if not company_name:
+        return question
+    template = question.replace(company_name, COMPANY_PLACEHOLDER)
+    # The model may have altered the name (case, abbreviation): never cache another company's name
+    for word in company_name.split():
+        if len(word) >= 3 and re.search(rf"\b{re.escape(word)}\b", template, re.IGNORECASE):
+            return None
+    return template
+
+def _template_to_question(template: str, company_name: str = None) -> str:
+    return template.replace(COMPANY_PLACEHOLDER, company_name or "")
+
+async def _load_persisted_template(key: str) -> Optional[str]:
+    if not settings.LLM_CACHE_PERSIST:
+        return None
+    try:
+        doc = await get_database()[LLM_CACHE_COLLECTION].find_one(
+            {"_id": key, "expires_at": {"$gt": datetime.utcnow()}},
+            {"text": 1}
+        )
+    except Exception as e:
+        _persistent_cache_stats["errors"] += 1
+        print(f"[AI] LLM cache read failed: {e}")
+        return None
+    _persistent_cache_stats["hits" if doc else "misses"] += 1
+    return doc["text"] if doc else None
+
+async def _persist_template(key: str, template: str) -> None:
+    if not settings.LLM_CACHE_PERSIST:
+        return
+    try:
+        # Expired documents are removed by the TTL index (config/indexes.py)
+        collection = get_database()[LLM_CACHE_COLLECTION]
+        now = datetime.utcnow()
+        await collection.replace_one(
+            {"_id": key},
+            {
+                "kind": "first_question",
+                "text": template,
+                "created_at": now,
+                "expires_at": now + timedelta(seconds=settings.FIRST_QUESTION_CACHE_TTL_SECONDS)
+            },
+            upsert=True
+        )
+        _persistent_cache_stats["writes"] += 1
+    except Exception as e:
+        _persistent_cache_stats["errors"] += 1
+        print(f"[AI] LLM cache write failed: {e}")
+
+def first_question_cache_stats() -> Dict[str, Any]:
+    """Hit-rate counters of the first-question cache (admin stats endpoint)"""
+    persistent_lookups = _persistent_cache_stats["hits"] + _persistent_cache_stats["misses"]
+    return {
+        "memory": first_question_cache.stats(),
+        "persistent": {
+            "enabled": settings.LLM_CACHE_PERSIST,
+            **_persistent_cache_stats,
+            "hit_rate": round(_persistent_cache_stats["hits"] / persistent_lookups, 4) if persistent_lookups else 0.0
+        }
+    }
+
 async def formulate_first_question(
     criterion_text: str, 
     company_name: str = None, 
     sector: str = None, 
     size: str = None
 ) -> str:
-    """Generate the first question of the diagnostic"""
+    """Generate the first question of the diagnostic (cached, see FIRST QUESTION CACHE)"""
+    
+    # Use fallback if no API key
+    if not openai_client and not gemini_client:
+        return fallback_first_question(criterion_text, company_name)
+    
+    key = first_question_cache_key(criterion_text, company_name, sector, size)
+    template = first_question_cache.get(key)
+    if template is None:
+        template = await _load_persisted_template(key)
+        if template is not None:
+            first_question_cache.set(key, template)
+    if template is not None:
+        print(f"[AI] First question served from cache")
+        return _template_to_question(template, company_name)
+    
+    question, generated = await _generate_first_question(criterion_text, company_name, sector, size)
+    if generated:
+        template = _question_to_template(question, company_name)
+        if template is not None:
+            first_question_cache.set(key, template)
+            await _persist_template(key, template)
+    return question
+
+async def _generate_first_question(
+    criterion_text: str, 
+    company_name: str = None, 
+    sector: str = None, 
+    size: str = None
+) -> Tuple[str, bool]:
+    """Ask the AI providers for the first question; returns (question, generated_by_ai)"""
     
     # Build company context string
     company_context = ""
@@ -252,18 +483,6 @@ async def formulate_first_question(
             company_context += f" C'est une entreprise de taille {size}."
         company_context += " "
     
-    # Use fallback if no API key
-    if not openai_client and not gemini_client:
-        greeting = f"Bonjour! Je suis votre conseiller digital."
-        if company_name:
-            greeting = f"Bonjour {company_name}! Je suis votre conseiller digital."
-        return (
-            f"{greeting} "
-            f"Commençons par comprendre votre situation actuelle. "
-            f"Concernant {criterion_text.lower()}, "
-            f"où en êtes-vous aujourd'hui?"
-        )
-    
     # Direct prompt - Gemini works better with simple, direct requests
     context_part = f"{company_context}" if company_context else ""
     full_prompt = (
@@ -274,113 +493,175 @@ async def formulate_first_question(
         f"Soyez conversationnel et professionnel (2-3 phrases maximum)."
     )
     
+    providers = _available_providers()
+    
     # Try Gemini first if available and configured
-    if gemini_client and (settings.AI_PROVIDER == "gemini" or not openai_client):
+    if "Gemini" in providers:
         try:
-            print(f"[AI] Calling Gemini API for first question...")
-            # Gemini uses synchronous API, run in thread to avoid blocking
-            response = await asyncio.to_thread(
-                client.generate_content,
-                full_prompt,
-                generation_config=genai.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=500,  # Increased to avoid truncation
-                    top_p=0.95,
-                    top_k=40,
-                ),
-                safety_settings=[
-                    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                ]
-            )
-            # Extract text safely - handle different response formats
-            result = None
-            if response.candidates and len(response.candidates) > 0:
-                candidate = response.candidates[0]
-                # Check finish reason: 1=STOP (success), 2=MAX_TOKENS (truncated but has content), 3=SAFETY, 4=RECITATION, 5=OTHER
-                finish_reason = candidate.finish_reason
-                if finish_reason == 3:  # SAFETY - actually blocked
-                    print(f"[AI] Warning: Response was blocked by safety filters (finish_reason=3). Using fallback...")
-                    raise Exception("Response blocked by safety filters")
+            async with get_breaker("Gemini").guard():
+                print(f"[AI] Calling Gemini API for first question...")
+                # Gemini uses synchronous API, run on its dedicated thread pool to avoid blocking
+                response = await run_in_gemini_pool(
+                    client.generate_content,
+                    full_prompt,
+                    generation_config=genai.GenerationConfig(
+                        temperature=0.7,
+                        max_output_tokens=500,  # Increased to avoid truncation
+                        top_p=0.95,
+                        top_k=40,
+                    ),
+                    safety_settings=[
+                        {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+                        {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+                        {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+                        {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+                    ]
+                )
+                # Extract text safely - handle different response formats
+                result = None
+                if response.candidates and len(response.candidates) > 0:
+                    candidate = response.candidates[0]
+                    # Check finish reason: 1=STOP (success), 2=MAX_TOKENS (truncated but has content), 3=SAFETY, 4=RECITATION, 5=OTHER
+                    finish_reason = candidate.finish_reason
+                    if finish_reason == 3:  # SAFETY - actually blocked
+                        print(f"[AI] Warning: Response was blocked by safety filters (finish_reason=3). Using fallback...")
+                        raise Exception("Response blocked by safety filters")
                 
-                # Extract text from parts (works even with finish_reason=2 MAX_TOKENS)
-                if candidate.content and candidate.content.parts and len(candidate.content.parts) > 0:
-                    result = candidate.content.parts[0].text.strip()
-                    if finish_reason == 2:  # MAX_TOKENS - response was truncated
-                        print(f"[AI] Note: Response truncated (finish_reason=2), but content extracted successfully")
+                    # Extract text from parts (works even with finish_reason=2 MAX_TOKENS)
+                    if candidate.content and candidate.content.parts and len(candidate.content.parts) > 0:
+                        result = candidate.content.parts[0].text.strip()
+                        if finish_reason == 2:  # MAX_TOKENS - response was truncated
+                            print(f"[AI] Note: Response truncated (finish_reason=2), but content extracted successfully")
             
-            # Fallback to response.text if no content in parts (shouldn't happen, but just in case)
-            if not result:
-                try:
-                    result = response.text.strip()
-                except ValueError as e:
-                    # This happens when finish_reason is 2 and trying to use .text property
-                    print(f"[AI] Warning: Could not use response.text (likely truncated). Trying alternative extraction...")
-                    # Try to get any available text
-                    if response.candidates and response.candidates[0].content:
-                        result = "".join([part.text for part in response.candidates[0].content.parts if hasattr(part, 'text')]).strip()
-                    if not result:
-                        raise Exception("Could not extract response text")
+                # Fallback to response.text if no content in parts (shouldn't happen, but just in case)
+                if not result:
+                    try:
+                        result = response.text.strip()
+                    except ValueError as e:
+                        # This happens when finish_reason is 2 and trying to use .text property
+                        print(f"[AI] Warning: Could not use response.text (likely truncated). Trying alternative extraction...")
+                        # Try to get any available text
+                        if response.candidates and response.candidates[0].content:
+                            result = "".join([part.text for part in response.candidates[0].content.parts if hasattr(part, 'text')]).strip()
+                        if not result:
+                            raise Exception("Could not extract response text")
             
-            print(f"[AI] Successfully generated first question with Gemini")
-            return result
+                print(f"[AI] Successfully generated first question with Gemini")
+                return result, True
         except Exception as gemini_error:
             print(f"[AI] Gemini failed: {gemini_error}. Trying OpenAI fallback...")
             # Fall through to OpenAI attempt
     
     # Try OpenAI if available (either as primary or fallback)
-    if openai_client:
+    if "OpenAI" in providers:
         try:
-            print(f"[AI] Calling OpenAI API for first question...")
-            context_info = ""
-            if company_name:
-                context_info = f"Company: {company_name}"
-                if sector:
-                    context_info += f", Sector: {sector}"
-                if size:
-                    context_info += f", Size: {size}"
-                context_info += "\n"
+            async with get_breaker("OpenAI").guard():
+                print(f"[AI] Calling OpenAI API for first question...")
+                context_info = ""
+                if company_name:
+                    context_info = f"Company: {company_name}"
+                    if sector:
+                        context_info += f", Sector: {sector}"
+                    if size:
+                        context_info += f", Size: {size}"
+                    context_info += "\n"
             
-            prompt = f"{context_info}First criterion: '{criterion_text}'\n\nYour friendly welcome question (in French, mention the company name if provided):"
-            response = await openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT_FIRST_QUESTION},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=200
-            )
-            result = response.choices[0].message.content.strip()
-            print(f"[AI] Successfully generated first question with OpenAI")
-            return result
+                prompt = f"{context_info}First criterion: '{criterion_text}'\n\nYour friendly welcome question (in French, mention the company name if provided):"
+                response = await openai_client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[
+                        {"role": "system", "content": SYSTEM_PROMPT_FIRST_QUESTION},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.7,
+                    max_tokens=200
+                )
+                result = response.choices[0].message.content.strip()
+                print(f"[AI] Successfully generated first question with OpenAI")
+                return result, True
         except Exception as openai_error:
             print(f"[AI] OpenAI also failed: {openai_error}")
     
     # If both fail, use intelligent fallback
     print(f"[AI] Both providers failed, using intelligent fallback")
-    greeting = "Bonjour! Je suis votre conseiller digital."
-    if company_name:
-        greeting = f"Bonjour {company_name}! Je suis votre conseiller digital."
-    return (
-        f"{greeting} "
-        f"Commençons par comprendre votre situation actuelle. "
-        f"Concernant {criterion_text.lower()}, "
-        f"où en êtes-vous aujourd'hui?"
-    )
+    return fallback_first_question(criterion_text, company_name), False
 
-async def evaluate_and_generate_next(
+# ==================== HISTORY COMPACTION ====================
+# Inlining every previous answer makes the prompt grow with each turn (the
+# whole session then costs O(n^2) tokens). Only the last
+# PROMPT_HISTORY_VERBATIM_TURNS answers are quoted; older ones are reduced to
+# per-dimension score digests, which is all the model needs to keep context.
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for mixed French/English prompts)"""
+    return max(1, len(text) // 4)
+
+def _format_turn(number: int, turn: Dict[str, Any]) -> str:
+    return f"Q{number} ({turn.get('criterion_id')}): User said: \"{turn.get('user_answer')}\" [Score: {turn.get('score', 0)}]"
+
+def summarize_history(turns: List[Dict[str, Any]]) -> List[str]:
+    """One digest line per dimension: answer count, average score and per-pillar averages"""
+    dimensions: Dict[str, Dict[str, List[float]]] = {}
+    for turn in turns:
+        parts = (turn.get("criterion_id") or "").split("-")
+        dimension = parts[0] or "?"
+        pillar = parts[1] if len(parts) > 1 else "?"
+        dimensions.setdefault(dimension, {}).setdefault(pillar, []).append(float(turn.get("score", 0) or 0))
+    
+    lines = []
+    for dimension, pillars in dimensions.items():
+        scores = [score for pillar_scores in pillars.values() for score in pillar_scores]
+        pillar_text = ", ".join(
+            f"{pillar} {sum(pillar_scores) / len(pillar_scores):.1f}"
+            for pillar, pillar_scores in pillars.items()
+        )
+        lines.append(
+            f"- {dimension}: {len(scores)} answers, average {sum(scores) / len(scores):.2f}/3 ({pillar_text})"
+        )
+    return lines
+
+def format_conversation_history(conversation_history: List[Dict[str, Any]], verbatim_turns: int = None) -> str:
+    """
+    Conversation context for the evaluation prompt
+    
+    Args:
+        conversation_history: Previous turns in order (criterion_id, user_answer, score)
+        verbatim_turns: Recent turns quoted in full (default PROMPT_HISTORY_VERBATIM_TURNS;
+            negative disables compaction)
+    
+    Returns:
+        Score digests of the older turns followed by the recent turns verbatim
+    """
+    if not conversation_history:
+        return "This is the first question."
+    
+    if verbatim_turns is None:
+        verbatim_turns = settings.PROMPT_HISTORY_VERBATIM_TURNS
+    if verbatim_turns < 0 or len(conversation_history) <= verbatim_turns:
+        return "\n".join(_format_turn(i + 1, turn) for i, turn in enumerate(conversation_history))
+    
+    split = len(conversation_history) - verbatim_turns
+    lines = [f"Earlier answers Q1-Q{split} (score digest per dimension and pillar):"]
+    lines.extend(summarize_history(conversation_history[:split]))
+    if verbatim_turns:
+        lines.append("Most recent answers:")
+        lines.extend(_format_turn(split + i + 1, turn) for i, turn in enumerate(conversation_history[split:]))
+    return "\n".join(lines)
+
+def _log_prompt_size(prompt: str, conversation_history: List[Dict[str, Any]]) -> None:
+    print(f"[AI] Evaluation prompt: ~{estimate_tokens(prompt)} tokens ({len(conversation_history)} previous turns)")
+
+def build_evaluation_prompt(
     conversation_history: List[Dict[str, Any]],
     current_answer: str,
     current_criterion: Dict[str, Any],
     next_criterion: Dict[str, Any],
     company_name: str = None,
     sector: str = None,
-    size: str = None
-) -> Dict[str, Any]:
-    """Evaluate current answer and generate next question"""
+    size: str = None,
+    verbatim_turns: int = None
+) -> str:
+    """Build the user prompt asking to evaluate an answer and formulate the next question"""
     
     # Build company context
     company_context = ""
@@ -394,13 +675,7 @@ async def evaluate_and_generate_next(
         company_context += "\n"
     
     # Build conversation context
-    history_text = "\n".join([
-        f"Q{i+1} ({turn.get('criterion_id')}): User said: \"{turn.get('user_answer')}\" [Score: {turn.get('score', 0)}]"
-        for i, turn in enumerate(conversation_history)
-    ])
-    
-    if not history_text:
-        history_text = "This is the first question."
+    history_text = format_conversation_history(conversation_history, verbatim_turns)
     
     # Format current criterion options
     options_text = "\n".join([
@@ -408,7 +683,7 @@ async def evaluate_and_generate_next(
         for opt in current_criterion.get('options', [])
     ])
     
-    prompt = f"""
+    return f"""
 {company_context}**CONVERSATION SO FAR:**
 {history_text}
 
@@ -433,142 +708,396 @@ async def evaluate_and_generate_next(
 
 Remember: You're having a conversation, not filling out a form!
 """
+
+def build_gemini_evaluation_prompt(prompt: str) -> str:
+    """Gemini has no system role or JSON mode: inline the system prompt and the expected format"""
+    return f"{SYSTEM_PROMPT_ADAPTIVE}\n\n{prompt}\n\nIMPORTANT: Return ONLY valid JSON in this exact format (ALL TEXT IN FRENCH):\n{{\n  \"evaluation\": {{\"score\": 0-3, \"justification\": \"explication en français\"}},\n  \"ai_reaction\": \"réaction empathique en français\",\n  \"next_question\": \"question conversationnelle en français (NE PAS commencer par 'Given' ou 'Ensuite')\"\n}}"
+
+def gemini_evaluation_options(timeout: float = None) -> Dict[str, Any]:
+    """Generation config and safety settings for evaluation calls (plus a request timeout if given)"""
+    options = {
+        "generation_config": genai.GenerationConfig(
+            temperature=0.7,
+            max_output_tokens=500,
+            top_p=0.95,
+            top_k=40,
+        ),
+        "safety_settings": [
+            {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_ONLY_HIGH"},
+            {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_ONLY_HIGH"},
+            {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_ONLY_HIGH"},
+            {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_ONLY_HIGH"},
+        ]
+    }
+    if timeout:
+        options["request_options"] = {"timeout": timeout}
+    return options
+
+def clean_question_text(next_q: str) -> str:
+    """Remove unwanted prefixes (English and overly formal French) from a generated question"""
+    unwanted_prefixes = [
+        "Given", "Given that", "Now, ", "Next, ", "Then, ",
+        "Étant donné que", "Étant donné", "Vu que", "Considérant que",
+        "Ensuite, ", "Question suivante: ", "Par la suite, "
+    ]
+    next_q_lower = next_q.lower()
+    for prefix in unwanted_prefixes:
+        if next_q_lower.startswith(prefix.lower()):
+            next_q = next_q[len(prefix):].strip()
+            # Capitalize first letter if needed
+            if next_q and not next_q[0].isupper():
+                next_q = next_q[0].upper() + next_q[1:]
+            print(f"[AI] Cleaned up question (removed '{prefix}' prefix)")
+            break
+    return next_q
+
+def clean_next_question(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Clean up the next_question of a parsed evaluation if it starts with "Given" or similar"""
+    if "next_question" in result:
+        result["next_question"] = clean_question_text(result["next_question"])
+    return result
+
+def fallback_evaluation(current_answer: str, next_criterion: Dict[str, Any]) -> Dict[str, Any]:
+    """Keyword-based evaluation used when no AI provider is available or all of them failed"""
+    estimated_score = estimate_score_from_answer(current_answer)
+    return {
+        "evaluation": {
+            "score": estimated_score, 
+            "justification": f"Score estimé basé sur l'analyse de votre réponse"
+        },
+        "ai_reaction": generate_smart_fallback_reaction(estimated_score),
+        "next_question": generate_smart_fallback_question(next_criterion),
+        "score_source": "keyword"
+    }
+
+def local_evaluation(score: int, next_criterion: Dict[str, Any]) -> Dict[str, Any]:
+    """Evaluation for an answer the local scorer was confident about (no provider call)"""
+    return {
+        "evaluation": {
+            "score": score,
+            "justification": "Score estimé à partir des réponses précédemment évaluées"
+        },
+        "ai_reaction": generate_smart_fallback_reaction(score),
+        "next_question": generate_smart_fallback_question(next_criterion),
+        "score_source": "local"
+    }
+
+def complete_evaluation(result: Dict[str, Any], next_criterion: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill the fields a truncated response was missing with fallback text (keeps the AI score)"""
+    if not result.get("ai_reaction"):
+        result["ai_reaction"] = generate_smart_fallback_reaction(result["evaluation"]["score"])
+    if not result.get("next_question"):
+        result["next_question"] = generate_smart_fallback_question(next_criterion)
+    return result
+
+async def _evaluate_with_gemini(prompt: str, next_criterion: Dict[str, Any], timeout: float = None) -> Dict[str, Any]:
+    """One Gemini evaluation call; raises on any failure"""
+    print(f"[AI] Calling Gemini API for evaluation and next question...")
+    # Gemini uses synchronous API, run on its dedicated thread pool to avoid blocking
+    response = await run_in_gemini_pool(
+        gemini_client.generate_content,
+        build_gemini_evaluation_prompt(prompt),
+        **gemini_evaluation_options(timeout)
+    )
+    # Check if response was blocked (2=MAX_TOKENS is kept: complete fields are salvaged)
+    if response.candidates and response.candidates[0].finish_reason == 3:
+        print(f"[AI] Warning: Response was blocked (finish_reason=3). Using fallback...")
+        raise Exception("Response blocked by safety filters")
     
-    # Use fallback if no API key available
-    if not openai_client and not gemini_client:
-        estimated_score = estimate_score_from_answer(current_answer)
-        return {
-            "evaluation": {
-                "score": estimated_score, 
-                "justification": f"Score estimé basé sur l'analyse de votre réponse"
-            },
-            "ai_reaction": generate_smart_fallback_reaction(estimated_score),
-            "next_question": generate_smart_fallback_question(next_criterion)
-        }
+    # Extract text safely
+    if response.candidates and response.candidates[0].content:
+        response_text = response.candidates[0].content.parts[0].text.strip()
+    else:
+        response_text = response.text.strip()
     
-                    # Try Gemini first if available and configured
+    # Parse JSON from response (Gemini sometimes adds markdown formatting or gets cut off)
+    result = complete_evaluation(
+        clean_next_question(parse_evaluation_response(response_text)),
+        next_criterion
+    )
+    print(f"[AI] Successfully generated evaluation and next question with Gemini")
+    return result
+
+async def _evaluate_with_openai(prompt: str, next_criterion: Dict[str, Any], timeout: float = None) -> Dict[str, Any]:
+    """One OpenAI evaluation call; raises on any failure"""
+    print(f"[AI] Calling OpenAI API for evaluation and next question...")
+    response = await openai_client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT_ADAPTIVE},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.7,
+        max_tokens=500,
+        response_format={"type": "json_object"},
+        **_openai_timeout(timeout)
+    )
+    result = complete_evaluation(
+        clean_next_question(parse_evaluation_response(response.choices[0].message.content)),
+        next_criterion
+    )
+    print(f"[AI] Successfully generated evaluation and next question with OpenAI")
+    return result
+
+def _openai_timeout(timeout: float = None) -> Dict[str, Any]:
+    return {"timeout": timeout} if timeout else {}
+
+def _within(deadline: Optional[Deadline], awaitable: Awaitable[Any], step: str) -> Awaitable[Any]:
+    """`awaitable`, cancelled when `deadline` passes (unchanged without a deadline)"""
+    return deadline.run(awaitable, step) if deadline else awaitable
+
+def _provider_order() -> List[str]:
+    """Providers to try, primary first: Gemini (if selected or the only one), then OpenAI"""
+    providers = []
     if gemini_client and (settings.AI_PROVIDER == "gemini" or not openai_client):
+        providers.append("Gemini")
+    if openai_client:
+        providers.append("OpenAI")
+    return providers
+
+def _available_providers() -> List[str]:
+    """_provider_order() without the providers whose circuit breaker is open"""
+    providers = []
+    for name in _provider_order():
+        if get_breaker(name).available():
+            providers.append(name)
+        else:
+            print(f"[AI] Skipping {name} (circuit {get_breaker(name).state})")
+    return providers
+
+def ai_provider_health() -> Dict[str, Any]:
+    """Configured vs usable providers and their circuit breaker states"""
+    configured = _provider_order()
+    available = [name for name in configured if get_breaker(name).available()]
+    if not available:
+        status = "fallback"
+    elif len(available) < len(configured):
+        status = "degraded"
+    else:
+        status = "healthy"
+    return {
+        "status": status,
+        "configured_providers": configured,
+        "available_providers": available,
+        "circuits": circuit_breaker_status()
+    }
+
+async def evaluate_and_generate_next(
+    conversation_history: List[Dict[str, Any]],
+    current_answer: str,
+    current_criterion: Dict[str, Any],
+    next_criterion: Dict[str, Any],
+    company_name: str = None,
+    sector: str = None,
+    size: str = None,
+    deadline: Optional[Deadline] = None
+) -> Dict[str, Any]:
+    """
+    Evaluate current answer and generate next question
+    
+    Providers are tried in _provider_order(), skipping those whose circuit
+    breaker is open (services/circuit_breaker.py). With LLM_HEDGING_ENABLED the
+    secondary provider is raced against a slow primary (see services/hedging.py)
+    instead of only being called after the primary failed. Provider calls are
+    cancelled when `deadline` passes, and the keyword fallback is returned.
+    """
+    
+    prompt = build_evaluation_prompt(
+        conversation_history, current_answer, current_criterion, next_criterion,
+        company_name=company_name, sector=sector, size=size
+    )
+    _log_prompt_size(prompt, conversation_history)
+    
+    evaluators = {"Gemini": _evaluate_with_gemini, "OpenAI": _evaluate_with_openai}
+    calls = [
+        (name, lambda name=name: get_breaker(name).call(lambda: _within(
+            deadline,
+            evaluators[name](prompt, next_criterion, remaining_or_none(deadline)),
+            f"{name} evaluation"
+        )))
+        for name in _available_providers()
+    ]
+    
+    # Use fallback if no API key available (or every provider's circuit is open)
+    if not calls:
+        return fallback_evaluation(current_answer, next_criterion)
+    
+    if settings.LLM_HEDGING_ENABLED and len(calls) > 1:
         try:
-            print(f"[AI] Calling Gemini API for evaluation and next question...")
-            full_prompt = f"{SYSTEM_PROMPT_ADAPTIVE}\n\n{prompt}\n\nIMPORTANT: Return ONLY valid JSON in this exact format (ALL TEXT IN FRENCH):\n{{\n  \"evaluation\": {{\"score\": 0-3, \"justification\": \"explication en français\"}},\n  \"ai_reaction\": \"réaction empathique en français\",\n  \"next_question\": \"question conversationnelle en français (NE PAS commencer par 'Given' ou 'Ensuite')\"\n}}"
-            # Gemini uses synchronous API, run in thread to avoid blocking
-            response = await asyncio.to_thread(
-                gemini_client.generate_content,
-                full_prompt,
-                generation_config=genai.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=500,
-                    top_p=0.95,
-                    top_k=40,
-                ),
-                safety_settings=[
-                    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_ONLY_HIGH"},
-                    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_ONLY_HIGH"},
-                    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_ONLY_HIGH"},
-                    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_ONLY_HIGH"},
-                ]
-            )
-            # Check if response was blocked
-            if response.candidates and response.candidates[0].finish_reason == 2:
-                print(f"[AI] Warning: Response was blocked (finish_reason=2). Using fallback...")
-                raise Exception("Response blocked by safety filters")
-            
-            # Extract text safely
-            if response.candidates and response.candidates[0].content:
-                response_text = response.candidates[0].content.parts[0].text.strip()
-            else:
-                response_text = response.text.strip()
-            
-            # Parse JSON from response (Gemini sometimes adds markdown formatting)
-            # Remove markdown code blocks if present
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.startswith("```"):
-                response_text = response_text[3:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
-            response_text = response_text.strip()
-            
-            result = json.loads(response_text)
-            
-            # Clean up the next_question if it starts with "Given" or other unwanted patterns
-            if "next_question" in result:
-                next_q = result["next_question"]
-                # Remove common unwanted prefixes (English and overly formal French)
-                unwanted_prefixes = [
-                    "Given", "Given that", "Now, ", "Next, ", "Then, ",
-                    "Étant donné que", "Étant donné", "Vu que", "Considérant que",
-                    "Ensuite, ", "Question suivante: ", "Par la suite, "
-                ]
-                next_q_lower = next_q.lower()
-                for prefix in unwanted_prefixes:
-                    if next_q_lower.startswith(prefix.lower()):
-                        next_q = next_q[len(prefix):].strip()
-                        # Capitalize first letter if needed
-                        if next_q and not next_q[0].isupper():
-                            next_q = next_q[0].upper() + next_q[1:]
-                        result["next_question"] = next_q
-                        print(f"[AI] Cleaned up question (removed '{prefix}' prefix)")
-                        break
-            
-            print(f"[AI] Successfully generated evaluation and next question with Gemini")
+            _, result = await hedged_call(calls[0], calls[1])
             return result
-        except Exception as gemini_error:
-            print(f"[AI] Gemini failed: {gemini_error}. Trying OpenAI fallback...")
-            # Fall through to OpenAI attempt
-        except Exception as gemini_error:
-            print(f"[AI] Gemini failed: {gemini_error}. Trying OpenAI fallback...")
-            # Fall through to OpenAI attempt
+        except Exception as hedge_error:
+            print(f"[AI] Hedged providers failed: {hedge_error}")
+    else:
+        for name, call in calls:
+            if deadline and deadline.expired:
+                print(f"[AI] Turn deadline reached, skipping {name}")
+                break
+            try:
+                return await timed_call(name, call)
+            except Exception as provider_error:
+                print(f"[AI] {name} failed: {provider_error}")
     
-    # Try OpenAI if available (either as primary or fallback)
-    if openai_client:
+    # If both fail, use intelligent fallback
+    print(f"[AI] Both providers failed, using intelligent fallback")
+    return fallback_evaluation(current_answer, next_criterion)
+
+# ==================== STREAMING ====================
+# Streaming variants yield the evaluation fields as soon as the incremental
+# parser (services/llm_json.py) sees them complete, so the UI can show the
+# reaction early.
+
+async def _stream_gemini_text(prompt: str, timeout: float = None) -> AsyncIterator[str]:
+    """Stream Gemini output chunks; the synchronous SDK iterator runs in a worker thread"""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+    
+    def produce():
         try:
-            print(f"[AI] Calling OpenAI API for evaluation and next question...")
-            response = await openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT_ADAPTIVE},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=500,
-                response_format={"type": "json_object"}
+            response = gemini_client.generate_content(
+                build_gemini_evaluation_prompt(prompt),
+                stream=True,
+                **gemini_evaluation_options(timeout)
             )
-            result = json.loads(response.choices[0].message.content)
-            
-            # Clean up the next_question if it starts with "Given" or other unwanted patterns
-            if "next_question" in result:
-                next_q = result["next_question"]
-                # Remove common unwanted prefixes (English and overly formal French)
-                unwanted_prefixes = [
-                    "Given", "Given that", "Now, ", "Next, ", "Then, ",
-                    "Étant donné que", "Étant donné", "Vu que", "Considérant que",
-                    "Ensuite, ", "Question suivante: ", "Par la suite, "
-                ]
-                next_q_lower = next_q.lower()
-                for prefix in unwanted_prefixes:
-                    if next_q_lower.startswith(prefix.lower()):
-                        next_q = next_q[len(prefix):].strip()
-                        # Capitalize first letter if needed
-                        if next_q and not next_q[0].isupper():
-                            next_q = next_q[0].upper() + next_q[1:]
-                        result["next_question"] = next_q
-                        print(f"[AI] Cleaned up question (removed '{prefix}' prefix)")
-                        break
+            for chunk in response:
+                if chunk.candidates and chunk.candidates[0].content:
+                    text = "".join(part.text for part in chunk.candidates[0].content.parts if hasattr(part, "text"))
+                    if text:
+                        loop.call_soon_threadsafe(queue.put_nowait, text)
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+    
+    def report_failure(task: asyncio.Task):
+        # e.g. ProviderSaturated: the producer never ran
+        if not task.cancelled() and task.exception() is not None:
+            queue.put_nowait(task.exception())
+    
+    producer = asyncio.ensure_future(run_in_gemini_pool(produce))
+    producer.add_done_callback(report_failure)
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Leaves the queue if still waiting; a running producer keeps its thread until Gemini returns
+        producer.cancel()
+
+async def _stream_openai_text(prompt: str, timeout: float = None) -> AsyncIterator[str]:
+    """Stream OpenAI output chunks"""
+    stream = await openai_client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT_ADAPTIVE},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.7,
+        max_tokens=500,
+        response_format={"type": "json_object"},
+        stream=True,
+        **_openai_timeout(timeout)
+    )
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+async def stream_evaluate_and_generate_next(
+    conversation_history: List[Dict[str, Any]],
+    current_answer: str,
+    current_criterion: Dict[str, Any],
+    next_criterion: Dict[str, Any],
+    company_name: str = None,
+    sector: str = None,
+    size: str = None,
+    deadline: Optional[Deadline] = None
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Streaming version of evaluate_and_generate_next
+    
+    Yields (event, value) pairs: "score", "justification", "ai_reaction" and
+    "next_question" as soon as each is complete in the provider output, then a
+    final ("result", full_evaluation) with the same shape evaluate_and_generate_next
+    returns. Provider failures fall back like the non-streaming version; if a
+    provider fails after fields were already emitted, those fields are kept and
+    only the missing ones are filled from the fallback. The same happens when
+    `deadline` passes mid-stream.
+    """
+    prompt = build_evaluation_prompt(
+        conversation_history, current_answer, current_criterion, next_criterion,
+        company_name=company_name, sector=sector, size=size
+    )
+    _log_prompt_size(prompt, conversation_history)
+    
+    streamers = {"Gemini": _stream_gemini_text, "OpenAI": _stream_openai_text}
+    providers = [(name, streamers[name]) for name in _available_providers()]
+    
+    emitted: Dict[str, Any] = {}
+    for provider_name, stream_text in providers:
+        if deadline and deadline.expired:
+            print(f"[AI] Turn deadline reached, skipping {provider_name}")
+            break
+        parser = EvaluationStreamParser()
+        chunks = stream_text(prompt, remaining_or_none(deadline))
+        try:
+            print(f"[AI] Streaming evaluation and next question from {provider_name}...")
+            async with get_breaker(provider_name).guard():
+                ended = False
+                while not ended:
+                    try:
+                        text = await _within(deadline, chunks.__anext__(), f"{provider_name} stream")
+                    except StopAsyncIteration:
+                        # A number the response ended on (cut off after the score) is complete
+                        completed, ended = parser.close(), True
+                    else:
+                        completed = parser.feed(text)
+                    for field, value in completed.items():
+                        if field == "next_question":
+                            value = clean_question_text(value)
+                        emitted[field] = value
+                        yield field, value
             
-            print(f"[AI] Successfully generated evaluation and next question with OpenAI")
-            return result
-        except Exception as openai_error:
-            print(f"[AI] OpenAI also failed: {openai_error}")
+            if len(emitted) == 4:
+                print(f"[AI] Successfully streamed evaluation and next question with {provider_name}")
+            else:
+                print(f"[AI] {provider_name} stream was incomplete (got: {', '.join(emitted) or 'nothing'})")
+            if emitted:
+                break
+        except Exception as stream_error:
+            print(f"[AI] {provider_name} streaming failed: {stream_error}")
+            if emitted:
+                # The client already saw part of this answer - complete it rather than restart
+                break
+        finally:
+            await chunks.aclose()
     
-    # If both fail, use intelligent fallback
-    print(f"[AI] Both providers failed, using intelligent fallback")
-    estimated_score = estimate_score_from_answer(current_answer)
-    return {
-        "evaluation": {
-            "score": estimated_score, 
-            "justification": f"Score estimé basé sur l'analyse de votre réponse"
-        },
-        "ai_reaction": generate_smart_fallback_reaction(estimated_score),
-        "next_question": generate_smart_fallback_question(next_criterion)
+    if not emitted:
+        print(f"[AI] No provider could stream, using intelligent fallback")
+    score = emitted.get("score")
+    justification = ""
+    score_source = "llm"
+    if score is None:
+        score = estimate_score_from_answer(current_answer)
+        justification = "Score estimé basé sur l'analyse de votre réponse"
+        score_source = "keyword"
+    values = {
+        "score": score,
+        "justification": justification,
+        "ai_reaction": generate_smart_fallback_reaction(score),
+        "next_question": generate_smart_fallback_question(next_criterion),
+    }
+    for field, value in values.items():
+        if field not in emitted:
+            emitted[field] = value
+            yield field, value
+    
+    yield "result", {
+        "evaluation": {"score": emitted["score"], "justification": emitted["justification"]},
+        "ai_reaction": emitted["ai_reaction"],
+        "next_question": emitted["next_question"],
+        "score_source": score_source
     }
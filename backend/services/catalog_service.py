@@ -0,0 +1,198 @@
+"""
+Criteria Catalog Service - In-memory, immutable view of the diagnostic framework
+The 6 dimensions, 24 pillars and 72 criteria only change when the database is
+re-seeded, so they are loaded once at startup and swapped atomically on /admin/seed.
+Hot-path endpoints read criteria from here instead of querying MongoDB.
+"""
+
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+import hashlib
+import json
+
+from config.database import get_database
+
+
+class CriteriaCatalog:
+    """
+    Immutable snapshot of DIMENSIONS / PILLARS / CRITERIA
+
+    Criteria are kept in diagnostic order (the `next_linear` chain starting at the
+    first criterion), with lookups precomputed:
+    - index_by_id: criterion_id -> position in `criteria`
+    - next_index: position -> position of the next_linear criterion (or None)
+    - dimension_slices: dimension_code -> (start, stop) range in `criteria`
+    - pillar_slices: (dimension_code, pillar_code) -> (start, stop) range in `criteria`
+    - grid_positions: position -> (dimension, pillar, criterion) cell of the
+      dimensions x pillars x criteria score grid (6 x 4 x 3), or None if unplaced
+    """
+
+    __slots__ = (
+        "version", "fingerprint", "dimensions", "pillars", "criteria",
+        "index_by_id", "next_index", "dimension_slices", "pillar_slices",
+        "pillars_by_dimension", "grid_shape", "grid_positions",
+    )
+
+    def __init__(
+        self,
+        dimensions: List[Dict[str, Any]],
+        pillars: List[Dict[str, Any]],
+        criteria: List[Dict[str, Any]],
+        version: int
+    ):
+        dimensions = [_strip_id(d) for d in dimensions]
+        pillars = [_strip_id(p) for p in pillars]
+        ordered = _order_criteria([_strip_id(c) for c in criteria])
+
+        index_by_id = {c["criterion_id"]: i for i, c in enumerate(ordered)}
+        next_index = tuple(index_by_id.get(c.get("next_linear")) for c in ordered)
+
+        dimension_slices: Dict[str, Tuple[int, int]] = {}
+        pillar_slices: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        for i, criterion in enumerate(ordered):
+            dim_key = criterion["dimension_code"]
+            pillar_key = (criterion["dimension_code"], criterion["pillar_code"])
+            start, _ = dimension_slices.get(dim_key, (i, i))
+            dimension_slices[dim_key] = (start, i + 1)
+            start, _ = pillar_slices.get(pillar_key, (i, i))
+            pillar_slices[pillar_key] = (start, i + 1)
+
+        pillars_by_dimension: Dict[str, List[Dict[str, Any]]] = {}
+        for pillar in pillars:
+            pillars_by_dimension.setdefault(pillar["dimension_code"], []).append(pillar)
+
+        # Place every criterion in the fixed dimension x pillar x criterion grid
+        dimension_index = {d["code"]: i for i, d in enumerate(dimensions)}
+        pillar_index = {
+            (p["dimension_code"], p["code"]): i
+            for items in pillars_by_dimension.values()
+            for i, p in enumerate(items)
+        }
+        grid_positions = []
+        for i, criterion in enumerate(ordered):
+            pillar_key = (criterion["dimension_code"], criterion["pillar_code"])
+            d = dimension_index.get(criterion["dimension_code"])
+            p = pillar_index.get(pillar_key)
+            if d is None or p is None:
+                grid_positions.append(None)
+            else:
+                grid_positions.append((d, p, i - pillar_slices[pillar_key][0]))
+        placed = [pos for pos in grid_positions if pos is not None]
+
+        self.version = version
+        self.fingerprint = _fingerprint(dimensions, pillars, ordered)
+        self.dimensions = tuple(MappingProxyType(d) for d in dimensions)
+        self.pillars = tuple(MappingProxyType(p) for p in pillars)
+        self.criteria = tuple(MappingProxyType(c) for c in ordered)
+        self.index_by_id = MappingProxyType(index_by_id)
+        self.next_index = next_index
+        self.dimension_slices = MappingProxyType(dimension_slices)
+        self.pillar_slices = MappingProxyType(pillar_slices)
+        self.pillars_by_dimension = MappingProxyType({
+            code: tuple(MappingProxyType(p) for p in items)
+            for code, items in pillars_by_dimension.items()
+        })
+        self.grid_shape = (
+            len(dimensions),
+            max((len(items) for items in pillars_by_dimension.values()), default=0),
+            max((pos[2] + 1 for pos in placed), default=0),
+        )
+        self.grid_positions = tuple(grid_positions)
+
+    def __len__(self) -> int:
+        return len(self.criteria)
+
+    @property
+    def first_criterion(self) -> Optional[Mapping[str, Any]]:
+        return self.criteria[0] if self.criteria else None
+
+    def get(self, criterion_id: Optional[str]) -> Optional[Mapping[str, Any]]:
+        """Return the criterion with this id, or None if it is unknown"""
+        index = self.index_by_id.get(criterion_id)
+        return self.criteria[index] if index is not None else None
+
+    def next_criterion(self, criterion_id: str) -> Optional[Mapping[str, Any]]:
+        """Return the criterion following `criterion_id` on the linear path (None at the end)"""
+        index = self.index_by_id.get(criterion_id)
+        if index is None:
+            return None
+        next_index = self.next_index[index]
+        return self.criteria[next_index] if next_index is not None else None
+
+    def dimension_criteria(self, dimension_code: str) -> Tuple[Mapping[str, Any], ...]:
+        start, stop = self.dimension_slices.get(dimension_code, (0, 0))
+        return self.criteria[start:stop]
+
+    def pillar_criteria(self, dimension_code: str, pillar_code: str) -> Tuple[Mapping[str, Any], ...]:
+        start, stop = self.pillar_slices.get((dimension_code, pillar_code), (0, 0))
+        return self.criteria[start:stop]
+
+
+def _strip_id(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a seed/database document without its Mongo `_id`"""
+    return {key: value for key, value in doc.items() if key != "_id"}
+
+
+def _order_criteria(criteria: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Order criteria along the next_linear chain, keeping unreachable ones at the end"""
+    by_id = {c["criterion_id"]: c for c in criteria}
+    targets = {c.get("next_linear") for c in criteria}
+    heads = [c for c in criteria if c["criterion_id"] not in targets]
+
+    ordered = []
+    seen = set()
+    current = heads[0] if heads else (criteria[0] if criteria else None)
+    while current is not None and current["criterion_id"] not in seen:
+        ordered.append(current)
+        seen.add(current["criterion_id"])
+        current = by_id.get(current.get("next_linear"))
+
+    ordered.extend(c for c in criteria if c["criterion_id"] not in seen)
+    return ordered
+
+
+def _fingerprint(dimensions, pillars, criteria) -> str:
+    """Stable content hash of the framework, used to detect seed changes"""
+    payload = json.dumps([dimensions, pillars, criteria], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+# Current catalog - replaced as a whole, never mutated in place
+_catalog: Optional[CriteriaCatalog] = None
+
+
+def build_catalog(
+    dimensions: List[Dict[str, Any]],
+    pillars: List[Dict[str, Any]],
+    criteria: List[Dict[str, Any]]
+) -> CriteriaCatalog:
+    """Build a new catalog and atomically make it the current one"""
+    global _catalog
+    version = (_catalog.version + 1) if _catalog else 1
+    catalog = CriteriaCatalog(dimensions, pillars, criteria, version=version)
+    _catalog = catalog
+    return catalog
+
+
+async def load_catalog() -> CriteriaCatalog:
+    """Load dimensions, pillars and criteria from MongoDB into a new catalog"""
+    db = get_database()
+    dimensions = await db.dimensions.find().to_list(length=None)
+    pillars = await db.pillars.find().to_list(length=None)
+    criteria = await db.criteria.find().to_list(length=None)
+    catalog = build_catalog(dimensions, pillars, criteria)
+    print(f"📚 Criteria catalog v{catalog.version} loaded ({len(catalog)} criteria, {catalog.fingerprint})")
+    return catalog
+
+
+async def get_catalog() -> CriteriaCatalog:
+    """
+    Return the current catalog, loading it from MongoDB on first use
+
+    Startup normally loads it already; the lazy path covers a database that was
+    unavailable (or empty) when the app started.
+    """
+    catalog = _catalog
+    if catalog is None or len(catalog) == 0:
+        catalog = await load_catalog()
+    return catalog
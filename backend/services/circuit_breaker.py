@@ -0,0 +1,153 @@
+"""
+Circuit Breaker - Per-provider health tracking for the AI providers
+A provider whose recent calls mostly fail (or are too slow) is "opened" for
+CIRCUIT_OPEN_SECONDS: callers skip it and go straight to the next provider or
+the keyword fallback instead of waiting for yet another failure. After the
+cool-down a few probe calls are let through ("half-open"); a successful probe
+closes the circuit again, a failed one re-opens it.
+"""
+
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict
+import asyncio
+import time
+
+from config.settings import settings
+from services.provider_executor import ProviderSaturated
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """Raised when a call is attempted on a provider whose circuit is open"""
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over a sliding window of recent calls"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.times_opened = 0
+        self.rejected = 0
+        self.last_error = None
+        # (failed, slow) for the last CIRCUIT_WINDOW_SIZE calls
+        self._window: deque = deque(maxlen=max(1, settings.CIRCUIT_WINDOW_SIZE))
+
+    def available(self) -> bool:
+        """Whether a call would currently be let through (does not reserve a probe)"""
+        if not settings.CIRCUIT_BREAKER_ENABLED:
+            return True
+        self._check_cool_down()
+        if self.state == OPEN:
+            return False
+        if self.state == HALF_OPEN:
+            return self.probes_in_flight < settings.CIRCUIT_HALF_OPEN_PROBES
+        return True
+
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """
+        Wrap one provider call: records its outcome and latency
+
+        Raises:
+            CircuitOpen: the circuit is open (or all half-open probes are taken)
+        """
+        if not self.available():
+            self.rejected += 1
+            raise CircuitOpen(f"{self.name} circuit is {self.state}")
+
+        probe = self.state == HALF_OPEN
+        if probe:
+            self.probes_in_flight += 1
+        started_at = time.monotonic()
+        try:
+            yield
+        except (asyncio.CancelledError, GeneratorExit, ProviderSaturated):
+            # Cancelled by the caller (e.g. lost a hedged race) or shed by our own
+            # queue limit: says nothing about the provider's health
+            raise
+        except Exception as e:
+            self.last_error = str(e)[:200]
+            self._record(failed=True, slow=False, probe=probe)
+            raise
+        else:
+            elapsed = time.monotonic() - started_at
+            self._record(failed=False, slow=elapsed > settings.CIRCUIT_SLOW_CALL_SECONDS, probe=probe)
+        finally:
+            if probe:
+                self.probes_in_flight -= 1
+
+    async def call(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Await `call()` through the breaker"""
+        async with self.guard():
+            return await call()
+
+    def _check_cool_down(self) -> None:
+        if self.state == OPEN and time.monotonic() - self.opened_at >= settings.CIRCUIT_OPEN_SECONDS:
+            self.state = HALF_OPEN
+            print(f"[AI] {self.name} circuit half-open, probing...")
+
+    def _record(self, failed: bool, slow: bool, probe: bool) -> None:
+        if probe or self.state == HALF_OPEN:
+            if failed or slow:
+                self._open("probe failed" if failed else "probe too slow")
+            elif self.state == HALF_OPEN:
+                self.state = CLOSED
+                self._window.clear()
+                print(f"[AI] {self.name} circuit closed (provider recovered)")
+            return
+
+        self._window.append((failed, slow))
+        if self.state != CLOSED or len(self._window) < settings.CIRCUIT_MIN_CALLS:
+            return
+        error_rate = sum(1 for f, _ in self._window if f) / len(self._window)
+        slow_rate = sum(1 for _, s in self._window if s) / len(self._window)
+        if error_rate >= settings.CIRCUIT_ERROR_RATE:
+            self._open(f"error rate {error_rate:.0%}")
+        elif slow_rate >= settings.CIRCUIT_SLOW_CALL_RATE:
+            self._open(f"slow call rate {slow_rate:.0%}")
+
+    def _open(self, reason: str) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        self._window.clear()
+        print(f"[AI] {self.name} circuit opened ({reason}) for {settings.CIRCUIT_OPEN_SECONDS}s")
+
+    def status(self) -> Dict[str, Any]:
+        self._check_cool_down()
+        window = list(self._window)
+        status = {
+            "state": self.state,
+            "recent_calls": len(window),
+            "error_rate": round(sum(1 for f, _ in window if f) / len(window), 4) if window else 0.0,
+            "slow_call_rate": round(sum(1 for _, s in window if s) / len(window), 4) if window else 0.0,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "last_error": self.last_error,
+        }
+        if self.state == OPEN:
+            status["retry_in_seconds"] = round(
+                max(0.0, settings.CIRCUIT_OPEN_SECONDS - (time.monotonic() - self.opened_at)), 1
+            )
+        return status
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name)
+    return _breakers[name]
+
+
+def circuit_breaker_status() -> Dict[str, Any]:
+    """State of every provider's circuit (status endpoint)"""
+    return {name: breaker.status() for name, breaker in _breakers.items()}
@@ -0,0 +1,59 @@
+"""
+Deadline - Time budget shared by every step of a diagnostic turn
+A turn must answer within TURN_SLA_SECONDS (the frontend gives up at 30 s).
+The route creates a Deadline, keeps TURN_SLA_RESERVE_SECONDS for the fallback
+and for saving the turn, and passes the rest down to the AI service. Provider
+calls are cancelled when the budget runs out, and the caller falls back to
+the keyword scorer instead of waiting.
+"""
+
+from typing import Any, Awaitable, Optional
+import asyncio
+import time
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a step could not finish within the remaining time budget"""
+
+
+class Deadline:
+    """A point in time (monotonic clock) that work must finish before"""
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """Seconds left (never negative)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def shrink(self, reserve_seconds: float) -> "Deadline":
+        """A deadline ending `reserve_seconds` earlier (time kept back for the caller)"""
+        child = Deadline(0)
+        child.expires_at = self.expires_at - reserve_seconds
+        return child
+
+    async def run(self, awaitable: Awaitable[Any], step: str = "operation") -> Any:
+        """
+        Await `awaitable`, cancelling it when the deadline passes
+
+        Raises:
+            DeadlineExceeded: the deadline passed (or had already passed) before it finished
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceeded(f"No time left for {step}")
+        try:
+            return await asyncio.wait_for(awaitable, timeout=remaining)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(f"{step} did not finish within {remaining:.1f}s")
+
+
+def remaining_or_none(deadline: Optional[Deadline]) -> Optional[float]:
+    """Remaining seconds to pass as an SDK timeout, or None when there is no deadline"""
+    return deadline.remaining() if deadline else None
@@ -0,0 +1,147 @@
+"""
+Hedging - Race a slow primary AI provider against a secondary one
+The secondary provider is only called when the primary has not answered
+within its own recent latency percentile (LLM_HEDGE_PERCENTILE), so the extra
+cost is limited to the slow tail. The first successful answer wins and the
+other call is cancelled. Per-provider latency and win counters are kept for
+the admin stats endpoint, whether or not hedging is enabled.
+"""
+
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import time
+
+from config.settings import settings
+
+# Below this many samples the configured initial delay is used instead of a percentile
+MIN_LATENCY_SAMPLES = 20
+
+ProviderCall = Tuple[str, Callable[[], Awaitable[Any]]]
+
+
+class _ProviderStats:
+    def __init__(self):
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.cancelled = 0
+        self.wins = 0
+        self.hedged = 0  # times this provider was the primary and a hedge was fired
+        self.latencies: deque = deque(maxlen=500)  # successful calls only, in seconds
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+_stats: Dict[str, _ProviderStats] = {}
+
+
+def _provider_stats(name: str) -> _ProviderStats:
+    if name not in _stats:
+        _stats[name] = _ProviderStats()
+    return _stats[name]
+
+
+async def timed_call(name: str, call: Callable[[], Awaitable[Any]]) -> Any:
+    """Await one provider call, recording its latency and outcome"""
+    stats = _provider_stats(name)
+    stats.calls += 1
+    started_at = time.monotonic()
+    try:
+        result = await call()
+    except asyncio.CancelledError:
+        stats.cancelled += 1
+        raise
+    except Exception:
+        stats.failures += 1
+        raise
+    stats.successes += 1
+    stats.latencies.append(time.monotonic() - started_at)
+    return result
+
+
+def hedge_delay(name: str) -> float:
+    """How long to wait for provider `name` before firing the secondary provider"""
+    stats = _provider_stats(name)
+    if len(stats.latencies) < MIN_LATENCY_SAMPLES:
+        delay = settings.LLM_HEDGE_INITIAL_DELAY_SECONDS
+    else:
+        delay = stats.percentile(settings.LLM_HEDGE_PERCENTILE)
+    return min(max(delay, settings.LLM_HEDGE_MIN_DELAY_SECONDS), settings.LLM_HEDGE_MAX_DELAY_SECONDS)
+
+
+async def hedged_call(primary: ProviderCall, secondary: ProviderCall) -> Tuple[str, Any]:
+    """
+    Call `primary`; start `secondary` if the primary is slow or fails
+
+    The secondary starts after hedge_delay(primary) seconds, or at once if the
+    primary fails first. The first successful result wins and the other call
+    is cancelled (a provider SDK running in a thread finishes in the
+    background, but its result is dropped).
+
+    Returns:
+        (provider_name, result) of the winning call
+
+    Raises:
+        The secondary's exception (or the primary's if the secondary never ran) when both fail
+    """
+    primary_name, primary_call = primary
+    secondary_name, secondary_call = secondary
+
+    running: Dict[asyncio.Task, str] = {
+        asyncio.create_task(timed_call(primary_name, primary_call)): primary_name
+    }
+    secondary_started = False
+    last_error: Optional[BaseException] = None
+
+    try:
+        while running:
+            timeout = None if secondary_started else hedge_delay(primary_name)
+            done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                name = running.pop(task)
+                if task.exception() is None:
+                    _provider_stats(name).wins += 1
+                    return name, task.result()
+                last_error = task.exception()
+                print(f"[AI] {name} failed: {last_error}")
+
+            if not secondary_started and (not done or not running):
+                if not done:
+                    # Primary is in its slow tail - hedge
+                    _provider_stats(primary_name).hedged += 1
+                    print(f"[AI] {primary_name} slower than {timeout:.2f}s, hedging with {secondary_name}...")
+                task = asyncio.create_task(timed_call(secondary_name, secondary_call))
+                running[task] = secondary_name
+                secondary_started = True
+    finally:
+        for task in running:
+            task.cancel()
+
+    raise last_error
+
+
+def provider_latency_stats() -> Dict[str, Any]:
+    """Per-provider counters and latency percentiles (admin stats endpoint)"""
+    providers = {}
+    for name, stats in _stats.items():
+        providers[name] = {
+            "calls": stats.calls,
+            "successes": stats.successes,
+            "failures": stats.failures,
+            "cancelled": stats.cancelled,
+            "wins": stats.wins,
+            "hedged": stats.hedged,
+            "latency_seconds": {
+                "p50": round(stats.percentile(0.5) or 0.0, 4),
+                "p90": round(stats.percentile(0.9) or 0.0, 4),
+                "p99": round(stats.percentile(0.99) or 0.0, 4),
+            },
+            "hedge_delay_seconds": round(hedge_delay(name), 4),
+        }
+    return {"hedging_enabled": settings.LLM_HEDGING_ENABLED, "providers": providers}
@@ -0,0 +1,158 @@
+"""
+Idempotency - Replay the stored response of a request retried with the same key
+Clients send an Idempotency-Key header on requests that must not run twice
+(submitting an answer, asking for the next question). The first request with
+a key claims it in the idempotency_keys collection, runs, and stores its
+response; repeats of the key get that response back without calling the AI
+providers or writing anything. A repeat that arrives while the first request
+is still running waits for it (up to IDEMPOTENCY_WAIT_SECONDS).
+
+Keys are scoped to a session and an endpoint and expire after
+IDEMPOTENCY_KEY_TTL_HOURS (TTL index on expires_at, see config/indexes.py).
+A claim whose request died without releasing it (crash, restart) can be taken
+over once IDEMPOTENCY_LOCK_SECONDS have passed.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import hashlib
+import time
+
+from pymongo.errors import DuplicateKeyError
+
+from config.settings import settings
+from config.database import get_database
+
+COLLECTION = "idempotency_keys"
+MAX_KEY_LENGTH = 255
+_POLL_SECONDS = 0.25
+
+
+class InvalidIdempotencyKey(Exception):
+    """Raised when the Idempotency-Key header is empty or too long"""
+
+
+class IdempotencyKeyReused(Exception):
+    """Raised when a key is sent again with a different request body"""
+
+
+class IdempotencyKeyInProgress(Exception):
+    """Raised when the request holding a key did not finish within IDEMPOTENCY_WAIT_SECONDS"""
+
+
+def request_fingerprint(*parts: str) -> str:
+    """Hash of the request body, to tell a retry from a different request reusing its key"""
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def _key_id(session_id: str, scope: str, key: str) -> str:
+    return f"{session_id}:{scope}:{key}"
+
+
+def _claim_document(key_id: str, fingerprint: str, now: datetime) -> Dict[str, Any]:
+    return {
+        "_id": key_id,
+        "fingerprint": fingerprint,
+        "status": "processing",
+        "locked_until": now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+        "created_at": now,
+        "expires_at": now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+    }
+
+
+async def claim_key(session_id: str, scope: str, key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+    """
+    Claim a key for this request, or get the response stored for it
+
+    Returns:
+        The stored response of a completed request with this key, or None
+        when the caller now holds the key (it must then call complete_key or
+        release_key)
+
+    Raises:
+        InvalidIdempotencyKey: empty or too long key
+        IdempotencyKeyReused: the key was used with a different request body
+        IdempotencyKeyInProgress: the request holding the key is still running
+    """
+    if not key.strip() or len(key) > MAX_KEY_LENGTH:
+        raise InvalidIdempotencyKey(f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+
+    collection = get_database()[COLLECTION]
+    key_id = _key_id(session_id, scope, key)
+    give_up_at = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        now = datetime.utcnow()
+        try:
+            await collection.insert_one(_claim_document(key_id, fingerprint, now))
+            return None
+        except DuplicateKeyError:
+            pass
+
+        existing = await collection.find_one({"_id": key_id})
+        if existing is None:
+            # Released (or expired) in the meantime
+            continue
+        abandoned = existing["status"] == "processing" and existing["locked_until"] <= now
+        if existing["expires_at"] <= now or abandoned:
+            # Not removed by the TTL monitor yet, or its request died: take it over unless someone else did
+            result = await collection.replace_one(
+                {"_id": key_id, "status": existing["status"], "locked_until": existing["locked_until"]},
+                _claim_document(key_id, fingerprint, now)
+            )
+            if result.modified_count:
+                return None
+            continue
+        if existing["fingerprint"] != fingerprint:
+            raise IdempotencyKeyReused("Idempotency-Key was already used with a different request")
+        if existing["status"] == "completed":
+            print(f"[Idempotency] Replaying {scope} response for session {session_id}")
+            return existing["response"]
+
+        if time.monotonic() >= give_up_at:
+            raise IdempotencyKeyInProgress("A request with this Idempotency-Key is still being processed")
+        await asyncio.sleep(_POLL_SECONDS)
+
+
+async def complete_key(session_id: str, scope: str, key: str, response: Dict[str, Any]) -> None:
+    """Store the response of the request holding the key"""
+    await get_database()[COLLECTION].update_one(
+        {"_id": _key_id(session_id, scope, key), "status": "processing"},
+        {"$set": {"status": "completed", "response": response, "completed_at": datetime.utcnow()}}
+    )
+
+
+async def release_key(session_id: str, scope: str, key: str) -> None:
+    """Give up a claimed key (the request failed), so a retry runs again"""
+    # Shielded: the delete still completes when the request is being cancelled (client disconnect)
+    await asyncio.shield(get_database()[COLLECTION].delete_one(
+        {"_id": _key_id(session_id, scope, key), "status": "processing"}
+    ))
+
+
+async def run_once(
+    session_id: str,
+    scope: str,
+    key: Optional[str],
+    fingerprint: str,
+    handler: Callable[[], Awaitable[Dict[str, Any]]]
+) -> Dict[str, Any]:
+    """
+    Run `handler` once per key and return its response (the stored one for repeats)
+
+    Without a key the handler simply runs. Errors release the key, so a
+    failed request can be retried with the same key.
+    """
+    if key is None:
+        return await handler()
+
+    stored = await claim_key(session_id, scope, key, fingerprint)
+    if stored is not None:
+        return stored
+    try:
+        response = await handler()
+    except BaseException:
+        await release_key(session_id, scope, key)
+        raise
+    await complete_key(session_id, scope, key, response)
+    return response
@@ -0,0 +1,44 @@
+"""
+Job Handlers - What each job type of the job queue does
+JOB_HANDLERS maps a job type to the coroutine run by the worker with the
+job's payload; its return value is stored as the job's result.
+
+- submit_answer: evaluate and save an answer queued with
+  POST /sessions/{id}/answers/jobs (result: the POST /answers response body)
+- rescore: a rescore job (services/rescore_service.py), queued with
+  python manage.py rescore --enqueue
+"""
+
+from typing import Any, Dict
+
+from services.job_queue import JobFailed, JobHandler
+
+
+async def submit_answer_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    # Imported here: the session routes import the job queue
+    from routes.sessions import run_answer_job
+    return await run_answer_job(payload)
+
+
+async def rescore_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    from services.rescore_service import RescoreJob
+
+    options = dict(payload)
+    reset = options.pop("reset", False)
+    try:
+        checkpoint = await RescoreJob(**options).run(reset=reset)
+    except ValueError as e:
+        # Invalid options, or a checkpoint started with other options
+        raise JobFailed(str(e))
+    return {
+        "job": checkpoint["_id"],
+        "processed": checkpoint["processed"],
+        "changed": checkpoint["changed"],
+        "skipped": checkpoint["skipped"],
+    }
+
+
+JOB_HANDLERS: Dict[str, JobHandler] = {
+    "submit_answer": submit_answer_job,
+    "rescore": rescore_job,
+}
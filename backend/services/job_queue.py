@@ -0,0 +1,309 @@
+"""
+Job Queue - Slow work queued in MongoDB and run by worker processes
+Jobs are documents of the jobs collection; nothing but MongoDB is needed
+(no broker, no change streams, so a standalone local mongod works). Workers
+(python worker.py, or the API itself with JOB_WORKER_IN_PROCESS) claim the
+queued job with the highest priority with an atomic find_one_and_update and
+hold a lease on it that they renew while the job runs. A job whose worker
+died is queued again once its lease has expired.
+
+A job that raises is retried with exponential backoff until max_attempts;
+JobFailed marks it failed at once (retrying cannot help). Finished jobs are
+kept for JOB_RETENTION_HOURS (TTL index on expires_at, see config/indexes.py).
+
+Job states: queued -> running -> succeeded | failed (running -> queued on retry).
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import os
+import socket
+import traceback
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+
+from config.settings import settings
+from config.database import get_database
+
+COLLECTION = "jobs"
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+# Interactive jobs (a user is waiting) before batch jobs
+PRIORITY_INTERACTIVE = 10
+PRIORITY_BATCH = 0
+
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class JobFailed(Exception):
+    """Raised by a job handler when retrying the job cannot succeed"""
+
+
+async def enqueue(
+    job_type: str,
+    payload: Dict[str, Any],
+    priority: int = PRIORITY_BATCH,
+    max_attempts: Optional[int] = None
+) -> str:
+    """
+    Queue a job
+
+    Returns:
+        The job id
+    """
+    now = datetime.utcnow()
+    result = await get_database()[COLLECTION].insert_one({
+        "type": job_type,
+        "payload": payload,
+        "priority": priority,
+        "status": QUEUED,
+        "attempts": 0,
+        "max_attempts": max(1, max_attempts or settings.JOB_MAX_ATTEMPTS),
+        "run_after": now,
+        "lease_until": None,
+        "worker_id": None,
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+    })
+    return str(result.inserted_id)
+
+
+async def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        return await get_database()[COLLECTION].find_one({"_id": ObjectId(job_id)})
+    except InvalidId:
+        return None
+
+
+def job_status(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Client view of a job (GET /jobs/{id})"""
+    return {
+        "job_id": str(job["_id"]),
+        "type": job["type"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"].isoformat(),
+        "finished_at": job["finished_at"].isoformat() if job.get("finished_at") else None,
+        "result": job.get("result"),
+        "error": job.get("error"),
+    }
+
+
+async def claim_job(worker_id: str, job_types: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Take the next job due, highest priority first, and lease it to the worker
+
+    Returns:
+        The job (status running), or None if none is due
+    """
+    collection = get_database()[COLLECTION]
+    while True:
+        now = datetime.utcnow()
+        job = await collection.find_one_and_update(
+            {"status": QUEUED, "type": {"$in": job_types}, "run_after": {"$lte": now}},
+            {
+                "$set": {
+                    "status": RUNNING,
+                    "worker_id": worker_id,
+                    "lease_until": now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+                    "started_at": now,
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("priority", -1), ("run_after", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if job is None or job["attempts"] <= job["max_attempts"]:
+            return job
+        # Its leases kept expiring (worker killed each time): give up on it
+        await _finish(job, FAILED, error=f"Lease expired {job['max_attempts']} times")
+
+
+async def extend_lease(job: Dict[str, Any]) -> bool:
+    """Renew the worker's lease on a running job; False if the job was taken away from it"""
+    now = datetime.utcnow()
+    result = await get_database()[COLLECTION].update_one(
+        _lease_filter(job),
+        {"$set": {"lease_until": now + timedelta(seconds=settings.JOB_LEASE_SECONDS), "updated_at": now}}
+    )
+    return bool(result.matched_count)
+
+
+async def complete_job(job: Dict[str, Any], result: Optional[Dict[str, Any]]) -> bool:
+    return await _finish(job, SUCCEEDED, result=result)
+
+
+async def fail_job(job: Dict[str, Any], error: str, retry: bool = True) -> bool:
+    """Queue the job again after a backoff delay, or mark it failed after its last attempt"""
+    if not retry or job["attempts"] >= job["max_attempts"]:
+        return await _finish(job, FAILED, error=error)
+    now = datetime.utcnow()
+    delay = settings.JOB_RETRY_BACKOFF_SECONDS * 2 ** (job["attempts"] - 1)
+    result = await get_database()[COLLECTION].update_one(_lease_filter(job), {"$set": {
+        "status": QUEUED,
+        "run_after": now + timedelta(seconds=delay),
+        "lease_until": None,
+        "worker_id": None,
+        "error": error,
+        "updated_at": now,
+    }})
+    return bool(result.matched_count)
+
+
+async def requeue_expired_jobs() -> int:
+    """Queue again the running jobs whose worker stopped renewing its lease; returns how many"""
+    now = datetime.utcnow()
+    result = await get_database()[COLLECTION].update_many(
+        {"status": RUNNING, "lease_until": {"$lt": now}},
+        {"$set": {
+            "status": QUEUED,
+            "run_after": now,
+            "lease_until": None,
+            "worker_id": None,
+            "error": "Lease expired",
+            "updated_at": now,
+        }}
+    )
+    return result.modified_count
+
+
+async def job_queue_stats() -> Dict[str, int]:
+    """Number of jobs per status"""
+    counts = await get_database()[COLLECTION].aggregate([
+        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+    ]).to_list(length=None)
+    return {status: 0 for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)} | {
+        entry["_id"]: entry["count"] for entry in counts
+    }
+
+
+# ---------- worker ----------
+
+async def run_worker(
+    handlers: Dict[str, JobHandler],
+    concurrency: int = 1,
+    stop: Optional[asyncio.Event] = None,
+    worker_id: Optional[str] = None
+) -> None:
+    """
+    Claim and run jobs of the handled types until `stop` is set
+
+    Up to `concurrency` jobs run at a time. On stop, no new job is claimed
+    and the running ones are finished.
+    """
+    stop = stop or asyncio.Event()
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    slots = asyncio.Semaphore(max(1, concurrency))
+    running = set()
+    job_types = list(handlers)
+    next_requeue = 0.0
+    loop = asyncio.get_running_loop()
+    print(f"[Jobs] Worker {worker_id} running {', '.join(job_types)} (concurrency {concurrency})")
+
+    while not stop.is_set():
+        if loop.time() >= next_requeue:
+            try:
+                requeued = await requeue_expired_jobs()
+                if requeued:
+                    print(f"[Jobs] {requeued} job(s) with an expired lease queued again")
+            except Exception as e:
+                print(f"[Jobs] Could not requeue expired jobs: {e}")
+            next_requeue = loop.time() + settings.JOB_LEASE_SECONDS / 2
+
+        await slots.acquire()
+        if stop.is_set():
+            slots.release()
+            break
+        try:
+            job = await claim_job(worker_id, job_types)
+        except Exception as e:
+            slots.release()
+            print(f"[Jobs] Could not claim a job: {e}")
+            job = None
+        else:
+            if job is not None:
+                task = asyncio.create_task(_run_job(job, handlers[job["type"]]))
+                running.add(task)
+                task.add_done_callback(running.discard)
+                task.add_done_callback(lambda _: slots.release())
+                continue
+            slots.release()
+        # Nothing due: wait for the next poll (or the stop signal)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=settings.JOB_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+    if running:
+        print(f"[Jobs] Worker {worker_id} stopping, waiting for {len(running)} job(s)")
+        await asyncio.gather(*running, return_exceptions=True)
+
+
+async def _run_job(job: Dict[str, Any], handler: JobHandler) -> None:
+    job_id, job_type = job["_id"], job["type"]
+    work = asyncio.create_task(handler(job["payload"]))
+    # Renew the lease while the handler runs; a lost lease means another worker may run the job
+    while True:
+        done, _ = await asyncio.wait({work}, timeout=settings.JOB_LEASE_SECONDS / 3)
+        if done:
+            break
+        try:
+            leased = await extend_lease(job)
+        except Exception as e:
+            # Transient: the lease still has time left, try again at the next renewal
+            print(f"[Jobs] Could not renew the lease on {job_type} job {job_id}: {e}")
+            continue
+        if not leased:
+            print(f"[Jobs] Lost the lease on {job_type} job {job_id}, cancelling it")
+            work.cancel()
+            return
+
+    try:
+        try:
+            result = work.result()
+        except JobFailed as e:
+            print(f"[Jobs] {job_type} job {job_id} failed: {e}")
+            await fail_job(job, str(e), retry=False)
+        except Exception as e:
+            traceback.print_exc()
+            retried = job["attempts"] < job["max_attempts"]
+            print(f"[Jobs] {job_type} job {job_id} attempt {job['attempts']} failed: {e}"
+                  f"{' (will retry)' if retried else ''}")
+            await fail_job(job, f"{type(e).__name__}: {e}")
+        else:
+            await complete_job(job, result)
+    except Exception as e:
+        # The lease expires and the job runs again
+        print(f"[Jobs] Could not record the outcome of {job_type} job {job_id}: {e}")
+
+
+def _lease_filter(job: Dict[str, Any]) -> Dict[str, Any]:
+    # The attempt number tells this lease from a later one on the same job
+    return {"_id": job["_id"], "status": RUNNING, "worker_id": job["worker_id"], "attempts": job["attempts"]}
+
+
+async def _finish(job: Dict[str, Any], status: str, result: Optional[Dict[str, Any]] = None,
+                  error: Optional[str] = None) -> bool:
+    now = datetime.utcnow()
+    outcome = await get_database()[COLLECTION].update_one(_lease_filter(job), {"$set": {
+        "status": status,
+        "result": result,
+        "error": error,
+        "lease_until": None,
+        "finished_at": now,
+        "updated_at": now,
+        "expires_at": now + timedelta(hours=settings.JOB_RETENTION_HOURS),
+    }})
+    return bool(outcome.matched_count)
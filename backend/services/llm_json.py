@@ -0,0 +1,330 @@
+"""
+LLM JSON - Incremental, tolerant parser for evaluation responses
+The evaluation prompt asks providers for
+    {"evaluation": {"score": .., "justification": ..}, "ai_reaction": .., "next_question": ..}
+Models wrap it in markdown fences, add text around it, or get cut off by the
+token limit. The parser below reads the response one chunk at a time and
+reports each field as soon as its value is complete, so the score is known
+long before the last token and complete fields survive a truncated response.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import json
+
+# JSON path of each evaluation field (models sometimes flatten the evaluation object)
+FIELD_PATHS = {
+    ("evaluation", "score"): "score",
+    ("evaluation", "justification"): "justification",
+    ("score",): "score",
+    ("justification",): "justification",
+    ("ai_reaction",): "ai_reaction",
+    ("next_question",): "next_question",
+}
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_SCALAR_END = set(",}] \t\r\n")
+_LITERALS = {"true": True, "false": False, "null": None}
+
+
+class EvaluationStreamParser:
+    """
+    Feed chunks of a provider response; get back evaluation fields as they complete
+
+    Anything before the first "{" (markdown fences, preamble) and after the
+    outermost object is ignored. Malformed input never raises: the parser
+    stops and keeps the fields it already has.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self._stack: List[Dict[str, Any]] = []  # open containers: {"array": bool, "key": str, "expect": str}
+        self._started = False
+        self._done = False
+        self._string: Optional[List[str]] = None  # characters of the string being read
+        self._string_is_key = False
+        self._escape: Optional[str] = None  # pending escape sequence ("" after a backslash, hex digits of \u)
+        self._scalar: Optional[List[str]] = None  # characters of the number/literal being read
+
+    @property
+    def done(self) -> bool:
+        """True once the outermost object is closed (or the input turned out malformed)"""
+        return self._done
+
+    def feed(self, text: str) -> Dict[str, Any]:
+        """
+        Parse the next chunk of the response
+
+        Returns:
+            The fields completed by this chunk (score, justification, ai_reaction, next_question)
+        """
+        completed = {}
+        for char in text:
+            if self._done:
+                break
+            field = self._consume(char)
+            if field:
+                completed[field[0]] = field[1]
+        return completed
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Signal the end of the response
+
+        A number or literal the response ends on has no closing character, but
+        is complete (e.g. '{"score": 3' cut off by the token limit).
+
+        Returns:
+            The field completed by the end of input, if any
+        """
+        completed = {}
+        if self._scalar is not None and not self._done:
+            field = self._end_scalar()
+            if field:
+                completed[field[0]] = field[1]
+        self._done = True
+        return completed
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        """
+        Fields parsed so far in the evaluate_and_generate_next response shape
+
+        Returns:
+            None if no score was found, otherwise a dict with "evaluation" and
+            whichever of "ai_reaction" / "next_question" were complete
+        """
+        return _evaluation_result(self.fields)
+
+    # ---------- state machine ----------
+
+    def _consume(self, char: str) -> Optional[Tuple[str, Any]]:
+        if self._string is not None:
+            return self._consume_string_char(char)
+
+        if self._scalar is not None:
+            if char not in _SCALAR_END:
+                self._scalar.append(char)
+                return None
+            field = self._end_scalar()
+            if self._done:
+                return field
+            self._consume_structural(char)
+            return field
+
+        if not self._started:
+            if char == "{":
+                self._started = True
+                self._stack.append({"array": False, "key": None, "expect": "key"})
+            return None
+
+        self._consume_structural(char)
+        return None
+
+    def _consume_structural(self, char: str) -> None:
+        if char in " \t\r\n":
+            return
+        frame = self._stack[-1]
+        expect = frame["expect"]
+
+        if expect == "key":
+            if char == '"':
+                self._start_string(is_key=True)
+            elif char != "}" or frame["array"]:
+                self._fail()
+            else:
+                self._close(frame)
+        elif expect == "colon":
+            if char == ":":
+                frame["expect"] = "value"
+            else:
+                self._fail()
+        elif expect == "value":
+            if char == '"':
+                self._start_string(is_key=False)
+            elif char == "{":
+                self._stack.append({"array": False, "key": None, "expect": "key"})
+            elif char == "[":
+                self._stack.append({"array": True, "key": None, "expect": "value"})
+            elif char == "]" and frame["array"]:
+                self._close(frame)
+            elif char in "-0123456789tfn":
+                self._scalar = [char]
+            else:
+                self._fail()
+        elif expect == "comma":
+            if char == ",":
+                frame["expect"] = "value" if frame["array"] else "key"
+            elif char == ("]" if frame["array"] else "}"):
+                self._close(frame)
+            else:
+                self._fail()
+
+    def _start_string(self, is_key: bool) -> None:
+        self._string = []
+        self._string_is_key = is_key
+        self._escape = None
+
+    def _consume_string_char(self, char: str) -> Optional[Tuple[str, Any]]:
+        if self._escape is not None:
+            if self._escape == "" and char != "u":
+                self._string.append(_ESCAPES.get(char, char))
+                self._escape = None
+            elif self._escape == "":
+                self._escape = "u"
+            else:
+                self._escape += char
+                if len(self._escape) == 5:
+                    try:
+                        self._string.append(chr(int(self._escape[1:], 16)))
+                    except ValueError:
+                        pass
+                    self._escape = None
+            return None
+        if char == "\\":
+            self._escape = ""
+            return None
+        if char != '"':
+            self._string.append(char)
+            return None
+
+        value = "".join(self._string)
+        self._string = None
+        if any("\ud800" <= c <= "\udfff" for c in value):
+            # Characters outside the BMP arrive as \uXXXX surrogate pairs
+            value = value.encode("utf-16", "surrogatepass").decode("utf-16", "replace")
+        frame = self._stack[-1]
+        if self._string_is_key:
+            frame["key"] = value
+            frame["expect"] = "colon"
+            return None
+        return self._end_value(value)
+
+    def _end_scalar(self) -> Optional[Tuple[str, Any]]:
+        token = "".join(self._scalar)
+        self._scalar = None
+        if token in _LITERALS:
+            return self._end_value(_LITERALS[token])
+        try:
+            value = float(token) if any(c in token for c in ".eE") else int(token)
+        except ValueError:
+            self._fail()
+            return None
+        return self._end_value(value)
+
+    def _end_value(self, value: Any) -> Optional[Tuple[str, Any]]:
+        frame = self._stack[-1]
+        frame["expect"] = "comma"
+        if any(f["array"] for f in self._stack):
+            return None
+        path = tuple(f["key"] for f in self._stack)
+        field = FIELD_PATHS.get(path)
+        if not field or field in self.fields:
+            return None
+        if field == "score":
+            value = _normalize_score(value)
+            if value is None:
+                return None
+        elif not isinstance(value, str):
+            return None
+        self.fields[field] = value
+        return field, value
+
+    def _close(self, frame: Dict[str, Any]) -> None:
+        self._stack.pop()
+        if not self._stack:
+            self._done = True
+        else:
+            self._stack[-1]["expect"] = "comma"
+
+    def _fail(self) -> None:
+        self._done = True
+
+
+def _normalize_score(value: Any) -> Optional[int]:
+    """Scores are integers 0-3; models occasionally send them as strings or floats ("2", 2.0)"""
+    if isinstance(value, bool):
+        return None
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        return None
+    # 2.7 is not a score on the scale, rather than silently a 2
+    if not score.is_integer() or not 0 <= score <= 3:
+        return None
+    return int(score)
+
+
+def _object_fields(response: Dict[str, Any]) -> Dict[str, Any]:
+    """Evaluation fields of an already parsed response, checked like the streamed ones"""
+    fields = {}
+    for path, field in FIELD_PATHS.items():
+        if field in fields:
+            continue
+        value = response
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        if field == "score":
+            value = _normalize_score(value)
+            if value is None:
+                continue
+        elif not isinstance(value, str):
+            continue
+        fields[field] = value
+    return fields
+
+
+def _evaluation_result(fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Evaluation fields in the evaluate_and_generate_next response shape (None without a score)"""
+    if "score" not in fields:
+        return None
+    result = {"evaluation": {"score": fields["score"]}}
+    if "justification" in fields:
+        result["evaluation"]["justification"] = fields["justification"]
+    for field in ("ai_reaction", "next_question"):
+        if field in fields:
+            result[field] = fields[field]
+    return result
+
+
+def strip_markdown_fences(response_text: str) -> str:
+    """Remove markdown code blocks Gemini sometimes wraps around JSON"""
+    response_text = response_text.strip()
+    if response_text.startswith("```json"):
+        response_text = response_text[7:]
+    if response_text.startswith("```"):
+        response_text = response_text[3:]
+    if response_text.endswith("```"):
+        response_text = response_text[:-3]
+    return response_text.strip()
+
+
+def parse_evaluation_response(response_text: str) -> Dict[str, Any]:
+    """
+    Parse a complete (or truncated) evaluation response
+
+    Well-formed and malformed responses go through the same checks: the
+    score must be a whole number from 0 to 3 (flattened objects are
+    accepted) and text fields that are not strings are dropped. For a
+    malformed response the complete fields are salvaged. Either way the
+    result may lack "justification", "ai_reaction" or "next_question".
+
+    Raises:
+        ValueError: if no valid score could be found
+    """
+    try:
+        response = json.loads(strip_markdown_fences(response_text))
+    except ValueError:
+        pass
+    else:
+        result = _evaluation_result(_object_fields(response)) if isinstance(response, dict) else None
+        if result is None:
+            raise ValueError("No valid evaluation score found in response")
+        return result
+
+    parser = EvaluationStreamParser()
+    parser.feed(response_text)
+    parser.close()
+    result = parser.result()
+    if result is None:
+        raise ValueError("No evaluation score found in response")
+    print(f"[AI] Salvaged fields from malformed response: {', '.join(sorted(parser.fields))}")
+    return result
@@ -0,0 +1,350 @@
+"""
+Local Scorer - Fast scoring tier in front of the AI providers
+A small TF-IDF + softmax regression model, trained offline from the LLM scores
+already stored in the answers collection (python manage.py train-local-scorer),
+scores an answer in microseconds. Each criterion with enough history gets its
+own model; the others use a global model trained on every answer.
+
+With LOCAL_SCORER_ENABLED, answers the model is confident about
+(LOCAL_SCORER_CONFIDENCE) are scored locally and the providers are not called;
+the rest escalate to Gemini/OpenAI as before. A model is only trusted if it
+reached LOCAL_SCORER_MIN_PRECISION on its held-out answers. Whenever an
+answer is scored by an LLM anyway, the local prediction is compared with it,
+so agreement can be watched on the admin stats endpoint (also with the tier
+disabled, which is how a new model should be evaluated first).
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import math
+import random
+import re
+
+from config.settings import settings
+from config.database import get_database
+from services.catalog_service import get_catalog
+from services.session_store import embedded_answers
+
+MODEL_COLLECTION = "local_scorer_models"
+GLOBAL_MODEL = "__global__"
+SCORES = (0, 1, 2, 3)
+HOLDOUT_FRACTION = 0.2
+
+# Answers whose score came from an LLM. Answers saved before score_source existed
+# have none and may hold keyword fallback scores: only used when asked for
+TRAINING_SCORE_SOURCES = ["llm"]
+LEGACY_SCORE_SOURCE = None
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class LocalPrediction(NamedTuple):
+    score: int
+    confidence: float
+    model: str  # criterion_id of the model used, or GLOBAL_MODEL
+    trusted: bool  # the model passed its held-out precision check
+
+    @property
+    def confident(self) -> bool:
+        return self.trusted and self.confidence >= settings.LOCAL_SCORER_CONFIDENCE
+
+
+def answer_terms(text: str) -> Dict[str, int]:
+    """Word and word-pair counts of an answer ("pas encore" is a term of its own)"""
+    words = _TOKEN_PATTERN.findall(text.lower())
+    terms: Dict[str, int] = {}
+    for i, word in enumerate(words):
+        terms[word] = terms.get(word, 0) + 1
+        if i:
+            pair = f"{words[i - 1]} {word}"
+            terms[pair] = terms.get(pair, 0) + 1
+    return terms
+
+
+def _softmax(logits: List[float]) -> List[float]:
+    top = max(logits)
+    exps = [math.exp(logit - top) for logit in logits]
+    total = sum(exps)
+    return [e / total for e in exps]
+
+
+class ScoringModel:
+    """TF-IDF features (L2-normalized) and one weight per (term, score)"""
+
+    def __init__(self, idf: Dict[str, float], weights: Dict[str, List[float]], bias: List[float]):
+        self.idf = idf
+        self.weights = weights
+        self.bias = bias
+        self.samples = 0
+        self.holdout: Dict[str, Any] = {}
+
+    def vectorize(self, text: str) -> List[Tuple[str, float]]:
+        vector = [(term, count * self.idf[term]) for term, count in answer_terms(text).items() if term in self.idf]
+        norm = math.sqrt(sum(value * value for _, value in vector))
+        return [(term, value / norm) for term, value in vector] if norm else []
+
+    def probabilities_of(self, vector: List[Tuple[str, float]]) -> List[float]:
+        logits = list(self.bias)
+        for term, value in vector:
+            term_weights = self.weights.get(term)
+            if term_weights:
+                for k in SCORES:
+                    logits[k] += term_weights[k] * value
+        return _softmax(logits)
+
+    def predict(self, text: str) -> Tuple[int, float]:
+        """(most likely score, its probability)"""
+        probabilities = self.probabilities_of(self.vectorize(text))
+        score = max(SCORES, key=lambda k: probabilities[k])
+        return score, probabilities[score]
+
+    @property
+    def trusted(self) -> bool:
+        return self.holdout.get("precision_at_threshold", 0.0) >= settings.LOCAL_SCORER_MIN_PRECISION
+
+    def to_document(self, name: str) -> Dict[str, Any]:
+        return {
+            "_id": name,
+            "trained_at": datetime.utcnow(),
+            "samples": self.samples,
+            "holdout": self.holdout,
+            "idf": {term: round(value, 5) for term, value in self.idf.items()},
+            "weights": {term: [round(w, 5) for w in ws] for term, ws in self.weights.items()},
+            "bias": [round(b, 5) for b in self.bias],
+        }
+
+    @classmethod
+    def from_document(cls, document: Dict[str, Any]) -> "ScoringModel":
+        model = cls(document["idf"], document["weights"], document["bias"])
+        model.samples = document.get("samples", 0)
+        model.holdout = document.get("holdout", {})
+        return model
+
+
+def train_model(samples: List[Tuple[str, int]], epochs: int = 15, seed: int = 0) -> ScoringModel:
+    """
+    Fit a model on (answer text, score) pairs with plain SGD on the softmax loss
+
+    Terms seen in fewer than two answers are ignored.
+    """
+    document_frequency: Dict[str, int] = {}
+    for text, _ in samples:
+        for term in answer_terms(text):
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+    idf = {
+        term: math.log((1 + len(samples)) / (1 + frequency)) + 1
+        for term, frequency in document_frequency.items() if frequency >= 2
+    }
+
+    model = ScoringModel(idf, {}, [0.0] * len(SCORES))
+    model.samples = len(samples)
+    vectors = [(model.vectorize(text), score) for text, score in samples]
+
+    # Start from the class priors so rare scores are not over-predicted
+    for k in SCORES:
+        prior = sum(1 for _, score in samples if score == k) / max(1, len(samples))
+        model.bias[k] = math.log(prior + 1e-3)
+
+    rng = random.Random(seed)
+    l2 = 1e-4
+    for epoch in range(epochs):
+        rate = 0.5 / (1 + epoch * 0.3)
+        rng.shuffle(vectors)
+        for vector, score in vectors:
+            probabilities = model.probabilities_of(vector)
+            gradient = [probabilities[k] - (1.0 if k == score else 0.0) for k in SCORES]
+            for k in SCORES:
+                model.bias[k] -= rate * gradient[k]
+            for term, value in vector:
+                term_weights = model.weights.setdefault(term, [0.0] * len(SCORES))
+                for k in SCORES:
+                    term_weights[k] -= rate * (gradient[k] * value + l2 * term_weights[k])
+
+    # Drop terms that ended up with no influence (smaller stored model)
+    model.weights = {term: ws for term, ws in model.weights.items() if max(abs(w) for w in ws) >= 1e-3}
+    return model
+
+
+def evaluate_model(model: ScoringModel, samples: List[Tuple[str, int]]) -> Dict[str, Any]:
+    """Accuracy on `samples`, overall and for predictions at or above LOCAL_SCORER_CONFIDENCE"""
+    correct = confident = confident_correct = 0
+    for text, score in samples:
+        predicted, confidence = model.predict(text)
+        correct += predicted == score
+        if confidence >= settings.LOCAL_SCORER_CONFIDENCE:
+            confident += 1
+            confident_correct += predicted == score
+    return {
+        "samples": len(samples),
+        "accuracy": round(correct / len(samples), 4) if samples else 0.0,
+        "coverage_at_threshold": round(confident / len(samples), 4) if samples else 0.0,
+        "precision_at_threshold": round(confident_correct / confident, 4) if confident else 0.0,
+    }
+
+
+def train_with_holdout(samples: List[Tuple[str, int]], epochs: int = 15) -> ScoringModel:
+    """
+    Measure precision on a held-out split, then retrain on every sample
+
+    The returned model carries the held-out metrics (used to decide whether it can be trusted).
+    """
+    shuffled = list(samples)
+    random.Random(0).shuffle(shuffled)
+    cut = max(1, int(len(shuffled) * HOLDOUT_FRACTION))
+    holdout, training = shuffled[:cut], shuffled[cut:]
+
+    metrics = evaluate_model(train_model(training, epochs), holdout)
+    model = train_model(samples, epochs)
+    model.holdout = metrics
+    return model
+
+
+# ==================== SERVING ====================
+
+_models: Dict[str, ScoringModel] = {}
+_stats = {
+    "predictions": 0,
+    "served_locally": 0,
+    "escalated": 0,
+    "audited": 0,
+}
+# Local prediction vs LLM score, for every answer the LLM scored while a model was loaded
+_agreement = {
+    "compared": 0,
+    "agreed": 0,
+    "within_one": 0,
+    "confident_compared": 0,
+    "confident_agreed": 0,
+    "confusion": [[0] * len(SCORES) for _ in SCORES],  # [local score][llm score]
+}
+
+
+async def load_local_scorer() -> int:
+    """Load the trained models from MongoDB; returns how many were loaded"""
+    db = get_database()
+    documents = await db[MODEL_COLLECTION].find({}).to_list(length=None)
+    _models.clear()
+    for document in documents:
+        _models[document["_id"]] = ScoringModel.from_document(document)
+    if _models:
+        trusted = sum(1 for model in _models.values() if model.trusted)
+        print(f"[LocalScorer] Loaded {len(_models)} models ({trusted} trusted)")
+    return len(_models)
+
+
+async def train_local_scorer(epochs: int = 15, include_legacy: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    Retrain every model from the stored answers (both storage layouts) and store them in MongoDB
+
+    Only LLM scores are learned from: locally or keyword-scored answers and
+    the default score of the last criterion are skipped. Answers without a
+    score_source (saved before it existed, LLM and keyword scores mixed) are
+    skipped too unless include_legacy.
+
+    Returns:
+        {model name: held-out metrics}
+    """
+    db = get_database()
+    catalog = await get_catalog()
+    sources = TRAINING_SCORE_SOURCES + ([LEGACY_SCORE_SOURCE] if include_legacy else [])
+    answer_filter = {"score_source": {"$in": sources}}
+    answers = await db.answers.find(
+        answer_filter,
+        {"criterion_id": 1, "user_text": 1, "score": 1}
+    ).to_list(length=None)
+    answers += await embedded_answers(answer_filter, ["criterion_id", "user_text", "score"])
+
+    by_criterion: Dict[str, List[Tuple[str, int]]] = {}
+    for answer in answers:
+        criterion_id = answer.get("criterion_id")
+        if not catalog.next_criterion(criterion_id) or answer.get("score") not in SCORES:
+            continue
+        by_criterion.setdefault(criterion_id, []).append((answer.get("user_text") or "", answer["score"]))
+
+    datasets = {GLOBAL_MODEL: [sample for samples in by_criterion.values() for sample in samples]}
+    for criterion_id, samples in by_criterion.items():
+        if len(samples) >= settings.LOCAL_SCORER_MIN_SAMPLES:
+            datasets[criterion_id] = samples
+    if len(datasets[GLOBAL_MODEL]) < settings.LOCAL_SCORER_MIN_SAMPLES:
+        print(f"[LocalScorer] Only {len(datasets[GLOBAL_MODEL])} LLM-scored answers, not training")
+        return {}
+
+    models = {name: train_with_holdout(samples, epochs) for name, samples in datasets.items()}
+    collection = db[MODEL_COLLECTION]
+    await collection.delete_many({"_id": {"$nin": list(models)}})
+    for name, model in models.items():
+        await collection.replace_one({"_id": name}, model.to_document(name), upsert=True)
+
+    _models.clear()
+    _models.update(models)
+    return {name: model.holdout for name, model in models.items()}
+
+
+def predict_local_score(criterion_id: str, answer: str) -> Optional[LocalPrediction]:
+    """Local prediction for an answer, or None when no model is loaded"""
+    name = criterion_id if criterion_id in _models else GLOBAL_MODEL
+    model = _models.get(name)
+    if model is None:
+        return None
+    if not model.trusted and name != GLOBAL_MODEL and GLOBAL_MODEL in _models:
+        # The global model has seen more answers; prefer it if it is trusted
+        if _models[GLOBAL_MODEL].trusted:
+            name, model = GLOBAL_MODEL, _models[GLOBAL_MODEL]
+    score, confidence = model.predict(answer)
+    _stats["predictions"] += 1
+    return LocalPrediction(score, confidence, name, model.trusted)
+
+
+def serve_locally(prediction: Optional[LocalPrediction]) -> bool:
+    """
+    Whether to use the local score instead of calling an AI provider
+
+    LOCAL_SCORER_AUDIT_RATE of the confident predictions still go to the LLM
+    so agreement keeps being measured on the answers the tier would serve.
+    """
+    if not settings.LOCAL_SCORER_ENABLED or prediction is None:
+        return False
+    if not prediction.confident:
+        _stats["escalated"] += 1
+        return False
+    if random.random() < settings.LOCAL_SCORER_AUDIT_RATE:
+        _stats["audited"] += 1
+        return False
+    _stats["served_locally"] += 1
+    return True
+
+
+def record_agreement(prediction: Optional[LocalPrediction], llm_score: int) -> None:
+    """Compare a local prediction with the score the LLM gave the same answer"""
+    if prediction is None or llm_score not in SCORES:
+        return
+    agreed = prediction.score == llm_score
+    _agreement["compared"] += 1
+    _agreement["agreed"] += agreed
+    _agreement["within_one"] += abs(prediction.score - llm_score) <= 1
+    _agreement["confusion"][prediction.score][llm_score] += 1
+    if prediction.confident:
+        _agreement["confident_compared"] += 1
+        _agreement["confident_agreed"] += agreed
+
+
+def local_scorer_stats() -> Dict[str, Any]:
+    compared = _agreement["compared"]
+    confident_compared = _agreement["confident_compared"]
+    return {
+        "enabled": settings.LOCAL_SCORER_ENABLED,
+        "confidence_threshold": settings.LOCAL_SCORER_CONFIDENCE,
+        "models": len(_models),
+        "trusted_models": sum(1 for model in _models.values() if model.trusted),
+        **_stats,
+        "agreement": {
+            "compared": compared,
+            "agreement_rate": round(_agreement["agreed"] / compared, 4) if compared else 0.0,
+            "within_one_rate": round(_agreement["within_one"] / compared, 4) if compared else 0.0,
+            "confident_compared": confident_compared,
+            "confident_agreement_rate": (
+                round(_agreement["confident_agreed"] / confident_compared, 4) if confident_compared else 0.0
+            ),
+            "confusion_local_vs_llm": _agreement["confusion"],
+        },
+    }
@@ -0,0 +1,136 @@
+"""
+PDF Executor - Runs ReportLab rendering in a dedicated process pool
+Report layout is pure CPU work; rendering it inside an async handler would
+freeze every other request on the worker. Jobs are queued with a bounded depth
+(excess requests are rejected immediately) and a timeout, and queue-wait and
+render-time metrics are kept for the admin stats endpoint.
+"""
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import multiprocessing
+import time
+
+from config.settings import settings
+from services.cache_service import timing_summary
+
+
+class PdfRenderQueueFull(Exception):
+    """Raised when too many reports are already waiting to be rendered"""
+
+
+class PdfRenderTimeout(Exception):
+    """Raised when a report was not rendered within PDF_RENDER_TIMEOUT_SECONDS"""
+
+
+def _render_pdf_job(submitted_at: float, kwargs: Dict[str, Any]) -> Tuple[float, float, bytes]:
+    """Worker-side entry point: returns (queue_wait, render_seconds, pdf_bytes)"""
+    from services.pdf_service import generate_diagnostic_pdf
+
+    started_at = time.time()
+    pdf_bytes = generate_diagnostic_pdf(**kwargs)
+    return started_at - submitted_at, time.time() - started_at, pdf_bytes
+
+
+class _PdfExecutorState:
+    executor: Optional[ProcessPoolExecutor] = None
+    pending: int = 0
+    submitted: int = 0
+    completed: int = 0
+    rejected: int = 0
+    timed_out: int = 0
+    failed: int = 0
+    queue_waits: deque = deque(maxlen=500)
+    render_times: deque = deque(maxlen=500)
+
+
+_state = _PdfExecutorState()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    if _state.executor is None:
+        # "spawn" keeps workers independent of the server's event loop and Mongo threads
+        _state.executor = ProcessPoolExecutor(
+            max_workers=max(1, settings.PDF_RENDER_WORKERS),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _state.executor
+
+
+def _max_in_flight() -> int:
+    return max(1, settings.PDF_RENDER_WORKERS) + max(0, settings.PDF_RENDER_MAX_QUEUE)
+
+
+async def render_diagnostic_pdf(**kwargs) -> bytes:
+    """
+    Render a diagnostic report off the event loop
+
+    Takes the same keyword arguments as pdf_service.generate_diagnostic_pdf.
+
+    Raises:
+        PdfRenderQueueFull: the render queue is at PDF_RENDER_MAX_QUEUE
+        PdfRenderTimeout: rendering took longer than PDF_RENDER_TIMEOUT_SECONDS
+    """
+    if _state.pending >= _max_in_flight():
+        _state.rejected += 1
+        raise PdfRenderQueueFull(f"{_state.pending} PDF reports already in progress")
+
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+
+    _state.pending += 1
+    _state.submitted += 1
+    future: Future = executor.submit(_render_pdf_job, time.time(), kwargs)
+
+    def _release(_):
+        # The slot is only freed once the worker is actually done, even after a timeout
+        loop.call_soon_threadsafe(_release_slot)
+
+    future.add_done_callback(_release)
+
+    try:
+        queue_wait, render_seconds, pdf_bytes = await asyncio.wait_for(
+            asyncio.wrap_future(future),
+            timeout=settings.PDF_RENDER_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        _state.timed_out += 1
+        raise PdfRenderTimeout(
+            f"PDF rendering exceeded {settings.PDF_RENDER_TIMEOUT_SECONDS}s"
+        )
+    except Exception:
+        _state.failed += 1
+        raise
+
+    _state.completed += 1
+    _state.queue_waits.append(queue_wait)
+    _state.render_times.append(render_seconds)
+    return pdf_bytes
+
+
+def _release_slot() -> None:
+    _state.pending -= 1
+
+
+def shutdown_pdf_executor() -> None:
+    """Stop the worker processes (called on application shutdown)"""
+    if _state.executor is not None:
+        _state.executor.shutdown(wait=False, cancel_futures=True)
+        _state.executor = None
+
+
+def pdf_executor_stats() -> Dict[str, Any]:
+    return {
+        "workers": max(1, settings.PDF_RENDER_WORKERS),
+        "max_queue": settings.PDF_RENDER_MAX_QUEUE,
+        "in_flight": _state.pending,
+        "submitted": _state.submitted,
+        "completed": _state.completed,
+        "rejected": _state.rejected,
+        "timed_out": _state.timed_out,
+        "failed": _state.failed,
+        "queue_wait_seconds": timing_summary(_state.queue_waits),
+        "render_seconds": timing_summary(_state.render_times),
+    }
@@ -2,17 +2,17 @@
 PDF Report Generation Service
 Generates comprehensive diagnostic reports with advantages, disadvantages, and recommendations
 """
-from reportlab.lib.pagesizes import A4, letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Image
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
-from reportlab.pdfgen import canvas
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Table
+from services import pdf_template as tpl
 from datetime import datetime
 from typing import Dict, List, Any
 import io
 
+# Bump whenever the report layout or wording changes, so stored reports are re-rendered
+PDF_TEMPLATE_VERSION = "1"
+
 def generate_diagnostic_pdf(
     company_name: str,
     global_score: float,
@@ -21,9 +21,10 @@ def generate_diagnostic_pdf(
     advantages: List[str],
     disadvantages: List[str],
     recommendations: List[str],
-    session_id: str
+    session_id: str,
+    report_date: datetime = None
 ) -> bytes:
-    """Generate a comprehensive PDF report"""
+    """Generate a comprehensive PDF report (dated `report_date`, default today)"""
     
     # Create PDF in memory
     buffer = io.BytesIO()
@@ -36,66 +37,24 @@ def generate_diagnostic_pdf(
         rightMargin=0.5*inch
     )
     
-    # Container for PDF elements
+    # Container for PDF elements (styles and static blocks come from pdf_template)
     story = []
     
-    # Define styles
-    styles = getSampleStyleSheet()
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#2563eb'),
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        textColor=colors.HexColor('#1e40af'),
-        spaceAfter=12,
-        spaceBefore=20,
-        fontName='Helvetica-Bold'
-    )
-    
-    subheading_style = ParagraphStyle(
-        'CustomSubHeading',
-        parent=styles['Heading3'],
-        fontSize=13,
-        textColor=colors.HexColor('#3b82f6'),
-        spaceAfter=10,
-        spaceBefore=15,
-        fontName='Helvetica-Bold'
-    )
-    
-    body_style = ParagraphStyle(
-        'CustomBody',
-        parent=styles['BodyText'],
-        fontSize=11,
-        alignment=TA_JUSTIFY,
-        spaceAfter=10
-    )
-    
     # Title
-    story.append(Paragraph("Rapport de Diagnostic Digital", title_style))
-    story.append(Spacer(1, 0.2*inch))
+    story.append(tpl.TITLE)
+    story.append(tpl.SPACER_MEDIUM)
     
     # Company Info
     company_info = f"""
     <b>Entreprise:</b> {company_name}<br/>
-    <b>Date du diagnostic:</b> {datetime.now().strftime('%d/%m/%Y')}<br/>
+    <b>Date du diagnostic:</b> {(report_date or datetime.now()).strftime('%d/%m/%Y')}<br/>
     <b>ID de session:</b> {session_id}
     """
-    story.append(Paragraph(company_info, body_style))
-    story.append(Spacer(1, 0.3*inch))
+    story.append(Paragraph(company_info, tpl.BODY_STYLE))
+    story.append(tpl.SPACER_LARGE)
     
     # Executive Summary Box
-    story.append(Paragraph("Résumé Exécutif", heading_style))
+    story.append(tpl.SUMMARY_HEADING)
     
     summary_data = [
         ['Score Global', f'{global_score:.1f}/3'],
@@ -103,22 +62,13 @@ def generate_diagnostic_pdf(
         ['Pourcentage', f'{(global_score/3)*100:.0f}%']
     ]
     
-    summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#eff6ff')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#1e40af')),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('TOPPADDING', (0, 0), (-1, -1), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#3b82f6'))
-    ]))
+    summary_table = Table(summary_data, colWidths=tpl.SUMMARY_COL_WIDTHS)
+    summary_table.setStyle(tpl.SUMMARY_TABLE_STYLE)
     story.append(summary_table)
-    story.append(Spacer(1, 0.3*inch))
+    story.append(tpl.SPACER_LARGE)
     
     # Dimension Scores
-    story.append(Paragraph("Scores par Dimension", heading_style))
+    story.append(tpl.DIMENSIONS_HEADING)
     
     dimension_data = [['Dimension', 'Score', 'Niveau']]
     for dim in dimension_scores:
@@ -130,66 +80,24 @@ def generate_diagnostic_pdf(
             level
         ])
     
-    dimension_table = Table(dimension_data, colWidths=[3*inch, 1*inch, 1.5*inch])
-    dimension_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2563eb')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb')),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9fafb')])
-    ]))
+    dimension_table = Table(dimension_data, colWidths=tpl.DIMENSION_COL_WIDTHS)
+    dimension_table.setStyle(tpl.DIMENSION_TABLE_STYLE)
     story.append(dimension_table)
-    story.append(Spacer(1, 0.3*inch))
+    story.append(tpl.SPACER_LARGE)
     
     # Detailed Diagnostic Table - Dimensions and Pillars
-    story.append(Paragraph("Tableau Détaillé du Diagnostic", heading_style))
-    story.append(Spacer(1, 0.1*inch))
-    
-    # Create comprehensive diagnostic table with proper text wrapping
-    # Use Paragraph objects for proper text handling
-    cell_style = ParagraphStyle(
-        'TableCell',
-        parent=styles['Normal'],
-        fontSize=8,
-        leading=10,
-        alignment=TA_LEFT
-    )
+    story.append(tpl.DIAGNOSTIC_HEADING)
+    story.append(tpl.SPACER_SMALL)
     
-    cell_style_center = ParagraphStyle(
-        'TableCellCenter',
-        parent=styles['Normal'],
-        fontSize=8,
-        leading=10,
-        alignment=TA_CENTER
-    )
-    
-    cell_style_bold = ParagraphStyle(
-        'TableCellBold',
-        parent=styles['Normal'],
-        fontSize=8,
-        leading=10,
-        alignment=TA_LEFT,
-        fontName='Helvetica-Bold'
-    )
+    cell_style = tpl.CELL_STYLE
+    cell_style_center = tpl.CELL_STYLE_CENTER
+    cell_style_bold = tpl.CELL_STYLE_BOLD
     
     # Build table data with Paragraph objects for proper wrapping
-    diagnostic_data = [[
-        Paragraph('Dimension', cell_style_center),
-        Paragraph('Pilier', cell_style_center),
-        Paragraph('Score', cell_style_center),
-        Paragraph('Max', cell_style_center),
-        Paragraph('%', cell_style_center),
-        Paragraph('Niveau', cell_style_center)
-    ]]
+    diagnostic_data = [list(tpl.DIAGNOSTIC_HEADER_ROW)]
     
     for dim in dimension_scores:
         dim_name = dim['dimension_name']
-        dim_code = dim.get('dimension_code', '')
         pillar_scores = dim.get('pillar_scores', [])
         
         if pillar_scores:
@@ -229,109 +137,59 @@ def generate_diagnostic_pdf(
                 Paragraph(level, cell_style_center)
             ])
     
-    # Calculate column widths to fit A4 page (8.27 inches - margins)
-    # Total available width: ~7.27 inches (8.27 - 0.5*2 margins)
-    # Adjusted to ensure proper fit
-    col_widths = [2.3*inch, 2.0*inch, 0.55*inch, 0.5*inch, 0.55*inch, 0.87*inch]
-    
     # Create table with split capability for long tables
     diagnostic_table = Table(
         diagnostic_data, 
-        colWidths=col_widths, 
+        colWidths=tpl.DIAGNOSTIC_COL_WIDTHS, 
         repeatRows=1,
         splitByRow=1,  # Allow splitting across pages
         splitInRow=0   # Don't split within a row
     )
-    diagnostic_table.setStyle(TableStyle([
-        # Header row
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 9),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-        ('TOPPADDING', (0, 0), (-1, 0), 8),
-        
-        # Data rows
-        ('ALIGN', (0, 1), (0, -1), 'LEFT'),  # Dimension column - left align
-        ('ALIGN', (1, 1), (1, -1), 'LEFT'),  # Pillar column - left align
-        ('ALIGN', (2, 1), (-1, -1), 'CENTER'),  # Score columns - center align
-        ('VALIGN', (0, 1), (-1, -1), 'MIDDLE'),
-        ('FONTSIZE', (0, 1), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 5),
-        ('TOPPADDING', (0, 1), (-1, -1), 5),
-        ('LEFTPADDING', (0, 1), (-1, -1), 4),
-        ('RIGHTPADDING', (0, 1), (-1, -1), 4),
-        
-        # Grid and colors
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#d1d5db')),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9fafb')]),
-    ]))
+    diagnostic_table.setStyle(tpl.DIAGNOSTIC_TABLE_STYLE)
     
     story.append(diagnostic_table)
-    story.append(Spacer(1, 0.3*inch))
+    story.append(tpl.SPACER_LARGE)
     
     # Add legend for pillar levels
-    legend_text = """
-    <b>Légende des Niveaux:</b><br/>
-    <b>Excellent (76-100%):</b> Niveau de maturité avancé<br/>
-    <b>Très Bon (51-75%):</b> Bonne maîtrise avec potentiel d'optimisation<br/>
-    <b>Bon (26-50%):</b> Bases solides en développement<br/>
-    <b>Moyen (1-25%):</b> Démarrage avec opportunités d'amélioration<br/>
-    <b>À Améliorer (0%):</b> Besoin d'action prioritaire
-    """
-    story.append(Paragraph(legend_text, body_style))
-    story.append(Spacer(1, 0.3*inch))
+    story.append(tpl.LEGEND)
+    story.append(tpl.SPACER_LARGE)
     
     # Page Break
-    story.append(PageBreak())
+    story.append(tpl.PAGE_BREAK)
     
     # Advantages Section
-    story.append(Paragraph("✓ Points Forts", heading_style))
+    story.append(tpl.ADVANTAGES_HEADING)
     if advantages:
         for i, advantage in enumerate(advantages, 1):
-            story.append(Paragraph(f"<b>{i}.</b> {advantage}", body_style))
+            story.append(Paragraph(f"<b>{i}.</b> {advantage}", tpl.BODY_STYLE))
     else:
-        story.append(Paragraph("Aucun point fort identifié pour le moment.", body_style))
-    story.append(Spacer(1, 0.2*inch))
+        story.append(tpl.NO_ADVANTAGES)
+    story.append(tpl.SPACER_MEDIUM)
     
     # Disadvantages Section
-    story.append(Paragraph("⚠ Axes d'Amélioration", heading_style))
+    story.append(tpl.DISADVANTAGES_HEADING)
     if disadvantages:
         for i, disadvantage in enumerate(disadvantages, 1):
-            story.append(Paragraph(f"<b>{i}.</b> {disadvantage}", body_style))
+            story.append(Paragraph(f"<b>{i}.</b> {disadvantage}", tpl.BODY_STYLE))
     else:
-        story.append(Paragraph("Aucun axe d'amélioration identifié.", body_style))
-    story.append(Spacer(1, 0.2*inch))
+        story.append(tpl.NO_DISADVANTAGES)
+    story.append(tpl.SPACER_MEDIUM)
     
     # Page Break
-    story.append(PageBreak())
+    story.append(tpl.PAGE_BREAK)
     
     # Recommendations Section
-    story.append(Paragraph("💡 Recommandations Stratégiques", heading_style))
+    story.append(tpl.RECOMMENDATIONS_HEADING)
     if recommendations:
         for i, recommendation in enumerate(recommendations, 1):
-            story.append(Paragraph(f"<b>{i}.</b> {recommendation}", body_style))
-            story.append(Spacer(1, 0.1*inch))
+            story.append(Paragraph(f"<b>{i}.</b> {recommendation}", tpl.BODY_STYLE))
+            story.append(tpl.SPACER_SMALL)
     else:
-        story.append(Paragraph("Aucune recommandation disponible.", body_style))
+        story.append(tpl.NO_RECOMMENDATIONS)
     
     # Footer
-    story.append(Spacer(1, 0.5*inch))
-    footer_text = f"""
-    <i>Ce rapport a été généré automatiquement par DigiAssistant.<br/>
-    Pour toute question, veuillez contacter notre équipe de support.</i>
-    """
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=9,
-        textColor=colors.HexColor('#6b7280'),
-        alignment=TA_CENTER
-    )
-    story.append(Paragraph(footer_text, footer_style))
+    story.append(tpl.SPACER_FOOTER)
+    story.append(tpl.FOOTER)
     
     # Build PDF
     doc.build(story)
@@ -0,0 +1,187 @@
+"""
+PDF Report Template
+Paragraph styles, table styles and static blocks of the diagnostic report.
+They never change between reports, so they are built once at import time
+(once per PDF worker process) and reused by pdf_service.generate_diagnostic_pdf.
+"""
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, Spacer, TableStyle, PageBreak
+from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
+
+# ==================== PARAGRAPH STYLES ====================
+_styles = getSampleStyleSheet()
+
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_styles['Heading1'],
+    fontSize=24,
+    textColor=colors.HexColor('#2563eb'),
+    spaceAfter=30,
+    alignment=TA_CENTER,
+    fontName='Helvetica-Bold'
+)
+
+HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=_styles['Heading2'],
+    fontSize=16,
+    textColor=colors.HexColor('#1e40af'),
+    spaceAfter=12,
+    spaceBefore=20,
+    fontName='Helvetica-Bold'
+)
+
+SUBHEADING_STYLE = ParagraphStyle(
+    'CustomSubHeading',
+    parent=_styles['Heading3'],
+    fontSize=13,
+    textColor=colors.HexColor('#3b82f6'),
+    spaceAfter=10,
+    spaceBefore=15,
+    fontName='Helvetica-Bold'
+)
+
+BODY_STYLE = ParagraphStyle(
+    'CustomBody',
+    parent=_styles['BodyText'],
+    fontSize=11,
+    alignment=TA_JUSTIFY,
+    spaceAfter=10
+)
+
+# Table cells use Paragraph objects for proper text wrapping
+CELL_STYLE = ParagraphStyle(
+    'TableCell',
+    parent=_styles['Normal'],
+    fontSize=8,
+    leading=10,
+    alignment=TA_LEFT
+)
+
+CELL_STYLE_CENTER = ParagraphStyle(
+    'TableCellCenter',
+    parent=_styles['Normal'],
+    fontSize=8,
+    leading=10,
+    alignment=TA_CENTER
+)
+
+CELL_STYLE_BOLD = ParagraphStyle(
+    'TableCellBold',
+    parent=_styles['Normal'],
+    fontSize=8,
+    leading=10,
+    alignment=TA_LEFT,
+    fontName='Helvetica-Bold'
+)
+
+FOOTER_STYLE = ParagraphStyle(
+    'Footer',
+    parent=_styles['Normal'],
+    fontSize=9,
+    textColor=colors.HexColor('#6b7280'),
+    alignment=TA_CENTER
+)
+
+# ==================== TABLE STYLES ====================
+SUMMARY_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#eff6ff')),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#1e40af')),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+    ('TOPPADDING', (0, 0), (-1, -1), 12),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#3b82f6'))
+])
+SUMMARY_COL_WIDTHS = [3*inch, 2*inch]
+
+DIMENSION_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2563eb')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb')),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9fafb')])
+])
+DIMENSION_COL_WIDTHS = [3*inch, 1*inch, 1.5*inch]
+
+DIAGNOSTIC_TABLE_STYLE = TableStyle([
+    # Header row
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 9),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+    ('TOPPADDING', (0, 0), (-1, 0), 8),
+
+    # Data rows
+    ('ALIGN', (0, 1), (0, -1), 'LEFT'),  # Dimension column - left align
+    ('ALIGN', (1, 1), (1, -1), 'LEFT'),  # Pillar column - left align
+    ('ALIGN', (2, 1), (-1, -1), 'CENTER'),  # Score columns - center align
+    ('VALIGN', (0, 1), (-1, -1), 'MIDDLE'),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 1), (-1, -1), 5),
+    ('TOPPADDING', (0, 1), (-1, -1), 5),
+    ('LEFTPADDING', (0, 1), (-1, -1), 4),
+    ('RIGHTPADDING', (0, 1), (-1, -1), 4),
+
+    # Grid and colors
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#d1d5db')),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9fafb')]),
+])
+# Fits an A4 page (8.27 inches) minus 0.5 inch margins on each side
+DIAGNOSTIC_COL_WIDTHS = [2.3*inch, 2.0*inch, 0.55*inch, 0.5*inch, 0.55*inch, 0.87*inch]
+
+# ==================== STATIC BLOCKS ====================
+# Flowables below hold no per-report data; ReportLab re-wraps them on every build
+TITLE = Paragraph("Rapport de Diagnostic Digital", TITLE_STYLE)
+SUMMARY_HEADING = Paragraph("Résumé Exécutif", HEADING_STYLE)
+DIMENSIONS_HEADING = Paragraph("Scores par Dimension", HEADING_STYLE)
+DIAGNOSTIC_HEADING = Paragraph("Tableau Détaillé du Diagnostic", HEADING_STYLE)
+ADVANTAGES_HEADING = Paragraph("✓ Points Forts", HEADING_STYLE)
+DISADVANTAGES_HEADING = Paragraph("⚠ Axes d'Amélioration", HEADING_STYLE)
+RECOMMENDATIONS_HEADING = Paragraph("💡 Recommandations Stratégiques", HEADING_STYLE)
+
+NO_ADVANTAGES = Paragraph("Aucun point fort identifié pour le moment.", BODY_STYLE)
+NO_DISADVANTAGES = Paragraph("Aucun axe d'amélioration identifié.", BODY_STYLE)
+NO_RECOMMENDATIONS = Paragraph("Aucune recommandation disponible.", BODY_STYLE)
+
+DIAGNOSTIC_HEADER_ROW = [
+    Paragraph('Dimension', CELL_STYLE_CENTER),
+    Paragraph('Pilier', CELL_STYLE_CENTER),
+    Paragraph('Score', CELL_STYLE_CENTER),
+    Paragraph('Max', CELL_STYLE_CENTER),
+    Paragraph('%', CELL_STYLE_CENTER),
+    Paragraph('Niveau', CELL_STYLE_CENTER)
+]
+
+# Legend for pillar levels
+LEGEND = Paragraph("""
+    <b>Légende des Niveaux:</b><br/>
+    <b>Excellent (76-100%):</b> Niveau de maturité avancé<br/>
+    <b>Très Bon (51-75%):</b> Bonne maîtrise avec potentiel d'optimisation<br/>
+    <b>Bon (26-50%):</b> Bases solides en développement<br/>
+    <b>Moyen (1-25%):</b> Démarrage avec opportunités d'amélioration<br/>
+    <b>À Améliorer (0%):</b> Besoin d'action prioritaire
+    """, BODY_STYLE)
+
+FOOTER = Paragraph("""
+    <i>Ce rapport a été généré automatiquement par DigiAssistant.<br/>
+    Pour toute question, veuillez contacter notre équipe de support.</i>
+    """, FOOTER_STYLE)
+
+PAGE_BREAK = PageBreak()
+SPACER_SMALL = Spacer(1, 0.1*inch)
+SPACER_MEDIUM = Spacer(1, 0.2*inch)
+SPACER_LARGE = Spacer(1, 0.3*inch)
+SPACER_FOOTER = Spacer(1, 0.5*inch)
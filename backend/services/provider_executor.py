@@ -0,0 +1,135 @@
+"""
+Provider Executor - Dedicated thread pool for the synchronous Gemini SDK
+Gemini calls block a thread for the whole generation. Running them on the
+default asyncio executor (shared with everything else and sized by CPU count)
+lets bursts of sessions queue invisibly. Here they get their own pool of
+GEMINI_MAX_CONCURRENCY threads, at most GEMINI_MAX_QUEUE calls may wait for a
+thread, and anything beyond that is rejected at once so the caller can move
+on to the other provider or the keyword fallback.
+"""
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import time
+
+from config.settings import settings
+from services.cache_service import timing_summary
+
+
+class ProviderSaturated(Exception):
+    """Raised when the provider's call queue is full"""
+
+
+class _ProviderExecutorState:
+    executor: Optional[ThreadPoolExecutor] = None
+    slots: Optional[asyncio.Semaphore] = None
+    running: int = 0
+    queued: int = 0
+    max_queued: int = 0
+    submitted: int = 0
+    completed: int = 0
+    rejected: int = 0
+    failed: int = 0
+    queue_waits: deque = deque(maxlen=500)
+    run_times: deque = deque(maxlen=500)
+
+
+_state = _ProviderExecutorState()
+
+
+def _max_workers() -> int:
+    return max(1, settings.GEMINI_MAX_CONCURRENCY)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    if _state.executor is None:
+        _state.executor = ThreadPoolExecutor(max_workers=_max_workers(), thread_name_prefix="gemini")
+    return _state.executor
+
+
+def _get_slots() -> asyncio.Semaphore:
+    if _state.slots is None:
+        _state.slots = asyncio.Semaphore(_max_workers())
+    return _state.slots
+
+
+async def run_in_gemini_pool(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking Gemini SDK call on the dedicated pool
+
+    A thread slot is held until `fn` actually returns, even if the awaiting
+    coroutine is cancelled (deadline, lost hedged race), so the pool never
+    has more work than threads and waiting happens here, where it is measured.
+
+    Raises:
+        ProviderSaturated: GEMINI_MAX_QUEUE calls are already waiting for a thread
+    """
+    slots = _get_slots()
+    if slots.locked() and _state.queued >= settings.GEMINI_MAX_QUEUE:
+        _state.rejected += 1
+        raise ProviderSaturated(f"Gemini queue full ({_state.queued} calls waiting)")
+
+    _state.submitted += 1
+    _state.queued += 1
+    _state.max_queued = max(_state.max_queued, _state.queued)
+    queued_at = time.monotonic()
+    try:
+        await slots.acquire()
+    finally:
+        _state.queued -= 1
+    _state.queue_waits.append(time.monotonic() - queued_at)
+
+    loop = asyncio.get_running_loop()
+    _state.running += 1
+    started_at = time.monotonic()
+    try:
+        future: Future = _get_executor().submit(fn, *args, **kwargs)
+    except Exception:
+        _release_slot(started_at)
+        raise
+
+    def _release(_):
+        loop.call_soon_threadsafe(_release_slot, started_at)
+
+    future.add_done_callback(_release)
+
+    try:
+        result = await asyncio.wrap_future(future)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        _state.failed += 1
+        raise
+    _state.completed += 1
+    return result
+
+
+def _release_slot(started_at: float) -> None:
+    _state.running -= 1
+    _state.run_times.append(time.monotonic() - started_at)
+    _state.slots.release()
+
+
+def shutdown_provider_executor() -> None:
+    """Stop the Gemini threads (called on application shutdown)"""
+    if _state.executor is not None:
+        _state.executor.shutdown(wait=False, cancel_futures=True)
+        _state.executor = None
+
+
+def provider_executor_stats() -> Dict[str, Any]:
+    return {
+        "workers": _max_workers(),
+        "max_queue": settings.GEMINI_MAX_QUEUE,
+        "running": _state.running,
+        "queued": _state.queued,
+        "max_queued": _state.max_queued,
+        "submitted": _state.submitted,
+        "completed": _state.completed,
+        "rejected": _state.rejected,
+        "failed": _state.failed,
+        "queue_wait_seconds": timing_summary(_state.queue_waits),
+        "run_seconds": timing_summary(_state.run_times),
+    }
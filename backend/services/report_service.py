@@ -0,0 +1,265 @@
+"""
+Report Service - Content-addressed store for rendered PDF reports
+A report is fully determined by its render inputs (scored results, company,
+dates) and the PDF template version. Rendered files are kept in GridFS under the
+SHA-256 of those inputs, which doubles as the HTTP ETag, so a completed
+session's report is only rendered once.
+"""
+
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import re
+import zipfile
+
+from bson import ObjectId
+from gridfs.errors import NoFile
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+from config.database import get_database
+from services.pdf_executor import render_diagnostic_pdf, PdfRenderQueueFull
+from services.pdf_service import PDF_TEMPLATE_VERSION, generate_advantages_disadvantages
+from services.scoring_service import get_session_results
+
+REPORTS_BUCKET = "reports"
+BULK_EXPORT_QUEUE_RETRIES = 5
+
+
+async def get_company_name(session: Dict[str, Any]) -> str:
+    """Company name for a session (temp sessions embed it, others reference a company)"""
+    if "company_info" in session:
+        return session["company_info"].get("name", "Unknown Company")
+    if "company_id" in session:
+        company = await get_database().companies.find_one(
+            {"_id": ObjectId(session["company_id"])},
+            {"name": 1}
+        )
+        if company:
+            return company["name"]
+    return "Unknown Company"
+
+
+async def build_session_report_inputs(session: Dict[str, Any]) -> Dict[str, Any]:
+    """Score a session (through the results cache) and build its report render inputs"""
+    session_id = str(session["_id"])
+    company_name = await get_company_name(session)
+    results = await get_session_results(session_id, session)
+    return build_report_inputs(session_id, session, company_name, results)
+
+
+def build_report_inputs(
+    session_id: str,
+    session: Dict[str, Any],
+    company_name: str,
+    results: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Build the keyword arguments for generate_diagnostic_pdf from scored results
+
+    Args:
+        session_id: The diagnostic session ID
+        session: The session document (its dates are printed on the report)
+        company_name: Company name shown on the report
+        results: Complete results from the scoring service
+
+    Returns:
+        Render inputs (deterministic for a given session state)
+    """
+    # Format dimension scores for PDF generation
+    dimension_scores = [
+        {
+            "dimension_code": dim["dimension_code"],
+            "dimension_name": dim["dimension_name"],
+            "score": dim["score"],
+            "avg_score": dim["score"],
+            "percentage": dim["percentage"],
+            "answered_count": dim["answered_count"],
+            "pillar_scores": dim["pillar_scores"]
+        }
+        for dim in results["dimension_scores"]
+    ]
+
+    # Generate advantages and disadvantages
+    advantages, disadvantages = generate_advantages_disadvantages(dimension_scores)
+
+    return {
+        "company_name": company_name,
+        "global_score": results["global_score"],
+        "maturity_level": results["maturity_profile"]["description"],
+        "dimension_scores": dimension_scores,
+        "advantages": advantages,
+        "disadvantages": disadvantages,
+        "recommendations": results["recommendations"],
+        "session_id": session_id,
+        "report_date": session.get("completed_at") or session.get("created_at")
+    }
+
+
+def report_fingerprint(render_inputs: Dict[str, Any]) -> str:
+    """SHA-256 of the render inputs and template version (used as file name and ETag)"""
+    payload = json.dumps(
+        {"template": PDF_TEMPLATE_VERSION, "inputs": render_inputs},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=_json_default
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _bucket() -> AsyncIOMotorGridFSBucket:
+    return AsyncIOMotorGridFSBucket(get_database(), bucket_name=REPORTS_BUCKET)
+
+
+async def load_stored_report(fingerprint: str) -> Optional[bytes]:
+    """Return a previously rendered report, or None if it is not stored"""
+    try:
+        stream = await _bucket().open_download_stream_by_name(fingerprint)
+    except NoFile:
+        return None
+    return await stream.read()
+
+
+async def store_report(fingerprint: str, pdf_bytes: bytes, session_id: str) -> None:
+    """Persist a rendered report under its fingerprint"""
+    await _bucket().upload_from_stream(
+        fingerprint,
+        pdf_bytes,
+        metadata={
+            "session_id": session_id,
+            "template_version": PDF_TEMPLATE_VERSION,
+            "content_type": "application/pdf",
+            "created_at": datetime.utcnow()
+        }
+    )
+
+
+async def get_or_render_report(render_inputs: Dict[str, Any]) -> Tuple[str, bytes]:
+    """
+    Return (fingerprint, pdf_bytes), rendering and storing the report only if needed
+
+    Raises:
+        PdfRenderQueueFull / PdfRenderTimeout: see pdf_executor.render_diagnostic_pdf
+    """
+    fingerprint = report_fingerprint(render_inputs)
+
+    pdf_bytes = await load_stored_report(fingerprint)
+    if pdf_bytes is None:
+        pdf_bytes = await render_diagnostic_pdf(**render_inputs)
+        try:
+            await store_report(fingerprint, pdf_bytes, render_inputs["session_id"])
+        except Exception as e:
+            # The report is still served; it will simply be rendered again next time
+            print(f"[reports] Could not store report {fingerprint[:12]}: {e}")
+
+    return fingerprint, pdf_bytes
+
+
+# ==================== BULK EXPORT ====================
+
+class _ZipChunkSink:
+    """Write-only stream that collects zip output so it can be yielded in chunks"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _report_filename(render_inputs: Dict[str, Any]) -> str:
+    company = re.sub(r"[^A-Za-z0-9]+", "_", render_inputs["company_name"]).strip("_") or "company"
+    return f"{company[:40]}_{render_inputs['session_id']}.pdf"
+
+
+async def _render_for_export(session: Dict[str, Any]) -> Tuple[Dict[str, Any], bytes]:
+    render_inputs = await build_session_report_inputs(session)
+    for attempt in range(BULK_EXPORT_QUEUE_RETRIES):
+        try:
+            _, pdf_bytes = await get_or_render_report(render_inputs)
+            return render_inputs, pdf_bytes
+        except PdfRenderQueueFull:
+            # Interactive downloads share the render pool - back off and retry
+            await asyncio.sleep(0.5 * (attempt + 1))
+    _, pdf_bytes = await get_or_render_report(render_inputs)
+    return render_inputs, pdf_bytes
+
+
+async def stream_reports_zip(session_filter: Dict[str, Any], concurrency: int) -> AsyncIterator[bytes]:
+    """
+    Render the reports of every matching session and stream them as a ZIP archive
+
+    At most `concurrency` reports are rendered or held in memory at a time, and
+    each finished report is written to the archive and yielded immediately, so
+    memory stays flat regardless of how many sessions match. Sessions that fail
+    to render are listed in manifest.csv instead of aborting the archive.
+
+    Args:
+        session_filter: MongoDB filter on the sessions collection
+        concurrency: Maximum number of reports rendered in parallel
+
+    Yields:
+        Chunks of the ZIP archive
+    """
+    db = get_database()
+    sink = _ZipChunkSink()
+    manifest = ["session_id,file,status"]
+    cursor = db.sessions.find(session_filter).sort("created_at", 1)
+
+    pending = {}  # task -> session_id
+    exhausted = False
+
+    try:
+        # PDFs are already compressed; storing them keeps the export CPU-light
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+            while pending or not exhausted:
+                while not exhausted and len(pending) < concurrency:
+                    try:
+                        session = await cursor.next()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    task = asyncio.create_task(_render_for_export(session))
+                    pending[task] = str(session["_id"])
+
+                if not pending:
+                    break
+
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    session_id = pending.pop(task)
+                    try:
+                        render_inputs, pdf_bytes = task.result()
+                    except Exception as e:
+                        print(f"[reports] Bulk export failed for session {session_id}: {e}")
+                        manifest.append(f"{session_id},,error")
+                        continue
+
+                    filename = _report_filename(render_inputs)
+                    archive.writestr(filename, pdf_bytes)
+                    manifest.append(f"{session_id},{filename},ok")
+                    yield sink.drain()
+
+            archive.writestr("manifest.csv", "\n".join(manifest) + "\n")
+
+        yield sink.drain()
+    finally:
+        # Client went away (or an error escaped): stop renders nobody will read
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,333 @@
+"""
+Rescore Service - Re-score historical answers after a scorer or prompt change
+Answers are read one criterion at a time, in _id order and in batches, scored,
+and written back with one bulk_write per batch. Each criterion is read from the
+answers collection, then from the sessions of the embedded layout, whose
+answers are written back with one compare-and-set per session (see
+session_store.update_embedded_answers). After every batch the job's position
+is saved in the rescore_checkpoints collection, so an interrupted job resumes
+where it stopped (python manage.py rescore --job NAME).
+
+New scores are stored next to the old ones (answers.rescores.<job>) so they
+can be compared before anything changes; with `apply` they also replace the
+answer's score and the affected sessions' accumulators are rebuilt at the end.
+
+Scorers:
+- keyword: the fallback keyword scorer, on a process pool
+- local: the local scorer models (services/local_scorer.py), on a process pool;
+  answers it is not confident about are skipped
+- llm: the AI providers (evaluate_and_generate_next), a bounded number of calls at a time
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import asyncio
+import multiprocessing
+import re
+
+from pymongo import UpdateOne
+
+from config.settings import settings
+from config.database import get_database
+from services.catalog_service import get_catalog
+from services.scoring_service import bump_scores_version, rebuild_score_accumulators
+from services.session_store import StaleSession, embedded_answers, update_embedded_answers
+
+CHECKPOINT_COLLECTION = "rescore_checkpoints"
+# Where answers are read from, in this order for each criterion (see services/session_store.py)
+ANSWERS = "answers"
+EMBEDDED_ANSWERS = "embedded"
+ANSWER_SOURCES = (ANSWERS, EMBEDDED_ANSWERS)
+SCORERS = ("keyword", "local", "llm")
+# What score_source an applied score gets
+SCORE_SOURCES = {"keyword": "keyword", "local": "local", "llm": "llm"}
+
+
+# ---------- process pool workers (keyword / local scorers) ----------
+
+_worker_scorer: Optional[str] = None
+
+
+def _init_worker(scorer: str, model_documents: List[Dict[str, Any]]) -> None:
+    global _worker_scorer
+    _worker_scorer = scorer
+    if scorer == "local":
+        from services import local_scorer
+        for document in model_documents:
+            local_scorer._models[document["_id"]] = local_scorer.ScoringModel.from_document(document)
+
+
+def _score_chunk(items: List[tuple]) -> List[Optional[int]]:
+    """Worker-side: score (criterion_id, answer text) pairs; None = no confident score"""
+    if _worker_scorer == "keyword":
+        from services.ai_service import estimate_scores_from_answers
+        return estimate_scores_from_answers([text for _, text in items])
+
+    from services.local_scorer import predict_local_score
+    scores = []
+    for criterion_id, text in items:
+        prediction = predict_local_score(criterion_id, text)
+        scores.append(prediction.score if prediction and prediction.confident else None)
+    return scores
+
+
+# ---------- job ----------
+
+class RescoreJob:
+    """One resumable pass over the stored answers (both session layouts)"""
+
+    def __init__(
+        self,
+        name: str,
+        scorer: str,
+        batch_size: int = 500,
+        workers: int = 2,
+        llm_concurrency: int = 4,
+        apply: bool = False,
+        criterion_id: Optional[str] = None
+    ):
+        if not re.fullmatch(r"[\w-]+", name):
+            # The name is used as a field name (answers.rescores.<name>)
+            raise ValueError(f"Invalid job name {name!r} (letters, digits, '_' and '-' only)")
+        if scorer not in SCORERS:
+            raise ValueError(f"Unknown scorer {scorer!r} (expected one of {', '.join(SCORERS)})")
+        self.name = name
+        self.scorer = scorer
+        self.batch_size = max(1, batch_size)
+        self.workers = max(1, workers)
+        self.llm_concurrency = max(1, llm_concurrency)
+        self.apply = apply
+        self.criterion_id = criterion_id
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._llm_slots: Optional[asyncio.Semaphore] = None
+
+    async def run(self, reset: bool = False) -> Dict[str, Any]:
+        """
+        Score every answer not processed yet by this job
+
+        Returns:
+            The job's checkpoint document (counters and position)
+
+        Raises:
+            ValueError: the checkpoint was created with different options
+        """
+        db = get_database()
+        catalog = await get_catalog()
+        checkpoints = db[CHECKPOINT_COLLECTION]
+        if reset:
+            await checkpoints.delete_one({"_id": self.name})
+
+        checkpoint = await checkpoints.find_one({"_id": self.name})
+        if checkpoint is None:
+            checkpoint = {
+                "_id": self.name,
+                "scorer": self.scorer,
+                "apply": self.apply,
+                "criterion_filter": self.criterion_id,
+                "criterion_id": None,
+                "source": ANSWERS,
+                "last_id": None,
+                "processed": 0,
+                "changed": 0,
+                "skipped": 0,
+                "started_at": datetime.utcnow(),
+                "completed_at": None,
+            }
+            await checkpoints.insert_one(checkpoint)
+        elif (checkpoint["scorer"], checkpoint["apply"], checkpoint["criterion_filter"]) != (
+            self.scorer, self.apply, self.criterion_id
+        ):
+            raise ValueError(
+                f"Job {self.name!r} was started with scorer={checkpoint['scorer']}, "
+                f"apply={checkpoint['apply']}, criterion={checkpoint['criterion_filter']}; use reset to start over"
+            )
+
+        if checkpoint["completed_at"] is None:
+            criterion_ids = [c["criterion_id"] for c in catalog.criteria]
+            if self.criterion_id:
+                criterion_ids = [self.criterion_id]
+            if checkpoint["criterion_id"] in criterion_ids:
+                # Resume: skip the criteria finished before the interruption
+                criterion_ids = criterion_ids[criterion_ids.index(checkpoint["criterion_id"]):]
+
+            try:
+                await self._start_scorer(db)
+                for criterion_id in criterion_ids:
+                    await self._rescore_criterion(db, catalog, checkpoint, criterion_id)
+            finally:
+                self._stop_scorer()
+
+            if self.apply:
+                await self._rebuild_sessions(db)
+            checkpoint["completed_at"] = datetime.utcnow()
+            await checkpoints.update_one({"_id": self.name}, {"$set": {"completed_at": checkpoint["completed_at"]}})
+        return checkpoint
+
+    async def _rescore_criterion(self, db, catalog, checkpoint: Dict[str, Any], criterion_id: str) -> None:
+        criterion = catalog.get(criterion_id)
+        next_criterion = catalog.next_criterion(criterion_id)
+        if not next_criterion:
+            # The last answer of a diagnostic gets a default score, never an evaluated one
+            return
+
+        for source in ANSWER_SOURCES:
+            position = (checkpoint["criterion_id"], checkpoint.get("source", ANSWERS))
+            if position[0] == criterion_id and ANSWER_SOURCES.index(position[1]) > ANSWER_SOURCES.index(source):
+                # Resume: this source was finished before the interruption
+                continue
+            last_id = checkpoint["last_id"] if position == (criterion_id, source) else None
+            while True:
+                answers = await self._next_answers(db, source, criterion_id, last_id)
+                if not answers:
+                    break
+
+                scores = await self._score_batch(criterion, next_criterion, answers)
+                await self._store_scores(db, source, checkpoint, answers, scores)
+
+                last_id = answers[-1]["_id"]
+                checkpoint["processed"] += len(answers)
+                checkpoint.update({"criterion_id": criterion_id, "source": source, "last_id": last_id})
+                await db[CHECKPOINT_COLLECTION].update_one({"_id": self.name}, {"$set": {
+                    "criterion_id": criterion_id,
+                    "source": source,
+                    "last_id": last_id,
+                    "processed": checkpoint["processed"],
+                    "changed": checkpoint["changed"],
+                    "skipped": checkpoint["skipped"],
+                    "updated_at": datetime.utcnow(),
+                }})
+                print(f"[Rescore] {self.name}: {criterion_id} +{len(answers)} "
+                      f"(processed {checkpoint['processed']}, changed {checkpoint['changed']}, "
+                      f"skipped {checkpoint['skipped']})")
+                if len(answers) < self.batch_size:
+                    break
+
+    async def _next_answers(self, db, source: str, criterion_id: str, last_id) -> List[Dict[str, Any]]:
+        """The next batch of answers to a criterion, in _id order"""
+        fields = ["user_text", "score"]
+        if source == EMBEDDED_ANSWERS:
+            return await embedded_answers({"criterion_id": criterion_id}, fields, after_id=last_id, limit=self.batch_size)
+        query = {"criterion_id": criterion_id}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        return await db.answers.find(
+            query, {field: 1 for field in ["session_id", *fields]}
+        ).sort("_id", 1).limit(self.batch_size).to_list(length=self.batch_size)
+
+    async def _store_scores(self, db, source: str, checkpoint: Dict[str, Any], answers, scores) -> None:
+        """Write a batch's new scores back where its answers are stored"""
+        updates = []
+        for answer, score in zip(answers, scores):
+            if score is None:
+                checkpoint["skipped"] += 1
+                continue
+            changed = score != answer.get("score")
+            checkpoint["changed"] += changed
+            update = {
+                f"rescores.{self.name}": {
+                    "scorer": self.scorer,
+                    "score": score,
+                    "previous_score": answer.get("score"),
+                    "changed": changed,
+                    "rescored_at": datetime.utcnow(),
+                }
+            }
+            if self.apply and changed:
+                # Unchanged scores keep their source (LLM scores stay training data for the local scorer)
+                update["score"] = score
+                update["score_source"] = SCORE_SOURCES[self.scorer]
+            updates.append((answer, update))
+
+        try:
+            if source == EMBEDDED_ANSWERS:
+                by_session: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+                versions = {}
+                for answer, update in updates:
+                    by_session.setdefault(answer["session_id"], {})[answer["_id"]] = update
+                    versions[answer["session_id"]] = answer.get("session_version")
+                # StaleSession stops the job before its checkpoint moves: running it again retries the batch
+                for session_id, session_updates in by_session.items():
+                    await update_embedded_answers(session_id, versions[session_id], session_updates)
+            elif updates:
+                await db.answers.bulk_write(
+                    [UpdateOne({"_id": answer["_id"]}, {"$set": update}) for answer, update in updates],
+                    ordered=False
+                )
+        finally:
+            if self.apply:
+                # Results cached by the API for these sessions are outdated now
+                await bump_scores_version(sorted({
+                    answer["session_id"] for answer, update in updates if "score" in update
+                }))
+
+    # ---------- scorers ----------
+
+    async def _start_scorer(self, db) -> None:
+        if self.scorer == "llm":
+            self._llm_slots = asyncio.Semaphore(self.llm_concurrency)
+            return
+
+        model_documents = []
+        if self.scorer == "local":
+            from services.local_scorer import MODEL_COLLECTION
+            model_documents = await db[MODEL_COLLECTION].find({}).to_list(length=None)
+            if not model_documents:
+                raise ValueError("No local scorer models found; run train-local-scorer first")
+        # "spawn" keeps workers independent of the event loop and Mongo threads (as for PDF rendering)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.scorer, model_documents)
+        )
+
+    def _stop_scorer(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def _score_batch(self, criterion, next_criterion, answers: List[Dict[str, Any]]) -> List[Optional[int]]:
+        if self.scorer == "llm":
+            return await asyncio.gather(*(
+                self._score_with_llm(criterion, next_criterion, answer.get("user_text") or "")
+                for answer in answers
+            ))
+
+        items = [(criterion["criterion_id"], answer.get("user_text") or "") for answer in answers]
+        chunk_size = -(-len(items) // self.workers)
+        loop = asyncio.get_running_loop()
+        chunks = await asyncio.gather(*(
+            loop.run_in_executor(self._executor, _score_chunk, items[start:start + chunk_size])
+            for start in range(0, len(items), chunk_size)
+        ))
+        return [score for chunk in chunks for score in chunk]
+
+    async def _score_with_llm(self, criterion, next_criterion, text: str) -> Optional[int]:
+        from services.ai_service import evaluate_and_generate_next
+        from services.deadline import Deadline
+
+        async with self._llm_slots:
+            result = await evaluate_and_generate_next(
+                conversation_history=[],
+                current_answer=text,
+                current_criterion=criterion,
+                next_criterion=next_criterion,
+                deadline=Deadline(settings.TURN_SLA_SECONDS)
+            )
+        if result.get("score_source", "llm") != "llm":
+            # Providers unavailable: count it as skipped rather than store a keyword score
+            return None
+        return result["evaluation"]["score"]
+
+    async def _rebuild_sessions(self, db) -> None:
+        changed = {f"rescores.{self.name}.changed": True}
+        session_ids = await db.answers.distinct("session_id", changed)
+        session_ids += sorted({answer["session_id"] for answer in await embedded_answers(changed, [])} - set(session_ids))
+        print(f"[Rescore] {self.name}: rebuilding score accumulators of {len(session_ids)} session(s)")
+        for session_id in session_ids:
+            try:
+                await rebuild_score_accumulators(session_id)
+            except StaleSession:
+                print(f"[Rescore] {self.name}: session {session_id} kept changing, accumulators removed instead")
+
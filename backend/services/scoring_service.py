@@ -9,7 +9,19 @@ Based on the official diagnostic methodology:
 
 from typing import List, Dict, Any, Tuple
 from config.database import get_database
+from config.settings import settings
+from services.cache_service import TTLCache
+from services.catalog_service import CriteriaCatalog, get_catalog
+from services.session_store import (
+    EMBEDDED,
+    PENDING_TURN_FIELD,
+    StaleSession,
+    complete_pending_turn,
+    session_layout,
+    set_if_unchanged,
+)
 from bson import ObjectId
+from pymongo import UpdateMany
 
 # Constants
 MAX_POINTS_PER_CRITERION = 3
@@ -73,118 +85,388 @@ def get_maturity_profile(percentage: float) -> Dict[str, Any]:
         }
 
 
-async def calculate_pillar_scores(session_id: str, dimension_code: str) -> List[Dict[str, Any]]:
+def build_score_grid(answers: List[Dict[str, Any]], catalog: CriteriaCatalog) -> Tuple[list, list]:
     """
-    Calculate scores for each pillar within a dimension
+    Map a session's answers onto the fixed dimension x pillar x criterion grid
     
     Args:
-        session_id: The diagnostic session ID
-        dimension_code: The dimension code (e.g., "STRAT", "CULTURE")
+        answers: Answer documents (only criterion_id and score are read)
+        catalog: The criteria catalog defining the grid layout
     
     Returns:
-        List of pillar scores with pillar_code, name, score, max_score, percentage
+        Tuple of (points, counts) nested lists of shape catalog.grid_shape
     """
-    db = get_database()
-    
-    # Get all answers for this session and dimension
-    answers = await db.answers.find({
-        "session_id": session_id,
-        "criterion_id": {"$regex": f"^{dimension_code}-"}
-    }).to_list(length=100)
+    n_dims, n_pillars, n_criteria = catalog.grid_shape
+    points = [[[0] * n_criteria for _ in range(n_pillars)] for _ in range(n_dims)]
+    counts = [[[0] * n_criteria for _ in range(n_pillars)] for _ in range(n_dims)]
+    
+    for answer in answers:
+        index = catalog.index_by_id.get(answer.get("criterion_id"))
+        position = catalog.grid_positions[index] if index is not None else None
+        if position is None:
+            continue
+        d, p, c = position
+        points[d][p][c] += answer["score"]
+        counts[d][p][c] += 1
+    
+    return points, counts
+
+
+# ==================== ANSWER PLACEMENT ====================
+# Answers carry the dimension and pillar of their criterion (and its position in
+# the diagnostic) so per-pillar totals can be computed by MongoDB with an
+# indexed $group instead of mapping every criterion_id in Python.
+
+def answer_placement(criterion: Dict[str, Any], catalog: CriteriaCatalog) -> Dict[str, Any]:
+    """Fields stored on an answer to place it in the dimension / pillar grid"""
+    return {
+        "dimension_code": criterion["dimension_code"],
+        "pillar_code": criterion["pillar_code"],
+        "criterion_ordinal": catalog.index_by_id.get(criterion["criterion_id"])
+    }
+
+
+async def backfill_answer_placement() -> int:
+    """
+    Write the placement fields on answers saved before they existed (or after a re-seed moved criteria)
     
-    # Get pillars for this dimension
-    pillars = await db.pillars.find({"dimension_code": dimension_code}).to_list(length=10)
+    Returns:
+        Number of answers updated
+    """
+    db = get_database()
+    catalog = await get_catalog()
+    operations = []
+    for criterion in catalog.criteria:
+        placement = answer_placement(criterion, catalog)
+        operations.append(UpdateMany(
+            {
+                "criterion_id": criterion["criterion_id"],
+                "$or": [{field: {"$ne": value}} for field, value in placement.items()]
+            },
+            {"$set": placement}
+        ))
+    if not operations:
+        return 0
+    result = await db.answers.bulk_write(operations, ordered=False)
+    return result.modified_count
+
+
+async def aggregate_pillar_totals(session_id: str, catalog: CriteriaCatalog) -> Tuple[list, list]:
+    """
+    Per-pillar points and answered counts of a session, grouped by MongoDB
     
-    pillar_scores = []
-    for pillar in pillars:
-        pillar_code = pillar["code"]
-        pillar_name = pillar["name"]
-        
-        # Get answers for this pillar
-        pillar_answers = [
-            a for a in answers 
-            if a["criterion_id"].startswith(f"{dimension_code}-{pillar_code}-")
-        ]
-        
-        # Calculate pillar score
-        total_score = sum(a["score"] for a in pillar_answers)
-        answered_count = len(pillar_answers)
-        max_possible = MAX_POINTS_PER_PILLAR  # 9 points max per pillar
-        
-        # Calculate percentage for this pillar
-        percentage = (total_score / max_possible * 100) if max_possible > 0 else 0
-        
-        pillar_scores.append({
-            "pillar_code": pillar_code,
-            "pillar_name": pillar_name,
-            "score": total_score,
-            "max_score": max_possible,
-            "percentage": round(percentage, 2),
-            "answered_count": answered_count
-        })
+    Uses the answers (session_id, dimension_code, pillar_code, score) index, so
+    the documents themselves are not read.
     
-    return pillar_scores
+    Returns:
+        Tuple of (pillar_points, pillar_counts) nested lists, indexed [dimension][pillar]
+        in catalog order, or None if some answers have no placement yet (not backfilled)
+    """
+    db = get_database()
+    groups = await db.answers.aggregate([
+        {"$match": {"session_id": session_id}},
+        {"$group": {
+            "_id": {"dimension": "$dimension_code", "pillar": "$pillar_code"},
+            "points": {"$sum": "$score"},
+            "answered": {"$sum": 1}
+        }}
+    ]).to_list(length=None)
+    
+    positions = {}
+    for d, dim in enumerate(catalog.dimensions):
+        for p, pillar in enumerate(catalog.pillars_by_dimension.get(dim["code"], ())):
+            positions[(dim["code"], pillar["code"])] = (d, p)
+    pillar_points = [[0] * len(catalog.pillars_by_dimension.get(dim["code"], ())) for dim in catalog.dimensions]
+    pillar_counts = [list(row) for row in pillar_points]
+    
+    for group in groups:
+        key = (group["_id"].get("dimension"), group["_id"].get("pillar"))
+        if key[0] is None:
+            return None
+        if key not in positions:
+            continue
+        d, p = positions[key]
+        pillar_points[d][p] += group["points"]
+        pillar_counts[d][p] += group["answered"]
+    return pillar_points, pillar_counts
 
 
-async def calculate_dimension_scores(session_id: str) -> Tuple[List[Dict[str, Any]], float]:
+def score_grid_to_pillar_totals(points: list, counts: list) -> Tuple[list, list]:
+    """Sum a score grid over criteria: (pillar_points, pillar_counts) indexed [dimension][pillar]"""
+    return (
+        [[sum(cells) for cells in dim] for dim in points],
+        [[sum(cells) for cells in dim] for dim in counts]
+    )
+
+
+def score_grid_to_dimension_scores(
+    points: list,
+    counts: list,
+    catalog: CriteriaCatalog
+) -> Tuple[List[Dict[str, Any]], float]:
     """
-    Calculate scores for all dimensions and global score
+    Compute pillar, dimension and global scores from a score grid in one pass
     
     Args:
-        session_id: The diagnostic session ID
+        points: Per-cell points, as returned by build_score_grid
+        counts: Per-cell answered counts, as returned by build_score_grid
+        catalog: The criteria catalog defining the grid layout
     
     Returns:
         Tuple of (dimension_scores, global_score)
-        - dimension_scores: List of dimension score dictionaries
-        - global_score: Average score across all dimensions (0-3 scale)
     """
-    db = get_database()
+    return pillar_totals_to_dimension_scores(*score_grid_to_pillar_totals(points, counts), catalog)
+
+
+def pillar_totals_to_dimension_scores(
+    pillar_points: list,
+    pillar_counts: list,
+    catalog: CriteriaCatalog
+) -> Tuple[List[Dict[str, Any]], float]:
+    """
+    Compute pillar, dimension and global scores from per-pillar totals
     
-    # Get all dimensions
-    dimensions = await db.dimensions.find().to_list(length=10)
+    Args:
+        pillar_points: points[d][p] for each dimension/pillar of the catalog
+        pillar_counts: answered[d][p] for each dimension/pillar of the catalog
+        catalog: The criteria catalog defining dimension and pillar order
     
+    Returns:
+        Tuple of (dimension_scores, global_score)
+    """
     dimension_scores = []
     total_dimension_score = 0
     
-    for dim in dimensions:
+    for d, dim in enumerate(catalog.dimensions):
         dim_code = dim["code"]
-        dim_name = dim["name"]
         
-        # Calculate pillar scores for this dimension
-        pillar_scores = await calculate_pillar_scores(session_id, dim_code)
+        pillar_scores = []
+        for p, pillar in enumerate(catalog.pillars_by_dimension.get(dim_code, ())):
+            total_score = pillar_points[d][p]
+            max_possible = MAX_POINTS_PER_PILLAR  # 9 points max per pillar
+            percentage = (total_score / max_possible * 100) if max_possible > 0 else 0
+            
+            pillar_scores.append({
+                "pillar_code": pillar["code"],
+                "pillar_name": pillar["name"],
+                "score": total_score,
+                "max_score": max_possible,
+                "percentage": round(percentage, 2),
+                "answered_count": pillar_counts[d][p]
+            })
         
-        # Calculate dimension score (sum of all pillar scores)
+        # Dimension score = sum of all pillar scores (36 points max)
         total_points = sum(p["score"] for p in pillar_scores)
-        max_points = MAX_POINTS_PER_DIMENSION  # 36 points max per dimension
-        
-        # Convert to percentage
+        max_points = MAX_POINTS_PER_DIMENSION
         percentage = (total_points / max_points * 100) if max_points > 0 else 0
         
         # Convert to 0-3 scale for global score calculation
         score_on_3_scale = (total_points / max_points * 3) if max_points > 0 else 0
-        
         total_dimension_score += score_on_3_scale
         
-        # Count answered questions
-        answered_count = sum(p["answered_count"] for p in pillar_scores)
-        
         dimension_scores.append({
             "dimension_code": dim_code,
-            "dimension_name": dim_name,
+            "dimension_name": dim["name"],
             "score": round(score_on_3_scale, 2),  # 0-3 scale
             "percentage": round(percentage, 2),   # 0-100 scale
             "total_points": total_points,
             "max_points": max_points,
             "pillar_scores": pillar_scores,
-            "answered_count": answered_count
+            "answered_count": sum(p["answered_count"] for p in pillar_scores)
         })
     
     # Calculate global score (average of dimension scores on 0-3 scale)
-    global_score = (total_dimension_score / len(dimensions)) if dimensions else 0
+    global_score = (total_dimension_score / len(catalog.dimensions)) if catalog.dimensions else 0
     
     return dimension_scores, round(global_score, 2)
 
 
+# ==================== SCORE ACCUMULATORS ====================
+# Sessions keep running per-pillar and per-dimension totals, updated with $inc
+# when an answer is submitted:
+#   score_accumulators.pillars.<DIM>.<PILLAR>.{points, answered}
+#   score_accumulators.dimensions.<DIM>.{points, answered}
+
+ACCUMULATORS_FIELD = "score_accumulators"
+
+
+def empty_score_accumulators() -> Dict[str, Any]:
+    """Initial accumulator state stored on new sessions"""
+    return {"pillars": {}, "dimensions": {}}
+
+
+def accumulator_increments(criterion: Dict[str, Any], score: Any) -> Dict[str, int]:
+    """
+    Build the $inc document that records one answer in the session accumulators
+    
+    Args:
+        criterion: The answered criterion (dimension_code and pillar_code are read)
+        score: The answer score (0-3)
+    
+    Returns:
+        Mapping of dotted field paths to increments
+    """
+    dim_code = criterion["dimension_code"]
+    pillar_code = criterion["pillar_code"]
+    points = int(score)
+    return {
+        f"{ACCUMULATORS_FIELD}.pillars.{dim_code}.{pillar_code}.points": points,
+        f"{ACCUMULATORS_FIELD}.pillars.{dim_code}.{pillar_code}.answered": 1,
+        f"{ACCUMULATORS_FIELD}.dimensions.{dim_code}.points": points,
+        f"{ACCUMULATORS_FIELD}.dimensions.{dim_code}.answered": 1,
+    }
+
+
+def score_grid_to_accumulators(points: list, counts: list, catalog: CriteriaCatalog) -> Dict[str, Any]:
+    """Convert a score grid (see build_score_grid) into the stored accumulator layout"""
+    return pillar_totals_to_accumulators(*score_grid_to_pillar_totals(points, counts), catalog)
+
+
+def pillar_totals_to_accumulators(pillar_points: list, pillar_counts: list, catalog: CriteriaCatalog) -> Dict[str, Any]:
+    """Convert per-pillar totals (indexed [dimension][pillar]) into the stored accumulator layout"""
+    accumulators = empty_score_accumulators()
+    for d, dim in enumerate(catalog.dimensions):
+        dim_code = dim["code"]
+        pillars = {}
+        for p, pillar in enumerate(catalog.pillars_by_dimension.get(dim_code, ())):
+            answered = pillar_counts[d][p]
+            if answered:
+                pillars[pillar["code"]] = {"points": pillar_points[d][p], "answered": answered}
+        if pillars:
+            accumulators["pillars"][dim_code] = pillars
+            accumulators["dimensions"][dim_code] = {
+                "points": sum(v["points"] for v in pillars.values()),
+                "answered": sum(v["answered"] for v in pillars.values())
+            }
+    return accumulators
+
+
+def accumulators_answered(accumulators: Dict[str, Any]) -> int:
+    """Number of answers recorded in a session's accumulators"""
+    return sum(dim.get("answered", 0) for dim in accumulators.get("dimensions", {}).values())
+
+
+def accumulators_to_dimension_scores(
+    accumulators: Dict[str, Any],
+    catalog: CriteriaCatalog
+) -> Tuple[List[Dict[str, Any]], float]:
+    """Compute dimension and global scores from a session's stored accumulators"""
+    stored = accumulators.get("pillars", {})
+    pillar_points = []
+    pillar_counts = []
+    for dim in catalog.dimensions:
+        dim_totals = stored.get(dim["code"], {})
+        pillars = catalog.pillars_by_dimension.get(dim["code"], ())
+        pillar_points.append([dim_totals.get(p["code"], {}).get("points", 0) for p in pillars])
+        pillar_counts.append([dim_totals.get(p["code"], {}).get("answered", 0) for p in pillars])
+    return pillar_totals_to_dimension_scores(pillar_points, pillar_counts, catalog)
+
+
+# A session keeps changing only while answers are being submitted, so a few tries are enough
+REBUILD_ATTEMPTS = 5
+
+# Incremented whenever a session's scores change without a new answer (rebuilds,
+# rescore --apply), possibly in another process: part of the results cache key
+SCORES_VERSION_FIELD = "scores_version"
+
+
+async def bump_scores_version(session_ids: List[str]) -> None:
+    """Record that the scores of these sessions changed, so no process serves their cached results"""
+    if not session_ids:
+        return
+    await get_database().sessions.update_many(
+        {"_id": {"$in": [ObjectId(session_id) for session_id in session_ids]}},
+        {"$inc": {SCORES_VERSION_FIELD: 1}}
+    )
+    for session_id in session_ids:
+        invalidate_session_results(session_id)
+
+
+async def rebuild_score_accumulators(session_id: str) -> Dict[str, Any]:
+    """
+    Recompute a session's accumulators from the answers collection and store them
+    
+    Used to backfill sessions created before accumulators existed, or to repair
+    drift after answers were edited outside submit_answer. The accumulators are
+    only stored if the session's version is still the one read before the
+    answers (a turn recorded meanwhile would otherwise be lost); the rebuild is
+    retried otherwise. The session's scores_version is incremented so cached
+    results are dropped in every process.
+    
+    Args:
+        session_id: The diagnostic session ID
+    
+    Returns:
+        The accumulators written to the session
+    
+    Raises:
+        StaleSession: the session kept changing for REBUILD_ATTEMPTS tries (its
+            accumulators are then removed rather than left stale)
+    """
+    db = get_database()
+    catalog = await get_catalog()
+    
+    for _ in range(REBUILD_ATTEMPTS):
+        session = await db.sessions.find_one({"_id": ObjectId(session_id)}, {"version": 1})
+        pillar_points, pillar_counts = await _session_pillar_totals(session_id, catalog)
+        accumulators = pillar_totals_to_accumulators(pillar_points, pillar_counts, catalog)
+        if session is None:
+            return accumulators
+        if await set_if_unchanged(session, {ACCUMULATORS_FIELD: accumulators}, {SCORES_VERSION_FIELD: 1}):
+            invalidate_session_results(session_id)
+            return accumulators
+    # Without accumulators the session is scored from its answers, and its next answer stores them whole
+    await db.sessions.update_one(
+        {"_id": ObjectId(session_id)},
+        {"$unset": {ACCUMULATORS_FIELD: ""}, "$inc": {SCORES_VERSION_FIELD: 1}}
+    )
+    invalidate_session_results(session_id)
+    raise StaleSession(session_id)
+
+
+async def calculate_dimension_scores(session_id: str) -> Tuple[List[Dict[str, Any]], float]:
+    """
+    Calculate scores for all dimensions and global score
+    
+    Per-pillar totals are grouped by MongoDB (see aggregate_pillar_totals), or
+    read from the session document for the embedded storage layout.
+    
+    Args:
+        session_id: The diagnostic session ID
+    
+    Returns:
+        Tuple of (dimension_scores, global_score)
+        - dimension_scores: List of dimension score dictionaries
+        - global_score: Average score across all dimensions (0-3 scale)
+    """
+    catalog = await get_catalog()
+    pillar_points, pillar_counts = await _session_pillar_totals(session_id, catalog)
+    return pillar_totals_to_dimension_scores(pillar_points, pillar_counts, catalog)
+
+
+async def _session_pillar_totals(session_id: str, catalog: CriteriaCatalog) -> Tuple[list, list]:
+    """Per-pillar totals of a session: $group when its answers are placed, else mapped in Python"""
+    session = await get_database().sessions.find_one(
+        {"_id": ObjectId(session_id)},
+        {"layout": 1, "answers.criterion_id": 1, "answers.score": 1, PENDING_TURN_FIELD: 1}
+    ) or {}
+    if session_layout(session) == EMBEDDED:
+        # Answers are embedded in the session document (see services/session_store.py)
+        return score_grid_to_pillar_totals(*build_score_grid(session.get("answers", []), catalog))
+    await complete_pending_turn(session)
+    
+    totals = await aggregate_pillar_totals(session_id, catalog)
+    if totals is not None:
+        return totals
+    
+    # Answers saved before placement fields existed (until backfill-answer-placement runs)
+    answers = await get_database().answers.find(
+        {"session_id": session_id},
+        {"criterion_id": 1, "score": 1, "_id": 0}
+    ).to_list(length=None)
+    return score_grid_to_pillar_totals(*build_score_grid(answers, catalog))
+
+
 async def identify_gaps(dimension_scores: List[Dict[str, Any]], maturity_level: str) -> List[Dict[str, Any]]:
     """
     Identify digital gaps based on maturity profile
@@ -336,18 +618,36 @@ async def generate_recommendations(
     return recommendations[:6]  # Return top 6 recommendations
 
 
-async def calculate_complete_results(session_id: str) -> Dict[str, Any]:
+async def calculate_complete_results(session_id: str, session: Dict[str, Any] = None) -> Dict[str, Any]:
     """
     Calculate complete diagnostic results including scores, profile, gaps, and recommendations
     
+    Scores are read from the session's pre-aggregated accumulators when they
+    account for every answer (their answered count equals the session's
+    progress); other sessions are scored from their answers.
+    
     Args:
         session_id: The diagnostic session ID
+        session: The session document, if the caller already loaded it
     
     Returns:
         Complete results dictionary
     """
+    if session is None:
+        db = get_database()
+        session = await db.sessions.find_one(
+            {"_id": ObjectId(session_id)},
+            {ACCUMULATORS_FIELD: 1, "progress": 1}
+        ) or {}
+    
     # Calculate dimension scores and global score
-    dimension_scores, global_score = await calculate_dimension_scores(session_id)
+    accumulators = session.get(ACCUMULATORS_FIELD)
+    # Accumulators missing answers (e.g. started by $inc on a session already in progress) are not trusted
+    if accumulators is not None and accumulators_answered(accumulators) == session.get("progress", 0):
+        catalog = await get_catalog()
+        dimension_scores, global_score = accumulators_to_dimension_scores(accumulators, catalog)
+    else:
+        dimension_scores, global_score = await calculate_dimension_scores(session_id)
     
     # Convert global score to percentage
     global_percentage = (global_score / 3) * 100
@@ -374,3 +674,37 @@ async def calculate_complete_results(session_id: str) -> Dict[str, Any]:
         "recommendations": recommendations
     }
 
+
+# ==================== RESULTS CACHE ====================
+# Keyed by (session_id, progress, scores_version): a new answer or a score change
+# made by any process (rebuild, rescore) changes the key. submit_answer also
+# drops the session's older entries explicitly.
+results_cache = TTLCache(
+    "results",
+    max_entries=settings.RESULTS_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RESULTS_CACHE_TTL_SECONDS
+)
+
+
+async def get_session_results(session_id: str, session: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return complete results for a session, scoring it at most once per answer count and scores version
+    
+    Args:
+        session_id: The diagnostic session ID
+        session: The session document (its progress and scores_version are part of the cache key)
+    
+    Returns:
+        Complete results dictionary (shared with other callers - do not mutate)
+    """
+    key = (session_id, session.get("progress", 0), session.get(SCORES_VERSION_FIELD, 0))
+    results = results_cache.get(key)
+    if results is None:
+        results = await calculate_complete_results(session_id, session=session)
+        results_cache.set(key, results)
+    return results
+
+
+def invalidate_session_results(session_id: str) -> None:
+    """Forget cached results for a session (called whenever its answers change)"""
+    results_cache.invalidate(lambda key: key[0] == session_id)
@@ -0,0 +1,106 @@
+"""
+Session Locks - One turn at a time per session, within this process
+Turns of the same session are serialized on an asyncio lock, so a request
+always reads the state left by the previous one. Identical requests in flight
+at the same time (same session, operation and body - typically a client
+retrying before the first response arrived) are coalesced: they wait for the
+first one and share its response instead of calling the AI providers again.
+
+Across processes (several uvicorn workers) the compare-and-set on the
+session's version (services/session_store.py) still prevents a second write;
+the losing request gets a 409.
+"""
+
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+
+_locks: Dict[str, asyncio.Lock] = {}
+_lock_users: Dict[str, int] = {}
+# (session_id, operation, fingerprint) -> response of the request running it
+_inflight: Dict[Tuple[str, str, str], asyncio.Future] = {}
+_stats = {"coalesced": 0, "waited": 0}
+
+
+@asynccontextmanager
+async def session_lock(session_id: str) -> AsyncIterator[None]:
+    """Hold the session's lock (locks are dropped once nobody holds or waits for them)"""
+    lock = _locks.setdefault(session_id, asyncio.Lock())
+    _lock_users[session_id] = _lock_users.get(session_id, 0) + 1
+    if lock.locked():
+        _stats["waited"] += 1
+    try:
+        async with lock:
+            yield
+    finally:
+        _lock_users[session_id] -= 1
+        if not _lock_users[session_id]:
+            del _lock_users[session_id]
+            del _locks[session_id]
+
+
+def join_inflight(session_id: str, operation: str, fingerprint: str) -> Tuple[bool, asyncio.Future]:
+    """
+    Register a request, or find the identical request already running
+
+    Returns:
+        (leader, future): the leader runs the request and must call
+        finish_inflight; the others await the future for its response
+    """
+    key = (session_id, operation, fingerprint)
+    future = _inflight.get(key)
+    if future is not None:
+        _stats["coalesced"] += 1
+        return False, future
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    return True, future
+
+
+def finish_inflight(
+    session_id: str,
+    operation: str,
+    fingerprint: str,
+    response: Optional[Dict[str, Any]] = None,
+    error: Optional[BaseException] = None
+) -> None:
+    """Hand the leader's response (or error) to the requests coalesced on it"""
+    future = _inflight.pop((session_id, operation, fingerprint))
+    if error is not None and not isinstance(error, Exception):
+        # Cancelled or closed (client gone): the coalesced requests are cancelled too
+        future.cancel()
+    elif error is not None:
+        future.set_exception(error)
+        # Marks the error as retrieved when no request was coalesced on it
+        future.exception()
+    else:
+        future.set_result(response)
+
+
+async def run_serialized(
+    session_id: str,
+    operation: str,
+    fingerprint: str,
+    handler: Callable[[], Awaitable[Dict[str, Any]]]
+) -> Dict[str, Any]:
+    """Run `handler` under the session's lock, or share the response of the identical request in flight"""
+    leader, future = join_inflight(session_id, operation, fingerprint)
+    if not leader:
+        return await asyncio.shield(future)
+    try:
+        async with session_lock(session_id):
+            response = await handler()
+    except BaseException as e:
+        finish_inflight(session_id, operation, fingerprint, error=e)
+        raise
+    finish_inflight(session_id, operation, fingerprint, response)
+    return response
+
+
+def session_lock_stats() -> Dict[str, int]:
+    return {
+        "locked_sessions": len(_locks),
+        "inflight_requests": len(_inflight),
+        "coalesced_requests": _stats["coalesced"],
+        "waited_for_lock": _stats["waited"],
+    }
@@ -0,0 +1,382 @@
+"""
+Session Store - Where a session's questions and answers live
+Two storage layouts are supported, chosen per session when it is created
+(SESSION_STORAGE_LAYOUT) and recorded in its "layout" field, so changing the
+setting never strands existing sessions:
+
+- "collections" (default, also sessions without a layout field): questions and
+  answers are documents of their own collections, linked by session_id. A
+  turn stores its answer and next question in the session update itself
+  ("pending_turn"), then copies them to their collections and clears the
+  field: four writes. A turn interrupted after the session update is
+  completed by the next read of the session (complete_pending_turn), so the
+  session is never left ahead of its answers.
+- "embedded": the session document holds "questions" and "answers" arrays
+  with the same documents (including their _id). A turn is a single atomic
+  find_one_and_update, and loading a turn is a single read.
+
+Routes and services go through the functions below instead of querying the
+questions / answers collections directly. `python manage.py migrate-sessions`
+moves existing sessions between layouts.
+
+Every write that moves a session forward (add_question, record_turn) is a
+compare-and-set on the session's "version" field, which it increments: a
+request working from a session document another request has changed since
+raises StaleSession instead of writing a second answer for the same question.
+"""
+
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+import asyncio
+
+from config.settings import settings
+from config.database import get_database
+
+COLLECTIONS = "collections"
+EMBEDDED = "embedded"
+LAYOUTS = (COLLECTIONS, EMBEDDED)
+# Answer and next question of a collections-layout turn not copied to their collections yet
+PENDING_TURN_FIELD = "pending_turn"
+
+
+class StaleSession(Exception):
+    """Raised when the session was changed by another request since it was read"""
+
+
+def session_layout(session: Dict[str, Any]) -> str:
+    return session.get("layout", COLLECTIONS)
+
+
+def new_session_fields() -> Dict[str, Any]:
+    """Storage fields (layout, version) to add to a new session document"""
+    if settings.SESSION_STORAGE_LAYOUT == EMBEDDED:
+        return {"layout": EMBEDDED, "version": 0, "questions": [], "answers": []}
+    return {"layout": COLLECTIONS, "version": 0}
+
+
+def _current_version_filter(session: Dict[str, Any]) -> Dict[str, Any]:
+    """Matches the session only if its version is still the one that was read"""
+    version = session.get("version", 0)
+    # Sessions created before versioning get the field on their first write
+    return {"_id": session["_id"], "version": version if version else {"$in": [0, None]}}
+
+
+async def session_version(session_id: str) -> Optional[int]:
+    """Current version of a session (None if it does not exist)"""
+    session = await get_database().sessions.find_one({"_id": ObjectId(session_id)}, {"version": 1})
+    return None if session is None else session.get("version", 0)
+
+
+async def set_if_unchanged(
+    session: Dict[str, Any],
+    fields: Dict[str, Any],
+    increments: Optional[Dict[str, int]] = None
+) -> bool:
+    """
+    Set fields derived from the session's answers (and apply `increments`), unless it changed since it was read
+
+    The version is not incremented: the session does not move forward.
+
+    Returns:
+        False if the session changed (or no longer exists)
+    """
+    update = {"$set": fields}
+    if increments:
+        update["$inc"] = increments
+    result = await get_database().sessions.update_one(_current_version_filter(session), update)
+    return bool(result.matched_count)
+
+
+async def complete_pending_turn(session: Dict[str, Any]) -> None:
+    """
+    Copy the answer and question of the session's last turn to their collections, if not done yet
+
+    Called by every reader of a collections-layout session: the copy is
+    idempotent (the documents keep the _id they got in the session), so a
+    turn interrupted after its session update is completed by whoever reads
+    the session next, even while the turn itself is still copying them.
+    """
+    pending = session.get(PENDING_TURN_FIELD)
+    if not pending:
+        return
+    db = get_database()
+    for collection, key in (("answers", "answer"), ("questions", "question")):
+        if key in pending:
+            try:
+                await db[collection].insert_one(dict(pending[key]))
+            except DuplicateKeyError:
+                pass
+    # Only this turn's copy: a later turn may have stored its own since
+    await db.sessions.update_one(
+        {"_id": session["_id"], f"{PENDING_TURN_FIELD}.answer._id": pending["answer"]["_id"]},
+        {"$unset": {PENDING_TURN_FIELD: ""}}
+    )
+
+
+async def count_questions(session: Dict[str, Any]) -> int:
+    if session_layout(session) == EMBEDDED:
+        return len(session.get("questions", []))
+    await complete_pending_turn(session)
+    return await get_database().questions.count_documents({"session_id": str(session["_id"])})
+
+
+async def add_question(session: Dict[str, Any], question_doc: Dict[str, Any]) -> str:
+    """
+    Store a question asked in the session; returns its id
+
+    Raises:
+        StaleSession: the session changed since it was read
+    """
+    db = get_database()
+    if session_layout(session) == EMBEDDED:
+        question_doc = {"_id": ObjectId(), **question_doc}
+        result = await db.sessions.update_one(
+            _current_version_filter(session),
+            {"$push": {"questions": question_doc}, "$inc": {"version": 1}}
+        )
+        if not result.matched_count:
+            raise StaleSession(str(session["_id"]))
+        return str(question_doc["_id"])
+    result = await db.sessions.update_one(_current_version_filter(session), {"$inc": {"version": 1}})
+    if not result.matched_count:
+        raise StaleSession(str(session["_id"]))
+    result = await db.questions.insert_one(question_doc)
+    return str(result.inserted_id)
+
+
+async def last_question(session: Dict[str, Any], criterion_id: str) -> Optional[Dict[str, Any]]:
+    """Most recent question asked for a criterion"""
+    if session_layout(session) == EMBEDDED:
+        asked = [q for q in session.get("questions", []) if q["criterion_id"] == criterion_id]
+        return max(asked, key=lambda q: q["created_at"]) if asked else None
+    await complete_pending_turn(session)
+    return await get_database().questions.find_one(
+        {"session_id": str(session["_id"]), "criterion_id": criterion_id},
+        sort=[("created_at", -1)]
+    )
+
+
+async def session_answers(session: Dict[str, Any], fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """The session's answers in the order they were given (only `fields` are guaranteed when given)"""
+    if session_layout(session) == EMBEDDED:
+        return sorted(session.get("answers", []), key=lambda a: a["created_at"])
+    await complete_pending_turn(session)
+    projection = {field: 1 for field in fields} if fields else None
+    return await get_database().answers.find(
+        {"session_id": str(session["_id"])}, projection
+    ).sort("created_at", 1).to_list(length=None)
+
+
+async def record_turn(
+    session: Dict[str, Any],
+    answer_doc: Dict[str, Any],
+    next_question_doc: Optional[Dict[str, Any]],
+    session_updates: Dict[str, Any],
+    score_increments: Dict[str, int]
+) -> Optional[str]:
+    """
+    Store an answer, the next question (None when the diagnostic is complete) and the session's new state
+
+    Returns:
+        The next question's id, or None
+
+    Raises:
+        StaleSession: the session changed since it was read (nothing is written)
+    """
+    db = get_database()
+    increments = {**score_increments, "version": 1}
+    if session_layout(session) == EMBEDDED:
+        push = {"answers": {"_id": ObjectId(), **answer_doc}}
+        next_question_id = None
+        if next_question_doc is not None:
+            next_question_id = ObjectId()
+            push["questions"] = {"_id": next_question_id, **next_question_doc}
+        updated = await db.sessions.find_one_and_update(
+            _current_version_filter(session),
+            {"$push": push, "$set": session_updates, "$inc": increments},
+            projection={"_id": 1}
+        )
+        if updated is None:
+            raise StaleSession(str(session["_id"]))
+        return str(next_question_id) if next_question_id else None
+
+    # The previous turn's copy must be done before this turn's replaces it
+    await complete_pending_turn(session)
+    # Answer and question are stored with the compare-and-set: only the request that wins it
+    # stores them, and the session never moves forward without them
+    pending = {"answer": {"_id": ObjectId(), **answer_doc}}
+    if next_question_doc is not None:
+        pending["question"] = {"_id": ObjectId(), **next_question_doc}
+    result = await db.sessions.update_one(
+        _current_version_filter(session),
+        {"$set": {**session_updates, PENDING_TURN_FIELD: pending}, "$inc": increments}
+    )
+    if not result.matched_count:
+        raise StaleSession(str(session["_id"]))
+    await complete_pending_turn({"_id": session["_id"], PENDING_TURN_FIELD: pending})
+    return str(pending["question"]["_id"]) if "question" in pending else None
+
+
+async def embedded_answers(
+    answer_filter: Dict[str, Any],
+    fields: List[str],
+    after_id: Optional[ObjectId] = None,
+    limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Answers of every embedded session matching `answer_filter` (offline jobs, e.g. training, rescoring)
+
+    Each answer also gets the "session_id" and "session_version" of its
+    session. With after_id / limit, answers come in _id order, the first
+    `limit` after `after_id`.
+    """
+    answer_filter = dict(answer_filter)
+    if after_id is not None:
+        answer_filter["_id"] = {"$gt": after_id}
+    pipeline = [
+        {"$match": {"layout": EMBEDDED}},
+        {"$unwind": "$answers"},
+        {"$addFields": {"answers.session_oid": "$_id", "answers.session_version": "$version"}},
+        {"$replaceRoot": {"newRoot": "$answers"}},
+        {"$match": answer_filter},
+    ]
+    if after_id is not None or limit:
+        pipeline.append({"$sort": {"_id": 1}})
+    if limit:
+        pipeline.append({"$limit": limit})
+    pipeline.append({"$project": {field: 1 for field in [*fields, "session_oid", "session_version"]}})
+    answers = await get_database().sessions.aggregate(pipeline).to_list(length=None)
+    for answer in answers:
+        answer["session_id"] = str(answer.pop("session_oid"))
+    return answers
+
+
+# Tries before giving up on updating answers of a session that keeps changing
+EMBEDDED_UPDATE_ATTEMPTS = 5
+
+
+async def update_embedded_answers(
+    session_id: str,
+    session_version: Optional[int],
+    updates: Dict[ObjectId, Dict[str, Any]]
+) -> None:
+    """
+    $set fields of answers embedded in a session ({answer _id: fields}, offline jobs, e.g. rescoring)
+
+    A compare-and-set on the version read with the answers, which it
+    increments (a migration copying the arrays meanwhile fails its own check
+    instead of dropping the change). If a turn was recorded since, the write
+    is retried on the current version; if the session moved to the
+    collections layout, its answers are updated there.
+
+    Raises:
+        StaleSession: the session changed on each of EMBEDDED_UPDATE_ATTEMPTS tries
+    """
+    db = get_database()
+    session = {"_id": ObjectId(session_id), "version": session_version}
+    fields_set: Dict[str, Any] = {}
+    array_filters = []
+    for i, (answer_id, fields) in enumerate(updates.items()):
+        fields_set.update({f"answers.$[a{i}].{field}": value for field, value in fields.items()})
+        array_filters.append({f"a{i}._id": answer_id})
+
+    for _ in range(EMBEDDED_UPDATE_ATTEMPTS):
+        result = await db.sessions.update_one(
+            {**_current_version_filter(session), "layout": EMBEDDED},
+            {"$set": fields_set, "$inc": {"version": 1}},
+            array_filters=array_filters
+        )
+        if result.matched_count:
+            return
+        session = await db.sessions.find_one({"_id": ObjectId(session_id)}, {"layout": 1, "version": 1})
+        if session is None:
+            return
+        if session_layout(session) != EMBEDDED:
+            for answer_id, fields in updates.items():
+                await db.answers.update_one({"_id": answer_id, "session_id": session_id}, {"$set": fields})
+            return
+    raise StaleSession(session_id)
+
+
+# Tries before giving up on migrating a session that keeps changing
+MIGRATION_ATTEMPTS = 5
+_MIGRATION_RETRY_SECONDS = 0.2
+
+
+async def migrate_session(session_id: str, layout: str, keep_source: bool = False) -> bool:
+    """
+    Move one session's questions and answers to `layout`
+
+    The session document is switched first, then the copied documents are
+    deleted (unless keep_source), so an interrupted migration never loses
+    data. The switch is a compare-and-set on the session's version: if a turn
+    was recorded since the session was read, it is read and copied again.
+
+    Returns:
+        False if the session was already in that layout
+
+    Raises:
+        StaleSession: the session changed on each of MIGRATION_ATTEMPTS tries
+    """
+    db = get_database()
+    for _ in range(MIGRATION_ATTEMPTS):
+        session = await db.sessions.find_one({"_id": ObjectId(session_id)})
+        if session is None:
+            return False
+        if session_layout(session) == layout:
+            if layout == EMBEDDED and not keep_source:
+                # Copies left by an interrupted (or --keep) migration
+                for collection in ("questions", "answers"):
+                    ids = [doc["_id"] for doc in session.get(collection, [])]
+                    await db[collection].delete_many({"session_id": session_id, "_id": {"$in": ids}})
+            return False
+
+        if layout == EMBEDDED:
+            switched = await _migrate_to_embedded(session, keep_source)
+        else:
+            switched = await _migrate_to_collections(session, keep_source)
+        if switched:
+            return True
+        await asyncio.sleep(_MIGRATION_RETRY_SECONDS)
+    raise StaleSession(session_id)
+
+
+async def _migrate_to_embedded(session: Dict[str, Any], keep_source: bool) -> bool:
+    db = get_database()
+    await complete_pending_turn(session)
+    query = {"session_id": str(session["_id"])}
+    questions = await db.questions.find(query).sort("created_at", 1).to_list(length=None)
+    answers = await db.answers.find(query).sort("created_at", 1).to_list(length=None)
+    # Only if no turn was recorded since the session was read; turns that read it before fail their own check
+    result = await db.sessions.update_one(_current_version_filter(session), {"$set": {
+        "layout": EMBEDDED,
+        "questions": [{k: v for k, v in q.items() if k != "session_id"} for q in questions],
+        "answers": [{k: v for k, v in a.items() if k != "session_id"} for a in answers],
+    }, "$unset": {PENDING_TURN_FIELD: ""}, "$inc": {"version": 1}})
+    if not result.matched_count:
+        return False
+    if not keep_source:
+        for collection, documents in (("questions", questions), ("answers", answers)):
+            if documents:
+                await db[collection].delete_many({"_id": {"$in": [doc["_id"] for doc in documents]}})
+    return True
+
+
+async def _migrate_to_collections(session: Dict[str, Any], keep_source: bool) -> bool:
+    db = get_database()
+    session_id = str(session["_id"])
+    questions = [{**q, "session_id": session_id} for q in session.get("questions", [])]
+    answers = [{**a, "session_id": session_id} for a in session.get("answers", [])]
+    # Re-runs (and retries) must not duplicate documents
+    for collection, documents in (("questions", questions), ("answers", answers)):
+        existing = set(await db[collection].distinct("_id", {"session_id": session_id}))
+        missing = [doc for doc in documents if doc["_id"] not in existing]
+        if missing:
+            await db[collection].insert_many(missing)
+    update = {"$set": {"layout": COLLECTIONS}, "$inc": {"version": 1}}
+    if not keep_source:
+        update["$unset"] = {"questions": "", "answers": ""}
+    # A turn recorded meanwhile is in the arrays but not in the copies: read them again
+    result = await db.sessions.update_one(_current_version_filter(session), update)
+    return bool(result.matched_count)
@@ -0,0 +1,45 @@
+"""
+Every query in HOT_QUERIES must be served by an index once ensure_indexes()
+has run. The plans come from a real MongoDB (MONGODB_URL); the test is
+skipped when none is reachable.
+"""
+
+import asyncio
+
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
+
+from config.database import mongodb
+from config.indexes import HOT_QUERIES, ensure_indexes, explain_hot_queries
+from config.settings import settings
+
+TEST_DB_NAME = f"{settings.DB_NAME}_test_indexes"
+
+
+async def explain_on_fresh_database():
+    client = AsyncIOMotorClient(settings.MONGODB_URL, serverSelectionTimeoutMS=2000)
+    try:
+        try:
+            await client.admin.command("ping")
+        except PyMongoError as e:
+            pytest.skip(f"no MongoDB reachable at MONGODB_URL: {e}")
+        await client.drop_database(TEST_DB_NAME)
+        previous_client, previous_db = mongodb.client, mongodb.db
+        mongodb.client, mongodb.db = client, client[TEST_DB_NAME]
+        try:
+            await ensure_indexes()
+            return await explain_hot_queries()
+        finally:
+            mongodb.client, mongodb.db = previous_client, previous_db
+            await client.drop_database(TEST_DB_NAME)
+    finally:
+        client.close()
+
+
+def test_hot_queries_use_an_index():
+    report = asyncio.run(explain_on_fresh_database())
+
+    assert [entry["query"] for entry in report] == [query[0] for query in HOT_QUERIES]
+    for entry in report:
+        assert entry["uses_index"], f"{entry['collection']} {entry['query']}: {' <- '.join(entry['stages'])}"
@@ -0,0 +1,62 @@
+"""
+The keyword fallback scorer must find exactly the keywords a plain word-by-word
+scan finds: whole words, plural/feminine endings on the last word, overlapping
+keywords all counted, whatever the punctuation around them.
+"""
+
+import random
+import re
+
+import pytest
+
+from services.ai_service import SCORE_KEYWORDS, _KEYWORD_SUFFIXES, _find_keywords, estimate_score_from_answer
+
+
+def reference_keywords(text):
+    """Every keyword whose words appear consecutively among the words of `text`"""
+    words = re.findall(r"\w+", text)
+    found = set()
+    for keywords in SCORE_KEYWORDS.values():
+        for keyword in keywords:
+            *head, last = re.findall(r"\w+", keyword)
+            last_forms = {last + suffix for suffix in _KEYWORD_SUFFIXES}
+            for i in range(len(words) - len(head)):
+                if words[i:i + len(head)] == head and words[i + len(head)] in last_forms:
+                    found.add(keyword)
+                    break
+    return found
+
+
+def find_keywords(text):
+    text = text.lower()
+    return _find_keywords(text, text.split())
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("Oui, c'est structuré.", {"oui", "structuré"}),
+    ("Les processus sont structurées", {"structuré"}),
+    ("Il peut le faire, orienté client", set()),
+    ("C'est peu développé chez nous", {"peu développé", "peu", "développé"}),
+    ("Non: pas du tout!", {"non", "pas du tout"}),
+    ("Ça n’existe pas encore", {"n'existe pas", "pas encore"}),
+    ("pas\tdu\ntout", {"pas du tout"}),
+    ("en_cours", set()),
+])
+def test_whole_word_matching(text, expected):
+    assert find_keywords(text) == expected
+
+
+def test_matches_word_by_word_reference():
+    rng = random.Random(5)
+    vocabulary = [word for keywords in SCORE_KEYWORDS.values() for kw in keywords for word in kw.split()]
+    vocabulary += "nous avons_ une équipe OUI Structurées peut orienté dé-veloppé 12 l'équipe".split()
+    separators = [" ", "  ", ", ", ". ", "'", "’", "-", "\n", "\t", "!", " (", ") ", "😀", "_", "…", "«", "/"]
+    for _ in range(5000):
+        words = [rng.choice(vocabulary) + rng.choice(["", "", "s", "es", "e", "x"]) for _ in range(rng.randint(0, 25))]
+        text = "".join(word + rng.choice(separators) for word in words)
+        assert find_keywords(text) == reference_keywords(text.lower()), text
+
+
+def test_short_answers_score_zero():
+    assert estimate_score_from_answer("oui tout est automatisé") == 0
+    assert estimate_score_from_answer("") == 0
@@ -0,0 +1,152 @@
+"""
+parse_evaluation_response and EvaluationStreamParser must agree on every
+response a provider can send: well-formed, fenced, wrapped in text, or cut
+off anywhere, and only ever return a score from 0 to 3.
+"""
+
+import json
+import random
+
+import pytest
+
+from services.llm_json import EvaluationStreamParser, parse_evaluation_response
+
+FENCES = [
+    "{}",
+    "```json\n{}\n```",
+    "```json{}```",
+    "```\n{}\n```",
+    "  \n{}\n  ",
+    "Voici l'évaluation :\n{}\nMerci",
+    "```json\n{}\n```\nJ'espère que cela aide.",
+]
+
+
+def random_text(rng, length):
+    alphabet = 'abcé "\\/\n\t{}[],:’😀x'
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, length)))
+
+
+def random_responses(count=300, seed=7):
+    """(text, expected fields) for random well-formed responses in random fences"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        score = rng.choice([0, 1, 2, 3, "2", 2.0, "3.0"])
+        fields = {
+            "score": int(float(score)),
+            "justification": random_text(rng, 30),
+            "ai_reaction": random_text(rng, 40),
+            "next_question": random_text(rng, 60),
+        }
+        if rng.random() < 0.3:
+            response = {"score": score, "justification": fields["justification"]}
+        else:
+            response = {"evaluation": {"score": score, "justification": fields["justification"]}}
+        response["ai_reaction"] = fields["ai_reaction"]
+        response["next_question"] = fields["next_question"]
+        if rng.random() < 0.3:
+            response["extra"] = [1, {"score": 9, "a": [random_text(rng, 5)]}, None, True]
+        keys = list(response)
+        rng.shuffle(keys)
+        body = json.dumps(
+            {key: response[key] for key in keys},
+            ensure_ascii=rng.random() < 0.5,
+            indent=rng.choice([None, 2])
+        )
+        yield rng.choice(FENCES).replace("{}", body), fields
+
+
+def as_fields(result):
+    fields = dict(result["evaluation"])
+    fields.update({key: result[key] for key in ("ai_reaction", "next_question") if key in result})
+    return fields
+
+
+@pytest.mark.parametrize("text,expected", [
+    ('{"evaluation": {"score": 2, "justification": "ok"}, "ai_reaction": "a", "next_question": "q"}',
+     {"evaluation": {"score": 2, "justification": "ok"}, "ai_reaction": "a", "next_question": "q"}),
+    ('{"score": 2, "justification": "ok", "ai_reaction": "a", "next_question": "q"}',
+     {"evaluation": {"score": 2, "justification": "ok"}, "ai_reaction": "a", "next_question": "q"}),
+    ('{"evaluation": {"score": "3"}, "next_question": "q"}', {"evaluation": {"score": 3}, "next_question": "q"}),
+    ('{"evaluation": {"score": 2.0}}', {"evaluation": {"score": 2}}),
+    ('{"evaluation": {"score": "1.0"}, "ai_reaction": "a"}', {"evaluation": {"score": 1}, "ai_reaction": "a"}),
+    ('```json\n{"score": 0, "ai_reaction": 5}\n```', {"evaluation": {"score": 0}}),
+    ('{"evaluation": {"score": 7}, "score": 1}', {"evaluation": {"score": 1}}),
+])
+def test_well_formed_responses_are_normalized(text, expected):
+    assert parse_evaluation_response(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    '{"evaluation": {"score": 7}, "ai_reaction": "a"}',
+    '{"evaluation": {"score": -1}}',
+    '{"evaluation": {"score": 2.7}}',
+    '{"evaluation": {"score": "3.9"}}',
+    '{"score": 0.5, "ai_reaction": "a"}',
+    '{"evaluation": {"score": 2.7, "justification": "cut',
+    '{"evaluation": {"score": NaN}}',
+    '{"evaluation": {"score": "deux"}}',
+    '{"evaluation": {"score": true}}',
+    '{"evaluation": {"score": null}}',
+    '{"evaluation": "score: 2"}',
+    '{"ai_reaction": "a", "next_question": "q"}',
+    '{}',
+    '[{"score": 2}]',
+    'Je ne peux pas répondre.',
+    '',
+])
+def test_responses_without_a_valid_score_raise(text):
+    with pytest.raises(ValueError):
+        parse_evaluation_response(text)
+
+
+@pytest.mark.parametrize("text,score", [
+    ('{"evaluation": {"score": 3', 3),
+    ('```json\n{"score": 1', 1),
+    ('{"evaluation": {"justification": "ok", "score": 2.0', 2),
+])
+def test_response_cut_off_after_the_score_keeps_it(text, score):
+    assert parse_evaluation_response(text)["evaluation"]["score"] == score
+
+    parser = EvaluationStreamParser()
+    assert parser.feed(text) == ({"justification": "ok"} if "justification" in text else {})
+    assert parser.close() == {"score": score}
+    assert parser.done
+
+
+def test_complete_responses_in_any_fence():
+    for text, expected in random_responses():
+        assert as_fields(parse_evaluation_response(text)) == expected, text
+
+
+def test_chunked_stream_matches_complete_parse():
+    rng = random.Random(11)
+    for text, expected in random_responses():
+        parser = EvaluationStreamParser()
+        completed = {}
+        position = 0
+        while position < len(text):
+            size = rng.randint(1, 9)
+            completed.update(parser.feed(text[position:position + size]))
+            position += size
+        assert completed == expected, text
+        assert as_fields(parser.result()) == expected
+
+
+def test_truncated_responses_only_keep_complete_fields():
+    rng = random.Random(13)
+    for text, expected in random_responses(count=100):
+        for cut in sorted({0, len(text)} | {rng.randint(0, len(text)) for _ in range(20)}):
+            parser = EvaluationStreamParser()
+            streamed = parser.feed(text[:cut])
+            for field, value in streamed.items():
+                assert value == expected[field], (field, text[:cut])
+            try:
+                result = parse_evaluation_response(text[:cut])
+            except ValueError:
+                assert "score" not in streamed, text[:cut]
+                continue
+            fields = as_fields(result)
+            assert fields["score"] in (0, 1, 2, 3)
+            for field, value in fields.items():
+                assert value == expected[field], (field, text[:cut])
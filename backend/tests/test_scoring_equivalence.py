@@ -0,0 +1,133 @@
+"""
+The single-pass scoring engine (score grid, per-pillar totals, stored
+accumulators) must give exactly the results of the original per-dimension /
+per-pillar queries. The original calculate_pillar_scores /
+calculate_dimension_scores are reproduced below over in-memory answers.
+"""
+
+import random
+
+import pytest
+
+from seed_database import DIMENSIONS, PILLARS, CRITERIA
+from services.catalog_service import CriteriaCatalog
+from services.scoring_service import (
+    MAX_POINTS_PER_DIMENSION,
+    MAX_POINTS_PER_PILLAR,
+    accumulator_increments,
+    accumulators_to_dimension_scores,
+    build_score_grid,
+    empty_score_accumulators,
+    get_maturity_profile,
+    pillar_totals_to_accumulators,
+    score_grid_to_dimension_scores,
+    score_grid_to_pillar_totals,
+)
+
+CATALOG = CriteriaCatalog(DIMENSIONS, PILLARS, CRITERIA, version=1)
+
+
+def reference_pillar_scores(answers, dimension_code):
+    """calculate_pillar_scores before the single-pass engine"""
+    answers = [a for a in answers if a["criterion_id"].startswith(f"{dimension_code}-")]
+    pillar_scores = []
+    for pillar in [p for p in PILLARS if p["dimension_code"] == dimension_code]:
+        pillar_answers = [
+            a for a in answers
+            if a["criterion_id"].startswith(f"{dimension_code}-{pillar['code']}-")
+        ]
+        total_score = sum(a["score"] for a in pillar_answers)
+        percentage = total_score / MAX_POINTS_PER_PILLAR * 100
+        pillar_scores.append({
+            "pillar_code": pillar["code"],
+            "pillar_name": pillar["name"],
+            "score": total_score,
+            "max_score": MAX_POINTS_PER_PILLAR,
+            "percentage": round(percentage, 2),
+            "answered_count": len(pillar_answers)
+        })
+    return pillar_scores
+
+
+def reference_dimension_scores(answers):
+    """calculate_dimension_scores before the single-pass engine"""
+    dimension_scores = []
+    total_dimension_score = 0
+    for dim in DIMENSIONS:
+        pillar_scores = reference_pillar_scores(answers, dim["code"])
+        total_points = sum(p["score"] for p in pillar_scores)
+        percentage = total_points / MAX_POINTS_PER_DIMENSION * 100
+        score_on_3_scale = total_points / MAX_POINTS_PER_DIMENSION * 3
+        total_dimension_score += score_on_3_scale
+        dimension_scores.append({
+            "dimension_code": dim["code"],
+            "dimension_name": dim["name"],
+            "score": round(score_on_3_scale, 2),
+            "percentage": round(percentage, 2),
+            "total_points": total_points,
+            "max_points": MAX_POINTS_PER_DIMENSION,
+            "pillar_scores": pillar_scores,
+            "answered_count": sum(p["answered_count"] for p in pillar_scores)
+        })
+    return dimension_scores, round(total_dimension_score / len(DIMENSIONS), 2)
+
+
+def maturity(global_score):
+    return get_maturity_profile(global_score / 3 * 100)
+
+
+def answer_sets():
+    """(name, answers) covering empty, partial and complete sessions and every score value"""
+    criterion_ids = [c["criterion_id"] for c in CRITERIA]
+    rng = random.Random(2024)
+    sets = [("empty", [])]
+    for score in range(4):
+        sets.append((f"all {score}", [{"criterion_id": cid, "score": score} for cid in criterion_ids]))
+    for progress in (1, 2, 3, 11, 12, 13, 36, 47, 71):
+        sets.append((f"first {progress}", [
+            {"criterion_id": cid, "score": rng.randint(0, 3)} for cid in criterion_ids[:progress]
+        ]))
+    for i in range(40):
+        chosen = rng.sample(criterion_ids, rng.randint(0, len(criterion_ids)))
+        sets.append((f"random {i}", [{"criterion_id": cid, "score": rng.randint(0, 3)} for cid in chosen]))
+    # Answers to unknown criteria are ignored by both engines
+    sets.append(("unknown criterion", [{"criterion_id": "NOPE-P1-C1", "score": 3},
+                                       {"criterion_id": criterion_ids[0], "score": 2}]))
+    return sets
+
+
+@pytest.mark.parametrize("name,answers", answer_sets(), ids=[name for name, _ in answer_sets()])
+def test_score_grid_matches_reference(name, answers):
+    expected_dimensions, expected_global = reference_dimension_scores(answers)
+
+    dimensions, global_score = score_grid_to_dimension_scores(*build_score_grid(answers, CATALOG), CATALOG)
+
+    assert dimensions == expected_dimensions
+    assert global_score == expected_global
+    assert maturity(global_score) == maturity(expected_global)
+
+
+@pytest.mark.parametrize("name,answers", answer_sets(), ids=[name for name, _ in answer_sets()])
+def test_stored_accumulators_match_reference(name, answers):
+    expected = reference_dimension_scores(answers)
+
+    # Rebuilt from the answers (rebuild-accumulators, rescore --apply)
+    totals = score_grid_to_pillar_totals(*build_score_grid(answers, CATALOG))
+    rebuilt = pillar_totals_to_accumulators(*totals, CATALOG)
+    assert accumulators_to_dimension_scores(rebuilt, CATALOG) == expected
+
+    # Maintained with one $inc per answer (submit_answer)
+    incremented = empty_score_accumulators()
+    for answer in answers:
+        criterion = CATALOG.get(answer["criterion_id"])
+        if criterion is None:
+            continue
+        for path, value in accumulator_increments(criterion, answer["score"]).items():
+            node = incremented
+            *parents, leaf = path.split(".")[1:]
+            for key in parents:
+                node = node.setdefault(key, {})
+            node[leaf] = node.get(leaf, 0) + value
+    dimensions, global_score = accumulators_to_dimension_scores(incremented, CATALOG)
+    assert (dimensions, global_score) == expected
+    assert maturity(global_score) == maturity(expected[1])
@@ -0,0 +1,104 @@
+"""
+A turn of a collections-layout session interrupted after its session update
+must not leave the session ahead of its answers: the next read of the session
+completes it, once, and a turn that loses the compare-and-set writes nothing.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from config.database import mongodb
+from services import session_store
+from services.session_store import (
+    PENDING_TURN_FIELD,
+    StaleSession,
+    last_question,
+    record_turn,
+    session_answers,
+)
+
+
+@pytest.fixture
+def db():
+    previous = mongodb.db
+    mongodb.db = mongomock_motor.AsyncMongoMockClient()["test_session_store"]
+    yield mongodb.db
+    mongodb.db = previous
+
+
+def crash_on_insert(monkeypatch, db, collection_name):
+    """Make the first insert into `collection_name` fail, as if the process died there"""
+    collection_class = type(db[collection_name])
+    insert_one = collection_class.insert_one
+    crashed = []
+
+    async def failing_insert_one(self, document, *args, **kwargs):
+        if self.name == collection_name and not crashed:
+            crashed.append(document["_id"])
+            raise ConnectionError("process died")
+        return await insert_one(self, document, *args, **kwargs)
+
+    monkeypatch.setattr(collection_class, "insert_one", failing_insert_one)
+
+
+async def start_session(db):
+    session = {"progress": 0, "current_criterion_id": "C1", "layout": session_store.COLLECTIONS, "version": 1}
+    session["_id"] = (await db.sessions.insert_one(session)).inserted_id
+    return session
+
+
+def turn_documents(session):
+    session_id = str(session["_id"])
+    answer_doc = {"session_id": session_id, "criterion_id": "C1", "user_text": "oui", "score": 2,
+                  "created_at": datetime(2024, 1, 1)}
+    question_doc = {"session_id": session_id, "criterion_id": "C2", "generated_text": "Et ensuite ?",
+                    "created_at": datetime(2024, 1, 1)}
+    return answer_doc, question_doc, {"progress": 1, "current_criterion_id": "C2"}
+
+
+@pytest.mark.parametrize("failing_collection", ["answers", "questions"])
+def test_interrupted_turn_is_completed_by_the_next_read(monkeypatch, db, failing_collection):
+    async def scenario():
+        session = await start_session(db)
+        crash_on_insert(monkeypatch, db, failing_collection)
+        with pytest.raises(ConnectionError):
+            await record_turn(session, *turn_documents(session), {})
+
+        # The session moved forward and carries the turn's documents
+        session = await db.sessions.find_one({"_id": session["_id"]})
+        assert session["progress"] == 1 and session["version"] == 2
+        assert PENDING_TURN_FIELD in session
+
+        answers = await session_answers(session)
+        question = await last_question(session, "C2")
+        assert [answer["user_text"] for answer in answers] == ["oui"]
+        assert question["generated_text"] == "Et ensuite ?"
+        assert str(question["_id"]) == str(session[PENDING_TURN_FIELD]["question"]["_id"])
+        assert PENDING_TURN_FIELD not in await db.sessions.find_one({"_id": session["_id"]})
+
+        # Completing it again (a stale copy of the session) adds nothing
+        await session_answers(session)
+        assert await db.answers.count_documents({}) == 1
+        assert await db.questions.count_documents({}) == 1
+
+    asyncio.run(scenario())
+
+
+def test_turn_losing_the_compare_and_set_writes_nothing(db):
+    async def scenario():
+        session = await start_session(db)
+        answer_doc, question_doc, updates = turn_documents(session)
+        await record_turn(session, answer_doc, question_doc, updates, {})
+
+        with pytest.raises(StaleSession):
+            await record_turn(session, *turn_documents(session), {})
+        assert await db.answers.count_documents({}) == 1
+        assert await db.questions.count_documents({}) == 1
+        stored = await db.sessions.find_one({"_id": session["_id"]})
+        assert stored["version"] == 2 and PENDING_TURN_FIELD not in stored
+
+    asyncio.run(scenario())
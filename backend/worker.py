@@ -0,0 +1,76 @@
+"""
+Job worker for the DigiAssistant backend
+
+Usage:
+    python worker.py [--types submit_answer,rescore] [--concurrency N]
+
+Claims jobs from the jobs collection (services/job_queue.py) and runs them
+with the handlers of services/job_handlers.py until stopped (Ctrl+C or
+SIGTERM), finishing the jobs already running first. Any number of workers
+can run side by side.
+
+Uses the same MONGODB_URL / DB_NAME configuration as the API (.env file or
+environment variables).
+"""
+import argparse
+import asyncio
+import signal
+
+from config.settings import settings
+from config.database import connect_to_mongo, close_mongo_connection
+from config.indexes import ensure_indexes
+from services.catalog_service import load_catalog
+from services.local_scorer import load_local_scorer
+from services.provider_executor import shutdown_provider_executor
+from services.job_queue import run_worker
+from services.job_handlers import JOB_HANDLERS
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="DigiAssistant job worker")
+    parser.add_argument(
+        "--types",
+        help=f"Comma-separated job types to run (default: all of {', '.join(JOB_HANDLERS)})"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.JOB_WORKER_CONCURRENCY,
+        help="Jobs run at the same time"
+    )
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    job_types = args.types.split(",") if args.types else list(JOB_HANDLERS)
+    unknown = [job_type for job_type in job_types if job_type not in JOB_HANDLERS]
+    if unknown:
+        raise SystemExit(f"Unknown job type(s): {', '.join(unknown)}")
+
+    await connect_to_mongo()
+    try:
+        await ensure_indexes()
+        await load_catalog()
+        await load_local_scorer()
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signal_number, stop.set)
+            except NotImplementedError:
+                # Windows: Ctrl+C interrupts the worker instead
+                pass
+        await run_worker(
+            {job_type: JOB_HANDLERS[job_type] for job_type in job_types},
+            concurrency=args.concurrency,
+            stop=stop
+        )
+    finally:
+        shutdown_provider_executor()
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
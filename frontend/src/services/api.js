@@ -23,6 +23,21 @@ api.interceptors.response.use(
   }
 );
 
+// Idempotency keys of requests that have not succeeded yet. A retry of the same
+// request (e.g. after the timeout fired) reuses its key, so the server returns the
+// first request's response instead of evaluating and saving the answer twice.
+const pendingIdempotencyKeys = new Map();
+
+const idempotencyKey = (request) => {
+  if (!pendingIdempotencyKeys.has(request)) {
+    const key = globalThis.crypto?.randomUUID
+      ? globalThis.crypto.randomUUID()
+      : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    pendingIdempotencyKeys.set(request, key);
+  }
+  return pendingIdempotencyKeys.get(request);
+};
+
 // ==================== COMPANY ====================
 export const companyAPI = {
   create: async (data) => {
@@ -69,16 +84,24 @@ export const sessionAPI = {
 
   getNextQuestion: async (sessionId) => {
     console.log('Getting next question for session:', sessionId);
-    const response = await api.post(`/sessions/${sessionId}/next`);
+    const request = `next:${sessionId}`;
+    const response = await api.post(`/sessions/${sessionId}/next`, null, {
+      headers: { 'Idempotency-Key': idempotencyKey(request) }
+    });
+    pendingIdempotencyKeys.delete(request);
     console.log('Next question:', response.data);
     return response.data;
   },
 
   submitAnswer: async (sessionId, answer) => {
     console.log('Submitting answer for session:', sessionId);
+    const request = `answers:${sessionId}:${answer}`;
     const response = await api.post(`/sessions/${sessionId}/answers`, {
       user_text: answer
+    }, {
+      headers: { 'Idempotency-Key': idempotencyKey(request) }
     });
+    pendingIdempotencyKeys.delete(request);
     console.log('Answer response:', response.data);
     return response.data;
   },